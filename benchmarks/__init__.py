@@ -0,0 +1,3 @@
+"""Benchmarks of the project, should be run as modules from the repository root,
+e.g. `python -m benchmarks.bench_pickle`
+"""
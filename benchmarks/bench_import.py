@@ -0,0 +1,58 @@
+"""Measures cold-start import times of modules in fresh interpreters
+
+Exits with status 1 if the best time of any module exceeds its budget.
+"""
+import subprocess
+import sys
+
+# Budget in seconds of importing every module into a fresh interpreter
+BUDGETS = {
+    "gg_project": 0.01,
+    "gg_project.productions": 0.25,
+    "gg_project.derivation": 0.25,
+    "gg_project.checkpoint": 0.35,
+    "gg_project.vis": 0.35,
+    "gg_project.render": 0.35,
+}
+REPEATS = 5
+
+HEAVY_MODULES = ("networkx", "numpy", "matplotlib")
+
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(" ".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def _import_time(module: str) -> tuple[float, str]:
+    output = subprocess.run(
+        [sys.executable, "-c", _SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()
+    return float(output[0]), output[1] if len(output) > 1 else ""
+
+
+def main() -> None:
+    print(f"{'module':<24} {'import [s]':>11} {'budget [s]':>11}  loaded")
+
+    exceeded = False
+    for module, budget in BUDGETS.items():
+        results = [_import_time(module) for _ in range(REPEATS)]
+        best, loaded = min(results)
+        exceeded |= best > budget
+        print(
+            f"{module:<24} {best:>11.4f} {budget:>11.4f}  {loaded or '-'}"
+            + ("  OVER BUDGET" if best > budget else "")
+        )
+
+    if exceeded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
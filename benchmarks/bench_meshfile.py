@@ -0,0 +1,42 @@
+"""Measures opening a mesh file compared with unpickling the graph"""
+import os
+import pickle
+import tempfile
+import time
+
+from benchmarks.meshes import grid_graph
+from gg_project.mesh_arrays import MeshArrays
+from gg_project.meshfile import load_mesh, save_mesh
+
+SIZES = (50, 200, 700)
+
+
+def main() -> None:
+    print(f"{'nodes':>9} {'pickle.load [s]':>16} {'load_mesh [s]':>14} {'bytes':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            graph = grid_graph(size)
+            pickle_path = os.path.join(directory, "graph.pickle")
+            mesh_path = os.path.join(directory, "graph.mesh")
+
+            with open(pickle_path, "wb") as file:
+                pickle.dump(graph, file, protocol=pickle.HIGHEST_PROTOCOL)
+            save_mesh(mesh_path, MeshArrays.from_graph(graph))
+
+            start = time.perf_counter()
+            with open(pickle_path, "rb") as file:
+                pickle.load(file)
+            pickle_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            load_mesh(mesh_path)
+            mesh_time = time.perf_counter() - start
+
+            print(
+                f"{len(graph):>9} {pickle_time:>16.4f} {mesh_time:>14.4f} {os.path.getsize(mesh_path):>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Compares sending a graph to a worker process pickled with sending its arrays out of band
+
+Every method is timed end to end: pickling in this process (dumps), then
+copying the pickle and its out-of-band buffers through a pipe and unpickling
+them in a worker process (transfer + loads). Out-of-band buffers avoid copies
+while pickling, but a worker which needs an `nx.Graph` still has to build it
+with `to_graph`, which is slower than unpickling the graph. Arrays pay off
+only for workers using them directly (e.g. `MeshArrays.neighbors`).
+"""
+import multiprocessing
+import multiprocessing.connection
+import pickle
+import time
+from typing import Callable
+
+from benchmarks.meshes import grid_graph
+from gg_project.mesh_arrays import MeshArrays, dumps, loads
+
+SIZES = (50, 200, 400)
+REPEATS = 3
+
+# Rebuilds what was sent from the pickle and its out-of-band buffers
+RECEIVERS: dict[str, Callable[[bytes, list[bytes]], object]] = {
+    "graph": lambda data, buffers: pickle.loads(data),
+    "mesh": loads,
+    "graph of mesh": lambda data, buffers: loads(data, buffers).to_graph(),
+}
+
+
+def _worker(connection: multiprocessing.connection.Connection) -> None:
+    while (message := connection.recv()) is not None:
+        receiver, count = message
+        data = connection.recv_bytes()
+        buffers = [connection.recv_bytes() for _ in range(count)]
+        RECEIVERS[receiver](data, buffers)
+        connection.send(None)
+
+
+def _send(
+    connection: multiprocessing.connection.Connection,
+    receiver: str,
+    data: bytes,
+    buffers: list[pickle.PickleBuffer],
+) -> None:
+    """Copies the pickle and its buffers to the worker and waits until it unpickles them"""
+    connection.send((receiver, len(buffers)))
+    connection.send_bytes(data)
+    for buffer in buffers:
+        connection.send_bytes(buffer.raw())
+    connection.recv()
+
+
+def _best_times(
+    connection: multiprocessing.connection.Connection,
+    receiver: str,
+    pickle_function: Callable[[], tuple[bytes, list[pickle.PickleBuffer]]],
+) -> tuple[float, float, int]:
+    best_dumps = best_transfer = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        data, buffers = pickle_function()
+        pickled = time.perf_counter()
+        _send(connection, receiver, data, buffers)
+        best_dumps = min(best_dumps, pickled - start)
+        best_transfer = min(best_transfer, time.perf_counter() - pickled)
+
+    size = len(data) + sum(buffer.raw().nbytes for buffer in buffers)
+    return best_dumps, best_transfer, size
+
+
+def main() -> None:
+    connection, worker_connection = multiprocessing.Pipe()
+    worker = multiprocessing.Process(target=_worker, args=(worker_connection,))
+    worker.start()
+
+    print(
+        f"{'nodes':>9} {'sent':<22} {'received':<14} {'dumps [s]':>10}"
+        f" {'transfer + loads [s]':>21} {'total [s]':>10} {'bytes':>12}"
+    )
+    try:
+        for size in SIZES:
+            graph = grid_graph(size)
+            mesh = MeshArrays.from_graph(graph)
+
+            results = [
+                (
+                    "pickle.dumps(graph)",
+                    "graph",
+                    _best_times(
+                        connection,
+                        "graph",
+                        lambda: (
+                            pickle.dumps(graph, protocol=pickle.HIGHEST_PROTOCOL),
+                            [],
+                        ),
+                    ),
+                ),
+                (
+                    "dumps(mesh)",
+                    "mesh",
+                    _best_times(connection, "mesh", lambda: dumps(mesh)),
+                ),
+                (
+                    "from_graph + dumps",
+                    "graph of mesh",
+                    _best_times(
+                        connection,
+                        "graph of mesh",
+                        lambda: dumps(MeshArrays.from_graph(graph)),
+                    ),
+                ),
+            ]
+
+            totals = {}
+            for sent, received, (dumps_time, transfer_time, size_bytes) in results:
+                totals[received] = dumps_time + transfer_time
+                print(
+                    f"{len(graph):>9} {sent:<22} {received:<14} {dumps_time:>10.4f}"
+                    f" {transfer_time:>21.4f} {totals[received]:>10.4f}"
+                    f" {size_bytes:>12}"
+                )
+            print(
+                f"{'':>9} sending a graph through its arrays takes"
+                f" {totals['graph of mesh'] / totals['graph']:.2f}x as long as pickling it"
+            )
+    finally:
+        connection.send(None)
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compares refining a mesh tile by tile with refining and closing it as a whole
+
+The sequential run refines every element with `refine_tile` given the whole
+graph, then closes the result with a derivation of closing productions, which
+searches the whole graph for every step. `refine_tiled` refines tiles in worker
+processes and closes what is left between them only around shared nodes.
+"""
+import time
+
+from benchmarks.meshes import grid_graph
+from gg_project.derivation import derive
+from gg_project.productions.groups import CLOSING_PRODUCTIONS
+from gg_project.tiling import Tile, refine_tile, refine_tiled
+from gg_project.vertex_params import VertexType
+
+SIZES = (3, 5)
+MAX_LEVEL = 2
+GRID = (2, 2)
+
+
+def main() -> None:
+    print(
+        f"{'nodes':>9} {'refined nodes':>14} {'sequential [s]':>15}"
+        f" {'refine_tiled [s]':>17} {'speedup':>8}"
+    )
+
+    for size in SIZES:
+        graph = grid_graph(size)
+        interiors = frozenset(
+            i
+            for i, node in graph.nodes.items()
+            if node["vertex_type"] == VertexType.INTERIOR
+        )
+
+        start = time.perf_counter()
+        refined = refine_tile(Tile(graph, interiors), MAX_LEVEL, closing=())
+        sequential = derive(refined, CLOSING_PRODUCTIONS, len(refined))
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tiled = refine_tiled(graph, MAX_LEVEL, GRID)
+        tiled_time = time.perf_counter() - start
+
+        assert len(tiled) == len(sequential)
+        print(
+            f"{len(graph):>9} {len(tiled):>14} {sequential_time:>15.2f}"
+            f" {tiled_time:>17.2f} {sequential_time / tiled_time:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
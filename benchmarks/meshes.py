@@ -0,0 +1,28 @@
+"""Contains generators of large graphs used by benchmarks"""
+import networkx as nx
+import numpy as np
+
+from gg_project.triangulation import from_arrays
+
+
+def grid_graph(size: int) -> nx.Graph:
+    """Builds the graph of a unit square split into size x size squares
+
+    Every square is split into two triangles along its diagonal, in the same
+    way production 1 splits the whole square.
+    """
+    i, j = np.meshgrid(np.arange(size + 1), np.arange(size + 1), indexing="ij")
+    vertices = np.column_stack([i.ravel(), j.ravel()]) / size
+
+    corner = (np.arange(size)[:, None] * (size + 1) + np.arange(size)).ravel()
+    lower_left, upper_left = corner, corner + 1
+    lower_right, upper_right = corner + size + 1, corner + size + 2
+    triangles = np.stack(
+        [
+            np.column_stack([lower_left, upper_left, lower_right]),
+            np.column_stack([upper_left, lower_right, upper_right]),
+        ],
+        axis=1,
+    ).reshape(-1, 3)
+
+    return from_arrays(vertices, triangles)
@@ -1,5 +1,41 @@
 """ Project for Gramatyki grafowe subject on AGH UST -
 Gramatyka grafowa do rekurencyjnej adaptacji siatek trójkątnych
+
+Submodules are imported on first access of the attribute (e.g. `gg_project.vis`),
+so importing the package does not import networkx, NumPy or matplotlib.
 """
+import importlib
 
 __version__ = "0.1.0"
+
+SUBMODULES = (
+    "adaptation",
+    "animation",
+    "checkpoint",
+    "delta",
+    "derivation",
+    "export",
+    "mesh_arrays",
+    "meshfile",
+    "parallel",
+    "productions",
+    "render",
+    "scheduling",
+    "shared_mesh",
+    "spatial",
+    "svg",
+    "tiling",
+    "triangulation",
+    "vertex_params",
+    "vis",
+)
+
+
+def __getattr__(name: str):
+    if name in SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *SUBMODULES])
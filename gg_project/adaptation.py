@@ -0,0 +1,104 @@
+"""Contains a driver of adaptive refinement
+
+Elements to be broken are chosen by an error indicator, which is evaluated
+for all candidate elements at once on NumPy arrays.
+"""
+from typing import Callable, Sequence, Type
+
+import networkx as nx
+import numpy as np
+
+from gg_project.productions import Production
+from gg_project.productions.groups import CLOSING_PRODUCTIONS, REFINING_PRODUCTIONS
+from gg_project.productions.registry import ProductionRegistry
+from gg_project.tiling import close
+from gg_project.triangulation import iter_leaf_triangles
+
+# Receives centroids (T, 2), corners (T, 3, 2) and levels (T,) of candidate elements
+# and returns a boolean mask (T,) of elements which should be broken
+Indicator = Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+
+def candidates(graph: nx.Graph) -> tuple[list[int], np.ndarray, np.ndarray]:
+    """Collects elements which can be broken
+
+    :param graph: graph in which elements will be searched for
+
+    :returns: ids of interior nodes of the elements, positions of their three
+              corners (T, 3, 2) and their levels (T,)
+    """
+    node_ids = []
+    corners = []
+    levels = []
+
+    for node_id, corner_ids in iter_leaf_triangles(graph):
+        node_ids.append(node_id)
+        corners.append([graph.nodes[i]["position"] for i in corner_ids])
+        levels.append(graph.nodes[node_id]["level"])
+
+    return (
+        node_ids,
+        np.array(corners, dtype=float).reshape(-1, 3, 2),
+        np.array(levels, dtype=int),
+    )
+
+
+def refine_adaptively(
+    graph: nx.Graph,
+    indicator: Indicator,
+    refining: Sequence[Type[Production]] = REFINING_PRODUCTIONS,
+    closing: Sequence[Type[Production]] = CLOSING_PRODUCTIONS,
+    max_iterations: int | None = None,
+) -> nx.Graph:
+    """Break elements marked by the indicator until it does not mark any
+
+    In every iteration the indicator is called once for all candidate elements.
+    Every marked element is broken by the first matching refining production,
+    then closing productions are applied as long as any of them matches. They
+    are searched for only around nodes changed by the refining productions.
+
+    :param graph:          graph which will be refined
+    :param indicator:      error indicator choosing elements to break
+    :param refining:       productions breaking a marked element, anchored at
+                           its interior node
+    :param closing:        productions applied after marked elements are broken
+    :param max_iterations: maximal number of iterations (unbounded if given None)
+
+    :returns: _new_ refined graph
+    """
+    registry = ProductionRegistry(closing)
+    iteration = 0
+    while max_iterations is None or iteration < max_iterations:
+        iteration += 1
+
+        node_ids, corners, levels = candidates(graph)
+        if not node_ids:
+            break
+
+        marked = np.asarray(
+            indicator(corners.mean(axis=1), corners, levels), dtype=bool
+        )
+        if marked.shape != (len(node_ids),):
+            raise ValueError(
+                f"Indicator returned mask of shape {marked.shape},"
+                f" expected {(len(node_ids),)}"
+            )
+
+        changed: set[int] = set()
+        for index in np.flatnonzero(marked):
+            for production in refining:
+                subgraph = production.find_isomorphic_at(graph, node_ids[index])
+                if subgraph is not None:
+                    new_graph = production.apply(graph, subgraph)
+                    changed.update(subgraph)
+                    changed.update(j for i in subgraph for j in graph.adj[i])
+                    changed.update(new_graph.nodes.keys() - graph.nodes.keys())
+                    graph = new_graph
+                    break
+
+        if not changed:
+            break
+
+        graph = close(graph, (i for _, i in registry.woken(graph, changed)), closing)
+
+    return graph
@@ -0,0 +1,446 @@
+"""Contains an animator of derivations driven by deltas of applied productions
+
+Nodes and edges of the drawn graph occupy slots of preallocated arrays backing
+two matplotlib collections. A delta only updates slots of the nodes and edges
+it touches, and a frame is rendered by blitting the collections onto the
+cached background of the figure with the Agg backend.
+
+matplotlib is imported only when an animator is created and Pillow (an optional
+dependency, needed for GIFs) only when a GIF is written.
+"""
+import shutil
+import subprocess
+from typing import IO, Iterable, Protocol, Sequence, cast
+
+import networkx as nx
+import numpy as np
+
+from gg_project.delta import Delta
+from gg_project.vis import COLOR_MAPPING
+
+# Part of the drawn extent added on every side when limits of the axes grow
+MARGIN = 0.1
+
+
+class _Sink(Protocol):
+    """Destination of rendered frames"""
+
+    def write(self, frame: np.ndarray) -> None:
+        """Writes the frame, an RGBA array (height, width, 4) which may be reused"""
+
+    def close(self) -> None:
+        """Finishes writing the file"""
+
+
+class _GifSink:
+    """Writes frames into a GIF file as soon as they are rendered
+
+    Every frame is quantised to its own palette (stored as the local colour
+    table of the frame) and encoded by Pillow on its own, so no frames are
+    kept in memory.
+    """
+
+    def __init__(self, path: str, fps: float):
+        self._file = open(path, "wb")  # pylint: disable=consider-using-with
+        self._duration = 1000 / fps
+        self._frames = 0
+
+    def write(self, frame: np.ndarray) -> None:
+        """Converts the frame into a palette image and appends it to the file"""
+        # pylint: disable=import-outside-toplevel
+        from PIL import GifImagePlugin, Image
+
+        image = Image.fromarray(frame).convert("RGB").quantize()
+        if self._frames == 0:
+            header, _ = GifImagePlugin.getheader(image, info={"loop": 0})
+            self._file.write(b"".join(header))
+        self._file.write(
+            b"".join(
+                GifImagePlugin.getdata(
+                    image, duration=self._duration, include_color_table=True
+                )
+            )
+        )
+        self._file.flush()
+        self._frames += 1
+
+    def close(self) -> None:
+        """Writes the trailer of the GIF and closes the file"""
+        with self._file:
+            self._file.write(b";")
+
+
+class _FFMpegSink:
+    """Pipes raw frames into an ffmpeg process encoding them into a video"""
+
+    def __init__(self, path: str, fps: float, size: tuple[int, int]):
+        import matplotlib  # pylint: disable=import-outside-toplevel
+
+        executable = shutil.which(matplotlib.rcParams["animation.ffmpeg_path"])
+        if executable is None:
+            raise RuntimeError("ffmpeg is needed to write videos, but it was not found")
+
+        width, height = size
+        self._process = subprocess.Popen(  # pylint: disable=consider-using-with
+            [
+                executable,
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "rawvideo",
+                "-pix_fmt",
+                "rgba",
+                "-s",
+                f"{width}x{height}",
+                "-r",
+                str(fps),
+                "-i",
+                "-",
+                "-vf",
+                "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+                "-pix_fmt",
+                "yuv420p",
+                path,
+            ],
+            stdin=subprocess.PIPE,
+        )
+        assert self._process.stdin is not None
+        self._stdin: IO[bytes] = self._process.stdin
+
+    def write(self, frame: np.ndarray) -> None:
+        """Writes raw pixels of the frame into the input of ffmpeg"""
+        self._stdin.write(frame.tobytes())
+
+    def close(self) -> None:
+        """Closes the input of ffmpeg and waits until it encodes the video
+
+        :raises RuntimeError: if ffmpeg failed
+        """
+        self._stdin.close()
+        if self._process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with code {self._process.returncode}")
+
+
+class DerivationAnimator:
+    """Writes frames of a derivation into a GIF or MP4 file
+
+    Drawing coordinates are computed as by `vis.draw`, but only for nodes
+    whose coordinates could be changed by a delta: added or retyped nodes,
+    ends of added or removed edges and nodes sharing a position with them.
+    Only changed slots are copied into the collections, so the work done per
+    frame outside of rasterising the collections is proportional to the size
+    of the delta.
+
+    :param graph:    graph on which the derivation starts, it is not modified
+    :param path:     path of the written file, ending with .gif or .mp4
+    :param level:    the level which will be drawn (all if given None)
+    :param fps:      number of frames per second
+    :param figsize:  figsize of the frames
+    :param dpi:      resolution of the frames
+    :param nodesize: size of the nodes
+    """
+
+    def __init__(
+        self,
+        graph: nx.Graph,
+        path: str,
+        level: int | None = None,
+        fps: float = 4,
+        figsize: tuple[float, float] = (8, 6),
+        dpi: int = 100,
+        nodesize: float = 50,
+    ):
+        # pylint: disable=too-many-arguments, import-outside-toplevel
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import LineCollection
+        from matplotlib.colors import to_rgba
+        from matplotlib.figure import Figure
+        from matplotlib.path import Path
+
+        self._to_rgba = to_rgba
+        self._path_type = Path
+        self._graph = graph.copy()
+        self._level = level
+        self._groups: dict[tuple, set[int]] = {}
+        self._node_slots: dict[int, int] = {}
+        self._edge_slots: dict[tuple[int, int], int] = {}
+        self._free_node_slots: list[int] = []
+        self._free_edge_slots: list[int] = []
+        self._offsets = np.full((16, 2), np.nan)
+        self._colors = np.zeros((16, 4))
+        self._segments = np.full((16, 2, 2), np.nan)
+        # slots changed since the last frame
+        self._changed_node_slots: set[int] = set()
+        self._changed_edge_slots: set[int] = set()
+
+        self._figure = Figure(figsize=figsize, dpi=dpi)
+        self._canvas = FigureCanvasAgg(self._figure)
+        self._axes = self._figure.add_axes((0, 0, 1, 1))
+        self._axes.set_axis_off()
+        self._edges = LineCollection(
+            [], colors="black", linewidths=1.0, zorder=1, animated=True
+        )
+        self._nodes = self._axes.scatter([], [], s=nodesize, zorder=2, animated=True)
+        self._axes.add_collection(self._edges)
+        self._background = None
+
+        self._sink: _Sink
+        if str(path).lower().endswith(".gif"):
+            self._sink = _GifSink(str(path), fps)
+        elif str(path).lower().endswith(".mp4"):
+            self._sink = _FFMpegSink(str(path), fps, self._canvas.get_width_height())
+        else:
+            raise ValueError(f"Unsupported animation format of {path}")
+
+        for node_id in self._graph.nodes:
+            self._add_to_group(node_id)
+        self._refresh(set(self._graph.nodes))
+        self._render()
+
+    def _is_drawn(self, node_id: int) -> bool:
+        return self._level is None or self._graph.nodes[node_id]["level"] == self._level
+
+    @staticmethod
+    def _group_key(node: dict) -> tuple | None:
+        if node["position"] is None:
+            return None
+        return node["level"], tuple(node["position"])
+
+    def _add_to_group(self, node_id: int) -> set[int]:
+        key = self._group_key(self._graph.nodes[node_id])
+        if key is None:
+            return set()
+        group = self._groups.setdefault(key, set())
+        group.add(node_id)
+        return group
+
+    def _remove_from_group(self, node_id: int, node: dict) -> set[int]:
+        key = self._group_key(node)
+        if key is None:
+            return set()
+        group = self._groups.get(key, set())
+        group.discard(node_id)
+        if not group:
+            self._groups.pop(key, None)
+        return group
+
+    def _coordinates(self, node_id: int) -> tuple[float, float]:
+        """Computes drawing coordinates of the node as `vis.node_positions` does"""
+        # pylint: disable=invalid-name
+        nodes = self._graph.nodes
+        node = nodes[node_id]
+        level = node["level"]
+        neighbor_positions = np.array(
+            [
+                nodes[j]["position"]
+                for j in self._graph.adj[node_id]
+                if nodes[j]["level"] == level and nodes[j]["position"] is not None
+            ]
+        ).reshape(-1, 2)
+
+        key = self._group_key(node)
+        if key is not None:
+            x, y = node["position"]
+            if len(self._groups[key]) > 1:
+                [x, y] = [x, y] + np.sum((neighbor_positions - (x, y)) / 15, axis=0)
+        else:
+            with np.errstate(invalid="ignore"):
+                [x, y] = np.mean(neighbor_positions, axis=0)
+
+        return float(x), float(-(y + 2 * level))
+
+    @staticmethod
+    def _take_slot(
+        slots: dict, free: list[int], key, arrays: list[np.ndarray]
+    ) -> tuple[int, list[np.ndarray]]:
+        if key in slots:
+            return slots[key], arrays
+        if not free:
+            capacity = len(arrays[0])
+            free.extend(range(2 * capacity - 1, capacity - 1, -1))
+            arrays = [
+                np.concatenate([array, np.full_like(array, np.nan)]) for array in arrays
+            ]
+        slots[key] = free.pop()
+        return slots[key], arrays
+
+    def _set_node(self, node_id: int) -> None:
+        slot, (self._offsets, self._colors) = self._take_slot(
+            self._node_slots,
+            self._free_node_slots,
+            node_id,
+            [self._offsets, self._colors],
+        )
+        self._offsets[slot] = self._coordinates(node_id)
+        self._colors[slot] = self._to_rgba(
+            COLOR_MAPPING[self._graph.nodes[node_id]["vertex_type"]]
+        )
+        self._changed_node_slots.add(slot)
+
+    def _set_edge(self, edge: tuple[int, int]) -> None:
+        slot, (self._segments,) = self._take_slot(
+            self._edge_slots, self._free_edge_slots, edge, [self._segments]
+        )
+        self._segments[slot] = self._offsets[[self._node_slots[i] for i in edge]]
+        self._changed_edge_slots.add(slot)
+
+    def _drop_node(self, node_id: int) -> None:
+        slot = self._node_slots.pop(node_id, None)
+        if slot is not None:
+            self._offsets[slot] = np.nan
+            self._free_node_slots.append(slot)
+            self._changed_node_slots.add(slot)
+
+    def _drop_edge(self, edge: tuple[int, int]) -> None:
+        slot = self._edge_slots.pop(edge, None)
+        if slot is not None:
+            self._segments[slot] = np.nan
+            self._free_edge_slots.append(slot)
+            self._changed_edge_slots.add(slot)
+
+    def _refresh(self, touched: set[int]) -> None:
+        """Recomputes slots of the given nodes and of edges between drawn nodes"""
+        touched = {i for i in touched if i in self._graph}
+        for node_id in touched:
+            if self._is_drawn(node_id):
+                self._set_node(node_id)
+            else:
+                self._drop_node(node_id)
+
+        for node_id in touched:
+            for neighbor in self._graph.adj[node_id]:
+                edge = (min(node_id, neighbor), max(node_id, neighbor))
+                if node_id in self._node_slots and neighbor in self._node_slots:
+                    self._set_edge(edge)
+                else:
+                    self._drop_edge(edge)
+
+    def update(self, delta: Delta) -> None:
+        """Applies the delta to the animated graph and writes the next frame"""
+        touched = set()
+        for node_id, node in delta.removed_nodes:
+            touched |= self._remove_from_group(node_id, node)
+            self._drop_node(node_id)
+        for edge in delta.removed_edges:
+            touched.update(edge)
+            self._drop_edge((min(edge), max(edge)))
+
+        changed: dict[int, dict] = {}
+        for node_id, key, old, _ in delta.changes:
+            changed.setdefault(node_id, dict(self._graph.nodes[node_id]))[key] = old
+        for node_id, old_node in changed.items():
+            touched |= self._remove_from_group(node_id, old_node)
+
+        delta.apply(self._graph)
+
+        for node_id, _ in delta.added_nodes:
+            touched |= self._add_to_group(node_id)
+        for node_id in changed:
+            touched |= self._add_to_group(node_id)
+            touched.update(self._graph.adj[node_id])
+        for edge in delta.added_edges:
+            touched.update(edge)
+        touched.update(changed)
+
+        self._refresh(touched)
+        self._render()
+
+    def _limits_cover(self, offsets: np.ndarray) -> bool:
+        if offsets.size == 0:
+            return True
+        (x_min, x_max), (y_min, y_max) = self._axes.get_xlim(), self._axes.get_ylim()
+        return bool(
+            offsets[:, 0].min() >= x_min
+            and offsets[:, 0].max() <= x_max
+            and offsets[:, 1].min() >= y_min
+            and offsets[:, 1].max() <= y_max
+        )
+
+    def _fit_limits(self) -> None:
+        offsets = self._offsets[~np.isnan(self._offsets[:, 0])]
+        if offsets.size != 0:
+            lower, upper = offsets.min(axis=0), offsets.max(axis=0)
+            margin = np.maximum(upper - lower, 1.0) * MARGIN
+            self._axes.set_xlim(lower[0] - margin[0], upper[0] + margin[0])
+            self._axes.set_ylim(lower[1] - margin[1], upper[1] + margin[1])
+
+    def _update_collections(
+        self, node_slots: np.ndarray, edge_slots: np.ndarray
+    ) -> None:
+        """Copies changed slots into the collections, all slots if the arrays grew"""
+        # arrays and the list returned by the getters are drawn by the collections
+        offsets = cast(np.ndarray, self._nodes.get_offsets())
+        if len(offsets) != len(self._offsets):
+            self._nodes.set_offsets(self._offsets)
+            self._nodes.set_facecolor(
+                cast(Sequence[tuple[float, float, float, float]], self._colors)
+            )
+        else:
+            offsets[node_slots] = self._offsets[node_slots]
+            colors = cast(np.ndarray, self._nodes.get_facecolor())
+            colors[node_slots] = self._colors[node_slots]
+
+        paths = cast(list, self._edges.get_paths())
+        if len(paths) != len(self._segments):
+            self._edges.set_segments(list(self._segments))
+        else:
+            for slot in edge_slots:
+                paths[slot] = self._path_type(self._segments[slot])
+
+    def _render(self) -> None:
+        node_slots = np.fromiter(self._changed_node_slots, dtype=np.intp)
+        edge_slots = np.fromiter(self._changed_edge_slots, dtype=np.intp)
+        self._changed_node_slots.clear()
+        self._changed_edge_slots.clear()
+
+        # limits covered all nodes drawn before, only the changed ones are checked
+        offsets = self._offsets[node_slots]
+        offsets = offsets[~np.isnan(offsets[:, 0])]
+        if self._background is None or not self._limits_cover(offsets):
+            self._fit_limits()
+            self._canvas.draw()
+            self._background = self._canvas.copy_from_bbox(self._figure.bbox)
+
+        self._update_collections(node_slots, edge_slots)
+
+        self._canvas.restore_region(self._background)
+        self._axes.draw_artist(self._edges)
+        self._axes.draw_artist(self._nodes)
+        self._sink.write(np.asarray(self._canvas.buffer_rgba()))
+
+    def positions(self) -> dict[int, tuple[float, float]]:
+        """Returns current drawing coordinates of drawn nodes"""
+        return {
+            node_id: tuple(self._offsets[slot].tolist())
+            for node_id, slot in self._node_slots.items()
+        }
+
+    def close(self) -> None:
+        """Finishes writing the file"""
+        self._sink.close()
+
+    def __enter__(self) -> "DerivationAnimator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def animate(graph: nx.Graph, deltas: Iterable[Delta], path: str, **kwargs) -> nx.Graph:
+    """Writes an animation of the derivation described by the deltas
+
+    :param graph:  graph on which the derivation starts
+    :param deltas: deltas of consecutive steps, e.g. from `Production.apply_delta`
+    :param path:   path of the written file, ending with .gif or .mp4
+    :param kwargs: other arguments of `DerivationAnimator`
+
+    :returns: _new_ graph after all the deltas
+    """
+    graph = graph.copy()
+    with DerivationAnimator(graph, path, **kwargs) as animator:
+        for delta in deltas:
+            animator.update(delta)
+            delta.apply(graph)
+
+    return graph
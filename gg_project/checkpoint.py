@@ -0,0 +1,206 @@
+"""Contains periodic checkpoints of long derivations
+
+A checkpoint consists of a snapshot of the graph after some step and the
+log of steps applied after it. Both are written on a background thread,
+so the derivation is not stalled by disk writes. After a crash the
+derivation is resumed from the snapshot by replaying the log.
+"""
+
+import collections
+import concurrent.futures
+import contextlib
+import os
+import pathlib
+from typing import Iterable, Type
+
+import networkx as nx
+
+from gg_project.derivation import (
+    MAGIC,
+    DerivationLog,
+    Step,
+    TruncatedLogError,
+    read_log,
+    replay,
+)
+from gg_project.mesh_arrays import MeshArrays
+from gg_project.meshfile import load_mesh, save_mesh
+from gg_project.productions import Production
+
+SNAPSHOT_NAME = "snapshot.mesh"
+
+
+def _tail_name(steps: int | str) -> str:
+    return f"tail-{steps}.log"
+
+
+def _write_snapshot(directory: pathlib.Path, graph: nx.Graph, steps: int) -> None:
+    path = directory / SNAPSHOT_NAME
+    temporary = path.with_suffix(".tmp")
+    save_mesh(
+        temporary,
+        MeshArrays.from_graph(graph),
+        {"steps": steps, "graph": dict(graph.graph)},
+    )
+    with open(temporary, "rb") as file:
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+class Checkpointer:
+    """Writes checkpoints of a derivation on a background thread
+
+    Graphs passed to the checkpointer are converted later on, they must not
+    be modified afterwards (graphs returned by productions never are).
+    Their `graph.graph` attributes have to be JSON-serialisable.
+
+    :param directory: directory in which checkpoints are stored
+    :param graph:     graph after `steps` steps, written as the first snapshot
+    :param interval:  number of steps after which a new snapshot is written
+    :param steps:     number of steps applied before the given graph
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        graph: nx.Graph,
+        interval: int,
+        steps: int = 0,
+    ):
+        self._directory = pathlib.Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._interval = interval
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._pending: collections.deque[concurrent.futures.Future] = (
+            collections.deque()
+        )
+        self._tail_stack = contextlib.ExitStack()
+        self._tail_path: pathlib.Path | None = None
+        self._tail: DerivationLog | None = None
+        self._snapshot_steps = steps
+        self.steps = steps
+
+        self._submit(self._snapshot, graph, steps)
+
+    def _submit(self, function, *args) -> None:
+        while self._pending and self._pending[0].done():
+            self._pending.popleft().result()
+        self._pending.append(self._executor.submit(function, *args))
+
+    def _snapshot(self, graph: nx.Graph, steps: int) -> None:
+        # the tail is created (with a complete header) before the snapshot
+        # referring to it, so a crash in between never leaves a broken tail
+        tail_path = self._directory / _tail_name(steps)
+        temporary = tail_path.with_suffix(".tmp")
+        previous = self._tail_path
+        with contextlib.ExitStack() as stack:
+            tail_file = stack.enter_context(open(temporary, "wb"))
+            tail = DerivationLog(tail_file)
+            tail.flush()
+            os.fsync(tail_file.fileno())
+            os.replace(temporary, tail_path)
+
+            _write_snapshot(self._directory, graph, steps)
+
+            # the new tail is kept open, the previous one is closed
+            self._tail_stack.close()
+            self._tail_stack = stack.pop_all()
+
+        self._tail_path = tail_path
+        self._tail = tail
+        if previous is None:
+            # tails left by a derivation this one was resumed from
+            stale = set(self._directory.glob(_tail_name("*"))) - {tail_path}
+        else:
+            stale = {previous} - {tail_path}
+        for path in stale:
+            path.unlink(missing_ok=True)
+
+    def _append(self, production: Type[Production], node_ids: tuple[int, ...]) -> None:
+        # the first snapshot, which opens the tail, is always submitted first
+        assert self._tail is not None
+        self._tail.append(production, node_ids)
+        self._tail.flush()
+
+    def append(
+        self, production: Type[Production], node_ids: Iterable[int], graph: nx.Graph
+    ) -> None:
+        """Records a step of the derivation
+
+        :param production: applied production
+        :param node_ids:   ids of nodes the production was applied to
+        :param graph:      graph after the step
+        """
+        self.steps += 1
+        self._submit(self._append, production, tuple(node_ids))
+        if self.steps - self._snapshot_steps >= self._interval:
+            self._snapshot_steps = self.steps
+            self._submit(self._snapshot, graph, self.steps)
+
+    def close(self) -> None:
+        """Waits until all checkpoints are written
+
+        :raises OSError: if writing any of them failed
+        """
+        self._executor.shutdown()
+        try:
+            while self._pending:
+                self._pending.popleft().result()
+        finally:
+            self._tail_stack.close()
+
+    def __enter__(self) -> "Checkpointer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def resume(
+    directory: str | os.PathLike, graph: nx.Graph | None = None
+) -> tuple[nx.Graph, int]:
+    """Restores the graph from the latest checkpoint
+
+    A step partially written to the log before a crash is ignored, steps
+    before it are replayed. So is a log cut short within its header.
+
+    :param directory: directory in which checkpoints were stored
+    :param graph:     graph on which the derivation started, used if no
+                      snapshot was written yet
+
+    :returns: restored graph (including `graph.graph` attributes, such as
+              the reserved id block) and the number of steps applied to it
+
+    :raises FileNotFoundError: if no snapshot exists and no graph was given
+    :raises ValueError:        if the log is not a valid derivation log
+    """
+    directory = pathlib.Path(directory)
+    snapshot_path = directory / SNAPSHOT_NAME
+
+    if snapshot_path.exists():
+        mesh, attributes = load_mesh(snapshot_path)
+        steps = attributes["steps"]
+        graph = mesh.to_graph()
+        graph.graph.update(attributes["graph"])
+    elif graph is not None:
+        steps = 0
+    else:
+        raise FileNotFoundError(f"No checkpoint found in {directory}")
+
+    tail_path = directory / _tail_name(steps)
+    if not tail_path.exists():
+        return graph, steps
+
+    logged: list[Step] = []
+    with open(tail_path, "rb") as file:
+        header = file.read(len(MAGIC))
+        if len(header) < len(MAGIC) and MAGIC.startswith(header):
+            return graph, steps
+        file.seek(0)
+        try:
+            for step in read_log(file):
+                logged.append(step)
+        except TruncatedLogError:
+            pass
+
+    return replay(graph, logged), steps + len(logged)
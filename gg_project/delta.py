@@ -0,0 +1,162 @@
+"""Contains deltas describing how a production changed a graph
+
+A delta lists only nodes and edges touched by the production, so keeping
+a derivation history costs memory proportional to right sides of the
+applied productions instead of whole copies of the graph.
+"""
+import dataclasses
+import itertools
+from typing import Iterable
+
+import networkx as nx
+
+
+class _Missing:
+    """Value of a parameter which a node does not have"""
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+    def __reduce__(self) -> str:
+        return "MISSING"
+
+
+# Old value of a parameter added to a node, new value of a removed one
+MISSING = _Missing()
+
+
+@dataclasses.dataclass(frozen=True)
+class Delta:
+    """Difference between a graph and the graph obtained from it
+
+    :ivar added_nodes:   ids and parameters of nodes which were added
+    :ivar removed_nodes: ids and parameters of nodes which were removed
+                         (e.g. merged by productions 6 and 7)
+    :ivar added_edges:   edges which were added
+    :ivar removed_edges: edges which were removed, including all edges
+                         of removed nodes
+    :ivar changes:       id, name of the parameter, old and new value of every
+                         parameter changed on a node present in both graphs,
+                         `MISSING` stands for a parameter the node did not have
+    :ivar graph_changes: name, old and new value of every changed attribute of
+                         the graph itself (`graph.graph`), e.g. the record of
+                         the next free id advanced by productions
+    """
+
+    added_nodes: tuple[tuple[int, dict], ...] = ()
+    removed_nodes: tuple[tuple[int, dict], ...] = ()
+    added_edges: tuple[tuple[int, int], ...] = ()
+    removed_edges: tuple[tuple[int, int], ...] = ()
+    changes: tuple[tuple[int, str, object, object], ...] = ()
+    graph_changes: tuple[tuple[str, object, object], ...] = ()
+
+    @classmethod
+    def between(
+        cls, old: nx.Graph, new: nx.Graph, changed: Iterable[int] | None = None
+    ) -> "Delta":
+        """Computes the delta which turns the old graph into the new one
+
+        :param old:     graph before the change
+        :param new:     graph after the change
+        :param changed: nodes which may have been changed or removed, or whose
+                        edges may have changed, e.g. the subgraph a production
+                        was applied at; the new graph then has to be a copy of
+                        the old one with added nodes appended, as returned by
+                        productions (whole graphs are compared if given None)
+
+        :returns: delta which applied to the old graph gives the new one
+        """
+        if changed is None:
+            touched = [*new.nodes, *(i for i in old.nodes if i not in new)]
+            return cls._of_nodes(old, new, touched)
+
+        changed = list(dict.fromkeys(changed))
+        # added nodes are the last ones, found without iterating over the graph
+        count = len(new) - len(old) + sum(i not in new for i in changed)
+        nodes = new._node  # pylint: disable=protected-access
+        added = list(itertools.islice(reversed(nodes), count))[::-1]
+        return cls._of_nodes(old, new, changed + added)
+
+    @classmethod
+    def _of_nodes(cls, old: nx.Graph, new: nx.Graph, touched: list[int]) -> "Delta":
+        """Computes the delta assuming that nothing but the given nodes changed"""
+        changes: list[tuple[int, str, object, object]] = []
+        for node_id in touched:
+            if node_id not in old or node_id not in new:
+                continue
+
+            old_node = old.nodes[node_id]
+            node = new.nodes[node_id]
+            changes.extend(
+                (node_id, key, old_node.get(key, MISSING), node.get(key, MISSING))
+                for key in dict.fromkeys([*node, *old_node])
+                if old_node.get(key, MISSING) != node.get(key, MISSING)
+            )
+
+        new_edges = new.edges(i for i in touched if i in new)
+        old_edges = old.edges(i for i in touched if i in old)
+        return cls(
+            added_nodes=tuple((i, dict(new.nodes[i])) for i in touched if i not in old),
+            removed_nodes=tuple(
+                (i, dict(old.nodes[i])) for i in touched if i not in new
+            ),
+            added_edges=tuple((i, j) for i, j in new_edges if not old.has_edge(i, j)),
+            removed_edges=tuple((i, j) for i, j in old_edges if not new.has_edge(i, j)),
+            changes=tuple(changes),
+            graph_changes=tuple(
+                (key, old.graph.get(key, MISSING), new.graph.get(key, MISSING))
+                for key in dict.fromkeys([*new.graph, *old.graph])
+                if old.graph.get(key, MISSING) != new.graph.get(key, MISSING)
+            ),
+        )
+
+    def __len__(self) -> int:
+        return (
+            len(self.added_nodes)
+            + len(self.removed_nodes)
+            + len(self.added_edges)
+            + len(self.removed_edges)
+            + len(self.changes)
+            + len(self.graph_changes)
+        )
+
+    def apply(self, graph: nx.Graph) -> nx.Graph:
+        """Applies the delta to the given graph _in place_
+
+        Applied to the graph it was computed from, the delta gives a graph equal
+        to the one it was computed to (new nodes are appended in the same order).
+        Nodes restored by an inverted delta are appended at the end of the graph.
+
+        :returns: the given graph
+        """
+        graph.remove_edges_from(self.removed_edges)
+        graph.remove_nodes_from(i for i, _ in self.removed_nodes)
+        graph.add_nodes_from((i, dict(node)) for i, node in self.added_nodes)
+        graph.add_edges_from(self.added_edges)
+        for node_id, key, _, value in self.changes:
+            if value is MISSING:
+                del graph.nodes[node_id][key]
+            else:
+                graph.nodes[node_id][key] = value
+        for key, _, value in self.graph_changes:
+            if value is MISSING:
+                del graph.graph[key]
+            else:
+                graph.graph[key] = value
+
+        return graph
+
+    def inverted(self) -> "Delta":
+        """Returns the delta which undoes this one"""
+        return Delta(
+            added_nodes=self.removed_nodes,
+            removed_nodes=self.added_nodes,
+            added_edges=self.removed_edges,
+            removed_edges=self.added_edges,
+            changes=tuple(
+                (node_id, key, new, old) for node_id, key, old, new in self.changes
+            ),
+            graph_changes=tuple(
+                (key, new, old) for key, old, new in self.graph_changes
+            ),
+        )
@@ -0,0 +1,269 @@
+"""Contains a compact log of applied productions and its deterministic replay
+
+Only the number of every applied production and the ids of the nodes it was
+applied to are stored. Productions are always applied to `sorted_subgraph`
+of the matched nodes, and they create nodes with ids depending only on the
+order of its nodes, so replaying the log from the graph it was recorded on
+rebuilds every intermediate graph without searching for isomorphic subgraphs.
+
+Format: `MAGIC`, then for every step the production number, the number of
+nodes and their sorted ids (the first one followed by differences between
+consecutive ones), all as unsigned LEB128 varints.
+"""
+import collections
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Iterator, Sequence, Type
+
+import networkx as nx
+
+from gg_project.productions import Production
+from gg_project.productions.p1 import Production1
+from gg_project.productions.p2 import Production2
+from gg_project.productions.p3 import Production3
+from gg_project.productions.p4 import Production4
+from gg_project.productions.p5 import Production5
+from gg_project.productions.p6 import Production6
+from gg_project.productions.p7 import Production7
+from gg_project.productions.registry import ProductionRegistry
+from gg_project.productions.utils import sorted_subgraph
+
+if TYPE_CHECKING:
+    from gg_project.checkpoint import Checkpointer
+
+MAGIC = b"GGLOG\x00\x01"
+
+# Productions are stored in the log by their (1-based) position in this tuple
+PRODUCTIONS: tuple[Type[Production], ...] = (
+    Production1,
+    Production2,
+    Production3,
+    Production4,
+    Production5,
+    Production6,
+    Production7,
+)
+PRODUCTION_NUMBERS = {
+    production: number for number, production in enumerate(PRODUCTIONS, start=1)
+}
+
+# Production applied to the subgraph induced by nodes with given ids
+Step = collections.namedtuple("Step", ["production", "node_ids"])
+
+
+class TruncatedLogError(ValueError):
+    """Raised when a derivation log ends in the middle of a step
+
+    Steps read before the error are complete, the log was most likely cut
+    short while the last step was being written.
+    """
+
+
+def _encode_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(file: BinaryIO) -> int | None:
+    value = 0
+    shift = 0
+    while True:
+        byte = file.read(1)
+        if not byte:
+            if shift:
+                raise TruncatedLogError("Derivation log ends in the middle of a step")
+            return None
+
+        value |= (byte[0] & 0x7F) << shift
+        shift += 7
+        if byte[0] < 0x80:
+            return value
+
+
+def encode_step(production: Type[Production], node_ids: Iterable[int]) -> bytes:
+    """Encodes a single step of the log"""
+    node_ids = sorted(node_ids)
+
+    out = bytearray()
+    _encode_varint(PRODUCTION_NUMBERS[production], out)
+    _encode_varint(len(node_ids), out)
+    previous = 0
+    for node_id in node_ids:
+        _encode_varint(node_id - previous, out)
+        previous = node_id
+
+    return bytes(out)
+
+
+class DerivationLog:
+    """Writes applied productions to a binary file as they are applied
+
+    Steps are written through the file object immediately, so the log can be
+    streamed to disk while the derivation runs.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self._file.write(MAGIC)
+        self.steps = 0
+
+    def append(self, production: Type[Production], node_ids: Iterable[int]) -> None:
+        """Records that the production was applied to the nodes with given ids"""
+        self._file.write(encode_step(production, node_ids))
+        self.steps += 1
+
+    def flush(self) -> None:
+        """Flushes the underlying file"""
+        self._file.flush()
+
+
+def read_steps(file: BinaryIO) -> Iterator[Step]:
+    """Reads steps encoded by `encode_step` until the end of the file
+
+    :raises TruncatedLogError: if the file ends in the middle of a step
+    :raises ValueError:        if a step names an unknown production
+    """
+    while (number := _read_varint(file)) is not None:
+        if not 1 <= number <= len(PRODUCTIONS):
+            raise ValueError(f"Unknown production number {number} in derivation log")
+
+        count = _read_varint(file)
+        if count is None:
+            raise TruncatedLogError("Derivation log ends in the middle of a step")
+
+        node_ids = []
+        previous = 0
+        for _ in range(count):
+            delta = _read_varint(file)
+            if delta is None:
+                raise TruncatedLogError("Derivation log ends in the middle of a step")
+            previous += delta
+            node_ids.append(previous)
+
+        yield Step(PRODUCTIONS[number - 1], tuple(node_ids))
+
+
+def read_log(file: BinaryIO) -> Iterator[Step]:
+    """Reads steps of a log written by `DerivationLog`
+
+    :raises TruncatedLogError: if the file ends in the middle of a step
+    :raises ValueError:        if the file is not a derivation log
+    """
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("File is not a derivation log")
+
+    yield from read_steps(file)
+
+
+def replay(
+    graph: nx.Graph, steps: Iterable[Step], count: int | None = None
+) -> nx.Graph:
+    """Apply logged steps to the graph they were recorded on
+
+    :param graph: graph on which the derivation was started
+    :param steps: steps of the derivation
+    :param count: number of steps which will be replayed (all if given None)
+
+    :returns: _new_ graph after the replayed steps
+    """
+    for index, step in enumerate(steps):
+        if count is not None and index >= count:
+            break
+
+        graph = step.production.apply(graph, sorted_subgraph(graph, step.node_ids))
+
+    return graph
+
+
+def derive(
+    graph: nx.Graph,
+    productions: Sequence[Type[Production]],
+    max_steps: int,
+    log: DerivationLog | None = None,
+    checkpointer: "Checkpointer | None" = None,
+) -> nx.Graph:
+    """Apply the first matching production until none matches or steps run out
+
+    :param graph:        graph on which the derivation starts
+    :param productions:  productions in the order in which they are tried
+    :param max_steps:    maximal number of applied productions
+    :param log:          log to which applied productions are written
+    :param checkpointer: checkpointer to which applied productions and
+                         resulting graphs are passed
+
+    :returns: _new_ derived graph
+    """
+    for _ in range(max_steps):
+        for production in productions:
+            subgraph = production.find_isomorphic_to_left_side(graph)
+            if subgraph is not None:
+                break
+        else:
+            break
+
+        node_ids = tuple(sorted(subgraph.nodes))
+        if log is not None:
+            log.append(production, node_ids)
+        graph = production.apply(graph, sorted_subgraph(graph, node_ids))
+        if checkpointer is not None:
+            checkpointer.append(production, node_ids, graph)
+
+    return graph
+
+
+def derive_by_anchor(
+    graph: nx.Graph,
+    registry: ProductionRegistry,
+    max_steps: int,
+    log: DerivationLog | None = None,
+    checkpointer: "Checkpointer | None" = None,
+) -> nx.Graph:
+    """Apply productions woken by changes until none matches or steps run out
+
+    At first every production is woken at every node of its anchor type.
+    After a production is applied, productions are woken only around the
+    nodes it matched or created (see `ProductionRegistry.woken`). Woken
+    productions are searched for at their anchors in the order they were
+    woken in, instead of searching every production in the whole graph.
+
+    :param graph:        graph on which the derivation starts
+    :param registry:     productions which will be applied
+    :param max_steps:    maximal number of applied productions
+    :param log:          log to which applied productions are written
+    :param checkpointer: checkpointer to which applied productions and
+                         resulting graphs are passed
+
+    :returns: _new_ derived graph
+    """
+    # dictionary used as an ordered set of (production, anchor) pairs
+    pending = dict.fromkeys(registry.woken(graph, graph.nodes))
+    steps = 0
+
+    while pending and steps < max_steps:
+        production, node_id = next(iter(pending))
+        del pending[production, node_id]
+        if (
+            node_id not in graph
+            or graph.nodes[node_id]["vertex_type"] != production.anchor_type
+        ):
+            continue
+
+        subgraph = production.find_isomorphic_at(graph, node_id)
+        if subgraph is None:
+            continue
+
+        node_ids = tuple(sorted(subgraph.nodes))
+        if log is not None:
+            log.append(production, node_ids)
+        new_graph = production.apply(graph, sorted_subgraph(graph, node_ids))
+        if checkpointer is not None:
+            checkpointer.append(production, node_ids, new_graph)
+        steps += 1
+
+        changed = {j for i in node_ids for j in graph.adj[i]}.union(
+            node_ids, new_graph.nodes.keys() - graph.nodes.keys()
+        )
+        graph = new_graph
+        pending.update(dict.fromkeys(registry.woken(graph, changed)))
+
+    return graph
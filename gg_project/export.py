@@ -0,0 +1,158 @@
+"""Contains exporters of the finest triangulation to mesh file formats
+
+Triangles are read from the graph one by one and written as soon as possible,
+so memory used by the export grows only with the number of distinct vertices.
+Exterior nodes at the same position (e.g. sides broken by only one of
+the neighbouring elements) are written as a single vertex.
+
+Supported formats: Wavefront OBJ, ASCII and binary little-endian PLY and
+legacy ASCII VTK (polydata). Vertices get z = 0 and faces are
+counter-clockwise.
+"""
+import os
+import struct
+from typing import BinaryIO, Iterator
+
+import networkx as nx
+
+from gg_project.triangulation import iter_leaf_triangles, position_key
+
+Position = tuple[float, float]
+
+
+def iter_faces(graph: nx.Graph) -> Iterator[tuple[Position, Position, Position]]:
+    """Iterates over counter-clockwise corner positions of elements which are not broken"""
+    for _, corner_ids in iter_leaf_triangles(graph):
+        first, second, third = (graph.nodes[i]["position"] for i in corner_ids)
+        cross = (second[0] - first[0]) * (third[1] - first[1]) - (
+            second[1] - first[1]
+        ) * (third[0] - first[0])
+        yield (first, second, third) if cross >= 0 else (first, third, second)
+
+
+def _vertex_line(position: Position) -> bytes:
+    return b"%r %r 0\n" % (float(position[0]), float(position[1]))
+
+
+def _index_vertices(graph: nx.Graph) -> tuple[dict[tuple[int, int], int], int]:
+    """Numbers distinct vertices in the order of their first use and counts faces"""
+    indices: dict[tuple[int, int], int] = {}
+    face_count = 0
+    for face in iter_faces(graph):
+        face_count += 1
+        for position in face:
+            indices.setdefault(position_key(position), len(indices))
+
+    return indices, face_count
+
+
+def _iter_vertices(graph: nx.Graph) -> Iterator[Position]:
+    """Iterates over distinct vertices in the order of `_index_vertices`"""
+    seen = set()
+    for face in iter_faces(graph):
+        for position in face:
+            key = position_key(position)
+            if key not in seen:
+                seen.add(key)
+                yield position
+
+
+def write_obj(graph: nx.Graph, file: BinaryIO) -> None:
+    """Writes the finest triangulation as Wavefront OBJ, in a single pass"""
+    indices: dict[tuple[int, int], int] = {}
+    for face in iter_faces(graph):
+        face_indices = []
+        for position in face:
+            key = position_key(position)
+            if key not in indices:
+                indices[key] = len(indices) + 1
+                file.write(b"v " + _vertex_line(position))
+            face_indices.append(indices[key])
+        file.write(b"f %d %d %d\n" % tuple(face_indices))
+
+
+def write_ply(graph: nx.Graph, file: BinaryIO, binary: bool = False) -> None:
+    """Writes the finest triangulation as PLY
+
+    Counts of vertices and faces are needed in the header, so triangles
+    are read from the graph three times.
+
+    :param graph:  graph containing the triangulation
+    :param file:   file opened in binary mode
+    :param binary: whether to use the binary little-endian variant instead of ASCII
+    """
+    indices, face_count = _index_vertices(graph)
+    file.write(
+        b"ply\n"
+        b"format %s 1.0\n"
+        b"element vertex %d\n"
+        b"property double x\n"
+        b"property double y\n"
+        b"property double z\n"
+        b"element face %d\n"
+        b"property list uchar int vertex_indices\n"
+        b"end_header\n"
+        % (
+            b"binary_little_endian" if binary else b"ascii",
+            len(indices),
+            face_count,
+        )
+    )
+
+    vertex = struct.Struct("<3d")
+    face = struct.Struct("<B3i")
+    for position in _iter_vertices(graph):
+        file.write(vertex.pack(*position, 0.0) if binary else _vertex_line(position))
+    for positions in iter_faces(graph):
+        face_indices = [indices[position_key(position)] for position in positions]
+        file.write(
+            face.pack(3, *face_indices)
+            if binary
+            else b"3 %d %d %d\n" % tuple(face_indices)
+        )
+
+
+def write_vtk(graph: nx.Graph, file: BinaryIO) -> None:
+    """Writes the finest triangulation as legacy ASCII VTK polydata
+
+    Like `write_ply`, reads triangles from the graph three times.
+    """
+    indices, face_count = _index_vertices(graph)
+    file.write(
+        b"# vtk DataFile Version 3.0\n"
+        b"gg_project mesh\n"
+        b"ASCII\n"
+        b"DATASET POLYDATA\n"
+        b"POINTS %d double\n" % len(indices)
+    )
+    for position in _iter_vertices(graph):
+        file.write(_vertex_line(position))
+
+    file.write(b"POLYGONS %d %d\n" % (face_count, 4 * face_count))
+    for positions in iter_faces(graph):
+        file.write(
+            b"3 %d %d %d\n"
+            % tuple(indices[position_key(position)] for position in positions)
+        )
+
+
+def export(graph: nx.Graph, path: str | os.PathLike, binary: bool = False) -> None:
+    """Writes the finest triangulation into a file, in the format given by its suffix
+
+    :param graph:  graph containing the triangulation
+    :param path:   path ending with .obj, .ply or .vtk
+    :param binary: whether to use binary PLY
+
+    :raises ValueError: if the suffix is not supported
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in (".obj", ".ply", ".vtk"):
+        raise ValueError(f"Unsupported mesh file format {suffix!r}")
+
+    with open(path, "wb") as file:
+        if suffix == ".obj":
+            write_obj(graph, file)
+        elif suffix == ".ply":
+            write_ply(graph, file, binary)
+        else:
+            write_vtk(graph, file)
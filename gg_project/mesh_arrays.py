@@ -0,0 +1,234 @@
+"""Contains a flat array representation of generated graphs
+
+Arrays can be shared between processes or stored without serialising
+the per-node dictionaries of a networkx graph. Pickled with protocol 5,
+their data is passed out of band, without copying it into the pickle.
+"""
+
+import dataclasses
+import itertools
+import pickle
+from typing import Iterable
+
+import networkx as nx
+import numpy as np
+
+from gg_project.vertex_params import VertexType
+
+# Vertex types are stored as indices into this tuple
+VERTEX_TYPES = tuple(VertexType)
+VERTEX_TYPE_CODES = {vertex_type: code for code, vertex_type in enumerate(VERTEX_TYPES)}
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class MeshArrays:
+    """Contains parameters and adjacency of all vertices of a graph
+
+    Rows follow the order of nodes in the graph. Neighbours of the node in row `r`
+    are the rows `indices[indptr[r]:indptr[r + 1]]`. Missing positions are NaN.
+    """
+
+    ids: np.ndarray
+    vertex_types: np.ndarray
+    levels: np.ndarray
+    positions: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    ID_DTYPE = np.dtype(np.int64)
+    VERTEX_TYPE_DTYPE = np.dtype(np.uint8)
+    LEVEL_DTYPE = np.dtype(np.int16)
+    POSITION_DTYPE = np.dtype(np.float64)
+    INDEX_DTYPE = np.dtype(np.int64)
+
+    @classmethod
+    def from_graph(cls, graph: nx.Graph) -> "MeshArrays":
+        """Converts the given graph into arrays"""
+        count = len(graph)
+        ids = np.fromiter(graph.nodes, cls.ID_DTYPE, count)
+        # raw dictionaries are iterated much faster than networkx views
+        nodes = [node for _, node in graph.nodes(data=True)]
+        adjacency = [neighbors for _, neighbors in graph.adjacency()]
+        missing = (np.nan, np.nan)
+
+        indptr = np.zeros(count + 1, dtype=cls.INDEX_DTYPE)
+        np.cumsum(
+            np.fromiter(map(len, adjacency), cls.INDEX_DTYPE, count),
+            out=indptr[1:],
+        )
+
+        # neighbour ids are translated into rows all at once
+        order = np.argsort(ids, kind="stable")
+        neighbor_ids = np.fromiter(
+            itertools.chain.from_iterable(adjacency), cls.ID_DTYPE, int(indptr[-1])
+        )
+
+        return cls(
+            ids=ids,
+            vertex_types=np.fromiter(
+                (VERTEX_TYPE_CODES[node["vertex_type"]] for node in nodes),
+                cls.VERTEX_TYPE_DTYPE,
+                count,
+            ),
+            levels=np.fromiter(
+                (node["level"] for node in nodes), cls.LEVEL_DTYPE, count
+            ),
+            positions=np.array(
+                [
+                    missing if node["position"] is None else node["position"]
+                    for node in nodes
+                ],
+                dtype=cls.POSITION_DTYPE,
+            ).reshape(count, 2),
+            indptr=indptr,
+            indices=order[np.searchsorted(ids, neighbor_ids, sorter=order)].astype(
+                cls.INDEX_DTYPE
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows(self, node_ids: Iterable[int]) -> np.ndarray:
+        """Returns rows in which the given nodes are stored
+
+        :raises KeyError: if some of the nodes are not stored in the arrays
+        """
+        order = np.argsort(self.ids, kind="stable")
+        node_ids = np.fromiter(node_ids, self.ID_DTYPE)
+        positions = np.searchsorted(self.ids, node_ids, sorter=order)
+
+        # ids which are not stored are sorted in next to a different id or past the end
+        found = positions < len(order)
+        found[found] = self.ids[order[positions[found]]] == node_ids[found]
+        if not found.all():
+            raise KeyError(f"Nodes {node_ids[~found].tolist()} are not in the arrays")
+
+        return order[positions]
+
+    def neighbors(self, row: int) -> np.ndarray:
+        """Returns rows of neighbours of the node stored in the given row"""
+        return self.indices[self.indptr[row] : self.indptr[row + 1]]
+
+    def node(self, row: int) -> dict:
+        """Returns parameters of the node stored in the given row as in a graph"""
+        x, y = self.positions[row]  # pylint: disable=invalid-name
+        return {
+            "vertex_type": VERTEX_TYPES[self.vertex_types[row]],
+            "position": None if np.isnan(x) else (float(x), float(y)),
+            "level": int(self.levels[row]),
+        }
+
+    def _checked_rows(self, rows: Iterable[int]) -> np.ndarray:
+        rows = np.fromiter(rows, self.INDEX_DTYPE)
+        invalid = rows[(rows < 0) | (rows >= len(self))]
+        if invalid.size:
+            raise ValueError(f"Rows {invalid.tolist()} are not in the arrays")
+        return rows
+
+    def select(self, rows: Iterable[int]) -> "MeshArrays":
+        """Returns arrays of the subgraph induced by the given rows
+
+        Selected rows keep their order, neighbours outside of them are dropped.
+
+        :raises ValueError: if some of the rows are not in the arrays
+        """
+        rows = np.unique(self._checked_rows(rows))
+        new_rows = np.full(len(self), -1, dtype=self.INDEX_DTYPE)
+        new_rows[rows] = np.arange(len(rows))
+
+        sources = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        mask = (new_rows[sources] >= 0) & (new_rows[self.indices] >= 0)
+        indptr = np.zeros(len(rows) + 1, dtype=self.INDEX_DTYPE)
+        np.cumsum(
+            np.bincount(new_rows[sources[mask]], minlength=len(rows)),
+            out=indptr[1:],
+        )
+
+        return MeshArrays(
+            ids=self.ids[rows],
+            vertex_types=self.vertex_types[rows],
+            levels=self.levels[rows],
+            positions=self.positions[rows],
+            indptr=indptr,
+            indices=new_rows[self.indices[mask]],
+        )
+
+    def to_graph(self, rows: Iterable[int] | None = None) -> nx.Graph:
+        """Converts arrays back into a graph
+
+        The result is equal to `graph.copy()` of the converted graph, including
+        the order of nodes and neighbours.
+
+        :param rows: rows of nodes which will be included (all if given None),
+                     the result is the subgraph induced by them
+
+        :returns: _new_ graph
+
+        :raises ValueError: if some of the rows are not in the arrays
+        """
+        selected = np.zeros(len(self), dtype=bool)
+        if rows is None:
+            selected[:] = True
+        else:
+            selected[self._checked_rows(rows)] = True
+
+        rows = np.flatnonzero(selected)
+        missing = np.isnan(self.positions[rows, 0]).tolist()
+        nodes = zip(
+            [VERTEX_TYPES[code] for code in self.vertex_types[rows].tolist()],
+            map(tuple, self.positions[rows].tolist()),
+            missing,
+            self.levels[rows].tolist(),
+        )
+
+        graph = nx.Graph()
+        graph.add_nodes_from(
+            zip(
+                self.ids[rows].tolist(),
+                (
+                    {
+                        "vertex_type": vertex_type,
+                        "position": None if is_missing else position,
+                        "level": level,
+                    }
+                    for vertex_type, position, is_missing, level in nodes
+                ),
+            )
+        )
+
+        sources = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        # every edge is added at its first occurrence, as `graph.copy()` does
+        mask = selected[sources] & selected[self.indices] & (sources < self.indices)
+        graph.add_edges_from(
+            zip(
+                self.ids[sources[mask]].tolist(),
+                self.ids[self.indices[mask]].tolist(),
+            )
+        )
+
+        return graph
+
+
+def dumps(mesh: MeshArrays) -> tuple[bytes, list[pickle.PickleBuffer]]:
+    """Pickles the given arrays using protocol 5
+
+    Data of the arrays is not copied into the pickle, but a receiver which
+    needs a graph still has to build it with `MeshArrays.to_graph`, which takes
+    longer than unpickling the graph itself (see `benchmarks.bench_pickle`).
+    Send arrays this way only to receivers which use them directly.
+
+    :returns: pickle containing only metadata of the arrays and buffers
+              exposing their data, both are needed by `loads`
+    """
+    buffers: list[pickle.PickleBuffer] = []
+    data = pickle.dumps(mesh, protocol=5, buffer_callback=buffers.append)
+    return data, buffers
+
+
+def loads(data: bytes, buffers: Iterable) -> MeshArrays:
+    """Unpickles arrays pickled by `dumps`, reusing memory of the given buffers
+
+    Building a graph from the result is slower than `pickle.loads` of the graph.
+    """
+    return pickle.loads(data, buffers=buffers)
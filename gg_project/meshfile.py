@@ -0,0 +1,121 @@
+"""Contains a versioned single-file format of mesh arrays
+
+Layout: `MAGIC`, format version (uint16), length of the header (uint32),
+JSON header describing every array (dtype, shape and offset from the start
+of the file) followed by the arrays, each aligned to `ALIGNMENT` bytes.
+Integers in the preamble are little-endian, dtypes of arrays are explicit.
+
+Loaded arrays are read-only views of a memory map of the file, so even
+large meshes are opened instantly and paged in lazily when accessed.
+"""
+import dataclasses
+import json
+import os
+import struct
+
+import numpy as np
+
+from gg_project.mesh_arrays import MeshArrays
+
+MAGIC = b"GGMESH\x00"
+VERSION = 1
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct("<HI")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_mesh(
+    path: str | os.PathLike, mesh: MeshArrays, attributes: dict | None = None
+) -> None:
+    """Writes arrays into a file
+
+    :param path:       path of the file which will be created or overwritten
+    :param mesh:       arrays which will be written
+    :param attributes: JSON-serialisable attributes of the graph (e.g. `graph.graph`)
+                       stored along with the arrays
+    """
+    arrays = {
+        field.name: np.ascontiguousarray(getattr(mesh, field.name))
+        for field in dataclasses.fields(mesh)
+    }
+
+    def header(offsets: list[int]) -> bytes:
+        return json.dumps(
+            {
+                "arrays": [
+                    {
+                        "name": name,
+                        "dtype": array.dtype.str,
+                        "shape": array.shape,
+                        "offset": offset,
+                    }
+                    for (name, array), offset in zip(arrays.items(), offsets)
+                ],
+                "attributes": attributes or {},
+            }
+        ).encode()
+
+    # offsets depend on the length of the header, which depends on the offsets;
+    # reserving room for them first makes the header length final
+    placeholder = header([2**63 - 1] * len(arrays))
+    end = _aligned(len(MAGIC) + _PREAMBLE.size + len(placeholder))
+    offsets = []
+    for array in arrays.values():
+        offsets.append(end)
+        end = _aligned(end + array.nbytes)
+
+    data = header(offsets).ljust(len(placeholder))
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(_PREAMBLE.pack(VERSION, len(data)))
+        file.write(data)
+        for array, offset in zip(arrays.values(), offsets):
+            file.seek(offset)
+            file.write(array.tobytes())
+        file.truncate(end)
+
+
+def load_mesh(path: str | os.PathLike) -> tuple[MeshArrays, dict]:
+    """Opens arrays written by `save_mesh` without reading them
+
+    :param path: path of the file
+
+    :returns: read-only arrays backed by a memory map of the file and attributes
+              stored with them (JSON lists are converted into tuples)
+
+    :raises ValueError: if the file is not a mesh file, its version is not supported
+                        or an array does not fit in it
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a mesh file")
+
+        version, header_length = _PREAMBLE.unpack(file.read(_PREAMBLE.size))
+        if version != VERSION:
+            raise ValueError(f"Unsupported mesh file version {version}")
+
+        header = json.loads(
+            file.read(header_length),
+            object_hook=lambda values: {
+                key: tuple(value) if isinstance(value, list) else value
+                for key, value in values.items()
+            },
+        )
+
+    memory = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for array in header["arrays"]:
+        dtype = np.dtype(array["dtype"])
+        offset = array["offset"]
+        nbytes = int(np.prod(array["shape"])) * dtype.itemsize
+        if offset < 0 or offset % ALIGNMENT or offset + nbytes > len(memory):
+            raise ValueError(
+                f"Array {array['name']} of {path} is misaligned or past the end of file"
+            )
+        arrays[array["name"]] = np.ndarray(array["shape"], dtype, memory, offset)
+
+    return MeshArrays(**arrays), header["attributes"]
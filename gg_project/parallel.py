@@ -0,0 +1,197 @@
+"""Contains code for searching for production matches in parallel
+
+The graph is partitioned spatially into a grid of shards. Every shard is extended
+with a halo of neighbouring nodes and searched in a separate worker process,
+which reads its part of the graph from shared memory.
+"""
+import concurrent.futures
+import contextlib
+import math
+import os
+from typing import Iterable, Iterator, Type
+
+import networkx as nx
+import numpy as np
+
+from gg_project.mesh_arrays import MeshArrays
+from gg_project.productions import Production
+from gg_project.productions.utils import with_halo
+from gg_project.shared_mesh import SharedMesh, SharedMeshHandle
+
+# Halo of productions without a declared radius: largest diameter of a left side
+# (production 6), productions 2-5 also inspect direct neighbours of their matches,
+# which still fits in this many hops
+DEFAULT_HALO = 6
+
+NodeIds = tuple[int, ...]
+
+
+def partition(
+    graph: nx.Graph, grid: tuple[int, int], nodes: Iterable[int] | None = None
+) -> list[set[int]]:
+    """Split nodes of the graph into a grid of spatial shards of equal size
+
+    Nodes are split into columns by their x coordinate and every column into
+    rows by the y coordinate, each column and row holding the same number of
+    nodes. Refined regions contain nodes of many levels, so splitting the area
+    evenly would give their shards much more work than the others.
+
+    Nodes without a position are placed at the mean position of their neighbours,
+    the same way they are drawn by `gg_project.vis`.
+
+    :param graph: graph whose nodes will be split
+    :param grid:  number of shards along the x and y axes
+    :param nodes: nodes which will be split (all if given None)
+
+    :returns: list of disjoint node sets covering all given nodes, nodes whose
+              position cannot be determined are put into the first shard
+    """
+    columns, rows = grid
+    positions = {
+        i: _placement(graph, i) for i in (graph.nodes if nodes is None else nodes)
+    }
+    shards: list[set[int]] = [set() for _ in range(columns * rows)]
+    shards[0].update(i for i, position in positions.items() if position is None)
+
+    placed = sorted(
+        (position[0], position[1], i)
+        for i, position in positions.items()
+        if position is not None
+    )
+    for column, column_nodes in enumerate(_equal_parts(placed, columns)):
+        column_nodes = sorted(
+            column_nodes, key=lambda node: (node[1], node[0], node[2])
+        )
+        for row, row_nodes in enumerate(_equal_parts(column_nodes, rows)):
+            shards[row * columns + column].update(i for _, _, i in row_nodes)
+
+    return shards
+
+
+def _equal_parts(items: list, count: int) -> Iterator[list]:
+    """Splits the list into the given number of consecutive parts of equal length"""
+    for part in range(count):
+        yield items[part * len(items) // count : (part + 1) * len(items) // count]
+
+
+def find_all_parallel(
+    production: Type[Production],
+    graph: nx.Graph,
+    grid: tuple[int, int] | None = None,
+    halo: int | None = None,
+    executor: concurrent.futures.Executor | None = None,
+) -> Iterator[nx.Graph]:
+    """Find all subgraphs isomorphic to the left side of production using many processes
+
+    Matches are yielded as soon as the shard they were found in is searched.
+    A match is reported by every shard owning at least one of its anchors (or
+    of its nodes, if the production has no anchor), duplicates are dropped
+    before yielding.
+
+    :param production: production whose left side will be searched for
+    :param graph:      graph in which isomorphic subgraphs will be searched for
+    :param grid:       number of shards along the x and y axes, by default there
+                       is about one shard per CPU
+    :param halo:       number of hops by which every shard is extended, has to be
+                       at least the radius of the production (or larger than the
+                       diameter of the left side, if it has no anchor) for the
+                       search to be complete; by default the radius of the
+                       production or `DEFAULT_HALO`
+    :param executor:   executor used to run the search, a new process pool is
+                       created (and shut down) if not given
+
+    :returns: iterator over subgraph views of the given graph
+    """
+    if halo is None:
+        halo = DEFAULT_HALO if production.radius is None else production.radius
+    if grid is None:
+        side = max(1, math.isqrt(os.cpu_count() or 1))
+        grid = (side, side)
+
+    with contextlib.ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor())
+
+        mesh = MeshArrays.from_graph(graph)
+        shared = stack.enter_context(SharedMesh.create(mesh))
+
+        # shards must not attach to the shared memory after it is removed, callbacks
+        # are run in reverse order, so this one is run before it is removed
+        futures: list[concurrent.futures.Future] = []
+        stack.callback(_cancel_and_wait, futures)
+
+        futures.extend(
+            executor.submit(
+                _find_in_shard,
+                production,
+                shared.handle,
+                mesh.rows(with_halo(graph, owned, halo)),
+                frozenset(owned),
+            )
+            for owned in partition(graph, grid)
+            if owned
+        )
+
+        seen: set[NodeIds] = set()
+        for future in concurrent.futures.as_completed(futures):
+            for node_ids in future.result():
+                if node_ids not in seen:
+                    seen.add(node_ids)
+                    yield graph.subgraph(node_ids)
+
+
+def _cancel_and_wait(futures: Iterable[concurrent.futures.Future]) -> None:
+    for future in futures:
+        future.cancel()
+    concurrent.futures.wait(futures)
+
+
+def _placement(graph: nx.Graph, i: int) -> tuple[float, float] | None:
+    """Returns the position of the node or the mean position of its neighbours"""
+    if graph.nodes[i]["position"] is not None:
+        return graph.nodes[i]["position"]
+
+    neighbor_positions = [
+        graph.nodes[j]["position"]
+        for j in graph.adj[i]
+        if graph.nodes[j]["position"] is not None
+    ]
+    if not neighbor_positions:
+        return None
+
+    return (
+        sum(x for x, _ in neighbor_positions) / len(neighbor_positions),
+        sum(y for _, y in neighbor_positions) / len(neighbor_positions),
+    )
+
+
+def _find_in_shard(
+    production: Type[Production],
+    handle: SharedMeshHandle,
+    rows: np.ndarray,
+    owned: frozenset[int],
+) -> list[NodeIds]:
+    """Search a single shard, keeping only matches anchored at an owned node
+
+    Productions with an anchor are searched for only around the owned anchors.
+    """
+    with SharedMesh.attach(handle) as shared:
+        shard = shared.arrays.to_graph(rows)
+
+    if production.anchor_type is None:
+        return [
+            tuple(sorted(subgraph.nodes))
+            for subgraph in production.find_all_isomorphic_to_left_side(shard)
+            if any(i in owned for i in subgraph.nodes)
+        ]
+
+    # a match with many owned anchors is found at each of them
+    matches: dict[NodeIds, None] = {}
+    for i in sorted(owned):
+        if shard.nodes[i]["vertex_type"] == production.anchor_type:
+            matches.update(
+                (tuple(sorted(subgraph.nodes)), None)
+                for subgraph in production.find_all_isomorphic_at(shard, i)
+            )
+
+    return list(matches)
@@ -2,15 +2,114 @@
 """
 
 import abc
+import dataclasses
+import threading
+import time
+from typing import Callable, Iterator
 
 import networkx as nx
 
+from gg_project.delta import Delta
+from gg_project.productions.utils import last_node_id, with_halo
+from gg_project.vertex_params import VertexType
+
+# Called by the search for every examined candidate, may raise to interrupt it
+Progress = Callable[[], None]
+
+
+def no_progress() -> None:
+    """Progress callback which does nothing"""
+
+
+class CancellationToken:
+    """Allows to cancel a search running in another thread"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Makes searches using this token stop at the next examined candidate"""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token was cancelled"""
+        return self._event.is_set()
+
+
+@dataclasses.dataclass
+class SearchResult:
+    """Result of a search which may be interrupted
+
+    :ivar subgraph:            subgraph view that matches the left side of
+                               production or None if it was not found
+    :ivar timed_out:           whether the search was interrupted by its deadline
+                               or cancellation before finishing
+    :ivar candidates_examined: number of candidates examined by the search
+    """
+
+    subgraph: nx.Graph | None
+    timed_out: bool
+    candidates_examined: int
+
+
+class _SearchInterrupted(Exception):
+    """Raised by the progress callback to interrupt a search"""
+
 
 class Production(abc.ABC):
-    """A single production"""
+    """A single production
+
+    :cvar anchor_type: type of the vertex at which matches of the left side are
+                       anchored, every match contains a node of this type
+                       (None if the production has no such vertex)
+    :cvar radius:      largest number of hops from an anchor to a node of its
+                       match, or to a node whose neighbours are inspected by the
+                       search plus one; searching the subgraph induced by nodes
+                       this close to the anchor finds the same matches
+                       (unknown if None)
+    """
+
+    anchor_type: VertexType | None = None
+    radius: int | None = None
 
     @classmethod
     @abc.abstractmethod
+    def find_all_isomorphic_to_left_side(
+        cls, graph: nx.Graph, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        """Find all subgraphs isomorphic to the left side of production
+
+        :param graph:    graph in which isomorphic subgraphs will be searched for
+        :param progress: callback called for every examined candidate
+
+        :returns: iterator over subgraph views that match the left side of production,
+                  each distinct set of nodes is yielded once
+        """
+
+    @classmethod
+    def find_all_isomorphic_at(
+        cls, graph: nx.Graph, node_id: int, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        """Find all subgraphs isomorphic to the left side of production containing a node
+
+        By default every subgraph is searched for and those without the node are
+        skipped, productions may override it to search only around the node.
+
+        :param graph:    graph in which isomorphic subgraphs will be searched for
+        :param node_id:  node which every subgraph has to contain
+        :param progress: callback called for every examined candidate
+
+        :returns: iterator over subgraph views that match the left side of production,
+                  each distinct set of nodes is yielded once
+        """
+        return (
+            subgraph
+            for subgraph in cls.find_all_isomorphic_to_left_side(graph, progress)
+            if node_id in subgraph
+        )
+
+    @classmethod
     def find_isomorphic_to_left_side(cls, graph: nx.Graph) -> nx.Graph | None:
         """Find one subgraph isomorphic to the left side of production
 
@@ -19,6 +118,72 @@ class Production(abc.ABC):
         :returns: subgraph view that matches the left side of production or None
                   if isomorphic subgraph is not found
         """
+        return next(cls.find_all_isomorphic_to_left_side(graph), None)
+
+    @classmethod
+    def find_isomorphic_at(cls, graph: nx.Graph, node_id: int) -> nx.Graph | None:
+        """Find one subgraph isomorphic to the left side of production anchored at a node
+
+        By default any subgraph containing the node is returned. If the radius
+        of the production is known, only nodes within it from the node (or within
+        twice the radius, if the node is not an anchor) are searched.
+
+        :param graph:   graph in which isomorphic subgraph will be searched for
+        :param node_id: node at which the subgraph has to be anchored
+
+        :returns: subgraph view that matches the left side of production or None
+                  if isomorphic subgraph is not found
+        """
+        searched = graph
+        if cls.radius is not None:
+            hops = cls.radius
+            if graph.nodes[node_id]["vertex_type"] != cls.anchor_type:
+                hops *= 2
+            # a copy is searched much faster than a view of the graph
+            searched = nx.Graph(graph.subgraph(with_halo(graph, {node_id}, hops)))
+
+        return next(
+            (
+                graph.subgraph(subgraph.nodes)
+                for subgraph in cls.find_all_isomorphic_to_left_side(searched)
+                if node_id in subgraph
+            ),
+            None,
+        )
+
+    @classmethod
+    def search(
+        cls,
+        graph: nx.Graph,
+        deadline: float | None = None,
+        token: CancellationToken | None = None,
+    ) -> SearchResult:
+        """Find one subgraph isomorphic to the left side of production in bounded time
+
+        :param graph:    graph in which isomorphic subgraph will be searched for
+        :param deadline: time (as returned by `time.monotonic`) after which the
+                         search is interrupted (unbounded if given None)
+        :param token:    token which interrupts the search when cancelled
+
+        :returns: result of the search, including partial progress if it was
+                  interrupted
+        """
+        examined = 0
+
+        def progress() -> None:
+            nonlocal examined
+            if (token is not None and token.cancelled) or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                raise _SearchInterrupted
+            examined += 1
+
+        try:
+            subgraph = next(cls.find_all_isomorphic_to_left_side(graph, progress), None)
+        except _SearchInterrupted:
+            return SearchResult(None, True, examined)
+
+        return SearchResult(subgraph, False, examined)
 
     @classmethod
     @abc.abstractmethod
@@ -28,5 +193,30 @@ class Production(abc.ABC):
         :param graph:    graph on which production will be applied
         :param subgraph: subgraph denoting the position in which to apply the production
 
-        :returns: _new_ graph with production applied
+        :returns: _new_ graph with production applied, the record of the next
+                  free id of a range reserved for the graph (see
+                  `utils.graph_id_sequence`) is advanced past the new nodes
         """
+
+    @classmethod
+    def apply_delta(cls, graph: nx.Graph, subgraph: nx.Graph) -> Delta:
+        """Apply production and describe the result as a change of the graph
+
+        The graph is not modified, the returned delta applied to it gives
+        the same graph as `apply`. The production is applied to a copy of the
+        matched nodes and their neighbours (and of the node after whose id new
+        ids follow), so the cost does not grow with the graph.
+
+        :param graph:    graph on which production will be applied
+        :param subgraph: subgraph denoting the position in which to apply the production
+
+        :returns: delta from the given graph to the graph with production applied
+        """
+        nodes = with_halo(graph, set(subgraph.nodes), 1)
+        last_id = last_node_id(graph)
+        if last_id is not None:
+            nodes.add(last_id)
+        # a copy keeps attributes of the graph, e.g. the range of ids reserved for it
+        local = nx.Graph(graph.subgraph(nodes))
+
+        return Delta.between(local, cls.apply(local, subgraph), subgraph.nodes)
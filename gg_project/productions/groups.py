@@ -0,0 +1,24 @@
+"""Groups of productions which are applied together"""
+from typing import Type
+
+from gg_project.productions import Production
+from gg_project.productions.p2 import Production2
+from gg_project.productions.p3 import Production3
+from gg_project.productions.p4 import Production4
+from gg_project.productions.p5 import Production5
+from gg_project.productions.p6 import Production6
+from gg_project.productions.p7 import Production7
+
+# Productions breaking a single element, anchored at its interior node
+REFINING_PRODUCTIONS: tuple[Type[Production], ...] = (
+    Production2,
+    Production3,
+    Production4,
+    Production5,
+)
+
+# Productions merging exterior nodes duplicated by breaking neighbouring elements
+CLOSING_PRODUCTIONS: tuple[Type[Production], ...] = (
+    Production6,
+    Production7,
+)
@@ -7,12 +7,14 @@ Karol Szuster
 """
 
 from dataclasses import asdict
+from typing import Iterator
 
 import networkx as nx
 
 from gg_project.vertex_params import VertexParams, VertexType
 
-from . import Production
+from . import Production, Progress, no_progress
+from .utils import graph_id_sequence
 
 
 class Production1(Production):
@@ -21,20 +23,24 @@ class Production1(Production):
     This production takes start vertex from a graph and builds a single element.
     """
 
+    anchor_type = VertexType.START
+    radius = 0
+
     @classmethod
-    def find_isomorphic_to_left_side(cls, graph: nx.Graph) -> nx.Graph | None:
+    def find_all_isomorphic_to_left_side(
+        cls, graph: nx.Graph, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
         for node_id, params in graph.nodes.items():
+            progress()
             if VertexParams(**params).vertex_type == VertexType.START:
-                return graph.subgraph([node_id])
-
-        return None
+                yield graph.subgraph([node_id])
 
     @classmethod
     def apply(cls, graph: nx.Graph, subgraph: nx.Graph) -> nx.Graph:
         new_graph = graph.copy()
         assert len(subgraph.nodes) == 1
 
-        last_node_id = len(graph.nodes)
+        next_id_val_fun = graph_id_sequence(new_graph)
 
         start_node_id, _ = next(iter(subgraph.nodes.items()))
         new_graph.nodes[start_node_id]["vertex_type"] = VertexType.START_USED
@@ -52,28 +58,28 @@ class Production1(Production):
             ),
         ]
 
-        new_graph.add_nodes_from(
-            (last_node_id + i, asdict(node)) for i, node in enumerate(nodes)
-        )
+        ids = [next_id_val_fun() for _ in nodes]
+
+        new_graph.add_nodes_from((i, asdict(node)) for i, node in zip(ids, nodes))
 
         edges = [
             # start <-> interior
-            (start_node_id, last_node_id + 4),
-            (start_node_id, last_node_id + 5),
+            (start_node_id, ids[4]),
+            (start_node_id, ids[5]),
             # interior 1 <-> exterior
-            (last_node_id + 0, last_node_id + 4),
-            (last_node_id + 1, last_node_id + 4),
-            (last_node_id + 2, last_node_id + 4),
+            (ids[0], ids[4]),
+            (ids[1], ids[4]),
+            (ids[2], ids[4]),
             # interior 2 <-> exterior
-            (last_node_id + 1, last_node_id + 5),
-            (last_node_id + 2, last_node_id + 5),
-            (last_node_id + 3, last_node_id + 5),
+            (ids[1], ids[5]),
+            (ids[2], ids[5]),
+            (ids[3], ids[5]),
             # exterior
-            (last_node_id + 0, last_node_id + 1),
-            (last_node_id + 0, last_node_id + 2),
-            (last_node_id + 1, last_node_id + 3),
-            (last_node_id + 2, last_node_id + 3),
-            (last_node_id + 1, last_node_id + 2),
+            (ids[0], ids[1]),
+            (ids[0], ids[2]),
+            (ids[1], ids[3]),
+            (ids[2], ids[3]),
+            (ids[1], ids[2]),
         ]
 
         new_graph.add_edges_from(edges)
@@ -10,14 +10,14 @@ Karol Szuster
 
 import collections
 import contextlib
-import copy
 import dataclasses
 import itertools
 import math
-from typing import Sequence, Callable
+from typing import Iterator, Sequence
 import networkx as nx
 from gg_project.vertex_params import VertexParams, VertexType
-from gg_project.productions import Production
+from gg_project.productions import Production, Progress, no_progress
+from gg_project.productions.utils import graph_id_sequence, with_halo
 
 
 NodeId = int
@@ -36,18 +36,6 @@ def _get_neighbors_of_type(
     ]
 
 
-def _graph_id_sequence(graph: nx.Graph) -> Callable[[], NodeId]:
-    next_id = max(graph.nodes) + 1
-
-    def internal():
-        nonlocal next_id
-        rv = next_id
-        next_id += 1
-        return rv
-
-    return internal
-
-
 def _node_distance(params1: VertexParams, params2: VertexParams) -> float:
     x1, y1 = params1.position
     x2, y2 = params2.position
@@ -112,36 +100,61 @@ def _create_edges(
     ]
 
 
+def _match_at(graph: nx.Graph, node_id: NodeId) -> nx.Graph | None:
+    if (VertexParams(**graph.nodes[node_id])).vertex_type != VertexType.INTERIOR:
+        return None
+
+    exterior_neighbors = _get_neighbors_of_type(graph, node_id, VertexType.EXTERIOR)
+    if len(exterior_neighbors) != 3:
+        return None
+
+    with contextlib.suppress(nx.NetworkXNoCycle):
+        nx.find_cycle(graph.subgraph(exterior_neighbors))
+        return graph.subgraph([node_id, *exterior_neighbors])
+
+    return None
+
+
 class Production2(Production):
     """Implementation of second production from documentation.
 
     This production takes an unbroken triangle tile from a graph and produces a new break.
     """
 
-    @classmethod
-    def find_isomorphic_to_left_side(cls, graph: nx.Graph) -> nx.Graph | None:
-        for node_id, params in graph.nodes.items():
-            if (VertexParams(**params)).vertex_type != VertexType.INTERIOR:
-                continue
+    anchor_type = VertexType.INTERIOR
+    radius = 1
 
-            exterior_neighbors = _get_neighbors_of_type(
-                graph, node_id, VertexType.EXTERIOR
-            )
-            if len(exterior_neighbors) != 3:
-                continue
+    @classmethod
+    def find_all_isomorphic_to_left_side(
+        cls, graph: nx.Graph, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        for node_id in graph.nodes:
+            progress()
+            subgraph = _match_at(graph, node_id)
+            if subgraph is not None:
+                yield subgraph
 
-            with contextlib.suppress(nx.NetworkXNoCycle):
-                cycle = nx.find_cycle(graph.subgraph(exterior_neighbors))
-                return graph.subgraph([node_id, *exterior_neighbors])
+    @classmethod
+    def find_isomorphic_at(cls, graph: nx.Graph, node_id: int) -> nx.Graph | None:
+        return _match_at(graph, node_id)
 
-        return None
+    @classmethod
+    def find_all_isomorphic_at(
+        cls, graph: nx.Graph, node_id: int, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        # every match is anchored at its only interior node, within the radius
+        for anchor in sorted(with_halo(graph, {node_id}, cls.radius)):
+            progress()
+            subgraph = _match_at(graph, anchor)
+            if subgraph is not None and node_id in subgraph:
+                yield subgraph
 
     @classmethod
     def apply(cls, graph: nx.Graph, subgraph: nx.Graph) -> nx.Graph:
         assert len(subgraph.nodes) == 4
 
-        new_graph = copy.deepcopy(graph)
-        next_id_val_fun = _graph_id_sequence(graph)
+        new_graph = graph.copy()
+        next_id_val_fun = graph_id_sequence(new_graph)
         subgraph_nodes: list[Node] = list(
             map(
                 lambda node: Node(node[0], VertexParams(**node[1])),
@@ -2,13 +2,13 @@
 """
 import dataclasses
 import itertools
-from typing import Tuple, Sequence, List
+from typing import Iterator, Tuple, Sequence, List
 
 import networkx as nx
 
-from . import Production
+from . import Production, Progress, no_progress
 from .utils import Node, graph_id_sequence, check_if_all_neighbors_of_type_and_level, \
-    get_all_neighbors_same_level, get_params_with_lower_level
+    get_all_neighbors_same_level, get_params_with_lower_level, with_halo
 from gg_project.vertex_params import VertexParams, VertexType
 from .p3 import _get_common_exterior_neighbors, _get_neighbour_with_correct_position
 
@@ -109,27 +109,54 @@ def _create_edges(
     ]
 
 
+def _match_at(graph: nx.Graph, node_id: int) -> nx.Graph | None:
+    if (
+            VertexParams(**graph.nodes[node_id]).vertex_type == VertexType.INTERIOR
+            and check_if_all_neighbors_of_type_and_level(graph, node_id, VertexType.EXTERIOR)
+    ):
+        correct_subgraph = _find_correct_subgraph(graph, node_id)
+        if correct_subgraph is not None:
+            a, b, c, ab, ac = correct_subgraph
+            return graph.subgraph([node_id, a, b, c, ab, ac])
+
+    return None
+
+
 class Production4(Production):
 
+    anchor_type = VertexType.INTERIOR
+    radius = 2
+
     @classmethod
-    def find_isomorphic_to_left_side(cls, graph: nx.Graph) -> nx.Graph | None:
-        for node_id, params in graph.nodes.items():
-            if (
-                    VertexParams(**params).vertex_type == VertexType.INTERIOR
-                    and check_if_all_neighbors_of_type_and_level(graph, node_id, VertexType.EXTERIOR)
-            ):
-                correct_subgraph = _find_correct_subgraph(graph, node_id)
-                if correct_subgraph is not None:
-                    a, b, c, ab, ac = correct_subgraph
-                    return graph.subgraph([node_id, a, b, c, ab, ac])
+    def find_all_isomorphic_to_left_side(
+        cls, graph: nx.Graph, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        for node_id in graph.nodes:
+            progress()
+            subgraph = _match_at(graph, node_id)
+            if subgraph is not None:
+                yield subgraph
 
-        return None
+    @classmethod
+    def find_isomorphic_at(cls, graph: nx.Graph, node_id: int) -> nx.Graph | None:
+        return _match_at(graph, node_id)
 
     @classmethod
-    def apply(cls, graph: nx.Graph, subgraph: nx.Graph) -> nx.Graph:
-        next_id_val_fun = graph_id_sequence(graph)
+    def find_all_isomorphic_at(
+        cls, graph: nx.Graph, node_id: int, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        # every match is anchored at its only interior node, within the radius
+        for anchor in sorted(with_halo(graph, {node_id}, cls.radius)):
+            progress()
+            subgraph = _match_at(graph, anchor)
+            if subgraph is not None and node_id in subgraph:
+                yield subgraph
 
+    @classmethod
+    def apply(cls, graph: nx.Graph, subgraph: nx.Graph) -> nx.Graph:
         graph_copy = graph.copy()
+        next_id_val_fun = graph_id_sequence(graph_copy)
+
         if len(subgraph.nodes) == 6:
             interior_node = _find_internal_node(subgraph)
             if interior_node is not None:
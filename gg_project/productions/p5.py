@@ -6,14 +6,14 @@ Bartosz Drzewicki
 """
 
 import dataclasses
-from typing import List, Tuple, Optional, Sequence
+from typing import Iterator, List, Tuple, Optional, Sequence
 
 import networkx as nx
 from gg_project.vertex_params import VertexParams, VertexType, check_if_positions_equal
 
-from . import Production
+from . import Production, Progress, no_progress
 from .utils import check_if_all_neighbors_of_type_and_level, get_all_neighbors_same_level, \
-    Node, graph_id_sequence, get_params_with_lower_level
+    Node, graph_id_sequence, get_params_with_lower_level, with_halo
 
 import itertools
 
@@ -160,29 +160,56 @@ def _get_position_middle(
     )
 
 
+def _match_at(graph: nx.Graph, node_id: int) -> Optional[nx.Graph]:
+    if (
+            VertexParams(**graph.nodes[node_id]).vertex_type == VertexType.INTERIOR
+            and check_if_all_neighbors_of_type_and_level(graph, node_id, VertexType.EXTERIOR)
+    ):
+        order = _find_correct_graph_order(graph, node_id)
+        if order is not None:
+            a, b, c, d, e, f = order
+            return graph.subgraph([node_id, a, b, c, d, e, f])
+
+    return None
+
+
 class Production5(Production):
     """Implementation of fifth production from documentation.
     """
 
+    anchor_type = VertexType.INTERIOR
+    radius = 2
+
     @classmethod
-    def find_isomorphic_to_left_side(cls, graph: nx.Graph):
-        for node_id, params in graph.nodes.items():
-            if (
-                    VertexParams(**params).vertex_type == VertexType.INTERIOR
-                    and check_if_all_neighbors_of_type_and_level(graph, node_id, VertexType.EXTERIOR)
-            ):
-                order = _find_correct_graph_order(graph, node_id)
-                if order is not None:
-                    a, b, c, d, e, f = order
-                    return graph.subgraph([node_id, a, b, c, d, e, f])
-
-        return None
+    def find_all_isomorphic_to_left_side(
+        cls, graph: nx.Graph, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        for node_id in graph.nodes:
+            progress()
+            subgraph = _match_at(graph, node_id)
+            if subgraph is not None:
+                yield subgraph
 
     @classmethod
-    def apply(cls, graph: nx.Graph, subgraph: nx.Graph) -> nx.Graph:
-        next_id_val_fun = graph_id_sequence(graph)
+    def find_isomorphic_at(cls, graph: nx.Graph, node_id: int) -> nx.Graph | None:
+        return _match_at(graph, node_id)
 
+    @classmethod
+    def find_all_isomorphic_at(
+        cls, graph: nx.Graph, node_id: int, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        # every match is anchored at its only interior node, within the radius
+        for anchor in sorted(with_halo(graph, {node_id}, cls.radius)):
+            progress()
+            subgraph = _match_at(graph, anchor)
+            if subgraph is not None and node_id in subgraph:
+                yield subgraph
+
+    @classmethod
+    def apply(cls, graph: nx.Graph, subgraph: nx.Graph) -> nx.Graph:
         new_graph = graph.copy()
+        next_id_val_fun = graph_id_sequence(new_graph)
+
         assert len(subgraph.nodes) == 7
 
         interior_node = None
@@ -1,20 +1,41 @@
 """ Implementation of production number 6
 """
-import dataclasses
-import itertools
 from dataclasses import asdict
 from itertools import combinations
+from typing import Iterator
 
 import networkx as nx
 
-from gg_project.productions import Production
-from gg_project.productions.utils import Node, graph_id_sequence
+from gg_project.productions import Production, Progress, no_progress
+from gg_project.productions.utils import (
+    Node,
+    find_isomorphic_node_sets,
+    graph_id_sequence,
+    merge_two_nodes,
+)
 from gg_project.vertex_params import VertexParams, VertexType
 
 
 class Production6(Production):
+    anchor_type = VertexType.INTERIOR_USED
+    radius = 4
+
+    @classmethod
+    def find_all_isomorphic_to_left_side(
+        cls, graph: nx.Graph, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        return cls._find_all(graph, progress)
+
+    @classmethod
+    def find_all_isomorphic_at(
+        cls, graph: nx.Graph, node_id: int, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        return cls._find_all(graph, progress, node_id)
+
     @classmethod
-    def find_isomorphic_to_left_side(cls, graph: nx.Graph) -> nx.Graph | None:
+    def _find_all(
+        cls, graph: nx.Graph, progress: Progress, anchor: int | None = None
+    ) -> Iterator[nx.Graph]:
         isomorphic_graph = nx.Graph()
         isomorphic_graph.add_nodes_from(
             [
@@ -49,41 +70,35 @@ class Production6(Production):
             ]
         )
 
-        node_diff = len(graph.nodes) - len(isomorphic_graph.nodes)
-
-        if node_diff >= 0:
-            all_connected_subgraphs = []
-
-            for SG in (graph.subgraph(selected_nodes) for selected_nodes in
-                       itertools.combinations(graph, len(isomorphic_graph))):
-                if nx.is_connected(SG):
-                    all_connected_subgraphs.append(SG)
-
-            for subgraph in all_connected_subgraphs:
-                if nx.is_isomorphic(subgraph, isomorphic_graph, node_match=_are_types_equal):
-                    nodes: list[Node] = list(
-                        map(
-                            lambda node: Node(node[0], VertexParams(**node[1])),
-                            subgraph.nodes.items(),
-                        ),
-                    )
-
-                    exterior_nodes: list[Node] = list(
-                        filter(lambda x: x[1].vertex_type == VertexType.EXTERIOR, nodes)
-                    )
-                    if len(list(_get_duplicates_with_label(exterior_nodes))) == 3:
-                        return subgraph
-
-        return None
+        def node_match(node1, node2) -> bool:
+            progress()
+            return _are_types_equal(node1, node2)
+
+        # every induced subgraph isomorphic to the left side is reported once
+        for node_set in find_isomorphic_node_sets(
+            graph, isomorphic_graph, node_match, anchor
+        ):
+            subgraph = graph.subgraph(node_set)
+            nodes: list[Node] = list(
+                map(
+                    lambda node: Node(node[0], VertexParams(**node[1])),
+                    subgraph.nodes.items(),
+                ),
+            )
+
+            exterior_nodes: list[Node] = list(
+                filter(lambda x: x[1].vertex_type == VertexType.EXTERIOR, nodes)
+            )
+            if len(list(_get_duplicates_with_label(exterior_nodes))) == 3:
+                yield subgraph
 
     @classmethod
     def apply(cls, graph: nx.Graph, subgraph: nx.Graph) -> nx.Graph:
         if cls.find_isomorphic_to_left_side(subgraph) is None:
             raise ValueError("Subgraph is not isomorphic to left side")
 
-        next_id_val_fun = graph_id_sequence(graph)
-
         new_graph = graph.copy()
+        next_id_val_fun = graph_id_sequence(new_graph)
 
         nodes: list[Node] = list(
             map(
@@ -98,7 +113,7 @@ class Production6(Production):
 
         for e_pairs in _get_duplicates_with_label(exterior_nodes):
             for e_left, e_right in combinations(e_pairs, 2):
-                new_graph = _merge_two_nodes(new_graph, e_left, e_right, next_id_val_fun())
+                new_graph = merge_two_nodes(new_graph, e_left, e_right, next_id_val_fun())
 
         return new_graph
 
@@ -117,18 +132,6 @@ def _get_duplicates_with_label(nodes: list[Node]):
             yield value
 
 
-def _merge_two_nodes(graph: nx.Graph, node_1: Node, node_2: Node, new_id: int):
-    neighbors = set(graph.neighbors(node_1.id)) | set(graph.neighbors(node_2.id)) - {node_1.id, node_2.id}
-
-    graph.add_nodes_from([(new_id, dataclasses.asdict(node_1.params))])
-    graph.add_edges_from([(n, new_id) for n in neighbors])
-
-    graph.remove_node(node_1.id)
-    graph.remove_node(node_2.id)
-
-    return graph
-
-
 def _mk_vertex(t):
     return asdict(VertexParams(vertex_type=t, position=(0.0, 0.0), level=0))
 
@@ -1,22 +1,42 @@
 # pylint: disable = invalid-name, too-many-locals, fixme
 
-import collections
 import dataclasses
-import itertools
 from itertools import combinations
+from typing import Iterator
 
 import networkx as nx
 
-from gg_project.productions import Production
+from gg_project.productions import Production, Progress, no_progress
+from gg_project.productions.utils import (
+    Node,
+    find_isomorphic_node_sets,
+    graph_id_sequence,
+    merge_two_nodes,
+)
 from gg_project.vertex_params import VertexType, VertexParams
 
-Node = collections.namedtuple("Node", ["id", "params"])
-
 
 class Production7(Production):
 
+    anchor_type = VertexType.INTERIOR_USED
+    radius = 4
+
+    @classmethod
+    def find_all_isomorphic_to_left_side(
+        cls, graph: nx.Graph, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        return cls._find_all(graph, progress)
+
     @classmethod
-    def find_isomorphic_to_left_side(cls, graph: nx.Graph) -> nx.Graph | None:
+    def find_all_isomorphic_at(
+        cls, graph: nx.Graph, node_id: int, progress: Progress = no_progress
+    ) -> Iterator[nx.Graph]:
+        return cls._find_all(graph, progress, node_id)
+
+    @classmethod
+    def _find_all(
+        cls, graph: nx.Graph, progress: Progress, anchor: int | None = None
+    ) -> Iterator[nx.Graph]:
         isomorphic_graph = nx.Graph()
 
         isomorphic_graph.add_nodes_from(
@@ -80,32 +100,27 @@ class Production7(Production):
             ]
         )
 
-        node_diff = len(graph.nodes) - len(isomorphic_graph.nodes)
-
-        if node_diff >= 0:
-            all_connected_subgraphs = []
-
-            for SG in (graph.subgraph(selected_nodes) for selected_nodes in
-                       itertools.combinations(graph, len(isomorphic_graph))):
-                if nx.is_connected(SG):
-                    all_connected_subgraphs.append(SG)
-
-            for subgraph in all_connected_subgraphs:
-                if nx.is_isomorphic(subgraph, isomorphic_graph, node_match=are_types_equal):
-                    nodes: list[Node] = list(
-                        map(
-                            lambda node: Node(node[0], VertexParams(**node[1])),
-                            subgraph.nodes.items(),
-                        ),
-                    )
-
-                    exterior_nodes: list[Node] = list(
-                        filter(lambda x: x[1].vertex_type == VertexType.EXTERIOR, nodes)
-                    )
-                    if len(list(get_duplicates_with_label(exterior_nodes))) == 2:
-                        return subgraph
-
-        return None
+        def node_match(node1, node2) -> bool:
+            progress()
+            return are_types_equal(node1, node2)
+
+        # every induced subgraph isomorphic to the left side is reported once
+        for node_set in find_isomorphic_node_sets(
+            graph, isomorphic_graph, node_match, anchor
+        ):
+            subgraph = graph.subgraph(node_set)
+            nodes: list[Node] = list(
+                map(
+                    lambda node: Node(node[0], VertexParams(**node[1])),
+                    subgraph.nodes.items(),
+                ),
+            )
+
+            exterior_nodes: list[Node] = list(
+                filter(lambda x: x[1].vertex_type == VertexType.EXTERIOR, nodes)
+            )
+            if len(list(get_duplicates_with_label(exterior_nodes))) == 2:
+                yield subgraph
 
     @classmethod
     def apply(cls, graph: nx.Graph, subgraph: nx.Graph) -> nx.Graph:
@@ -114,14 +129,16 @@ class Production7(Production):
 
         new_graph = graph.copy()
 
+        # only nodes of the matched subgraph are merged, the rest of the graph is
+        # not searched for duplicates
         nodes: list[Node] = list(
             map(
                 lambda node: Node(node[0], VertexParams(**node[1])),
-                new_graph.nodes.items(),
+                subgraph.nodes.items(),
             ),
         )
 
-        max_node_id = max(node.id for node in nodes)
+        next_id_val_fun = graph_id_sequence(new_graph)
 
         exterior_nodes: list[Node] = list(
             filter(lambda x: x[1].vertex_type == VertexType.EXTERIOR, nodes)
@@ -129,13 +146,13 @@ class Production7(Production):
 
         for E2s in get_duplicates_with_label(exterior_nodes):
             for E2L, E2R in combinations(E2s, 2):
-                for E1 in get_common_neighbors_of_type(new_graph, nodes, E2L, E2R, VertexType.EXTERIOR):
-                    for E3L in get_neighbors_of_type(new_graph, nodes, E2L, VertexType.EXTERIOR):
+                for E1 in get_common_neighbors_of_type(subgraph, nodes, E2L, E2R, VertexType.EXTERIOR):
+                    for E3L in get_neighbors_of_type(subgraph, nodes, E2L, VertexType.EXTERIOR):
                         if E3L is not E1 and is_node_between(E1, E2L, E3L):
                             for E3R in get_duplicates_of(nodes, E3L):
                                 if E3R is not E1 and is_node_between(E1, E2R, E3R):
-                                    new_graph = merge_two_nodes(new_graph, E2L, E2R, max_node_id + 1)
-                                    new_graph = merge_two_nodes(new_graph, E3L, E3R, max_node_id + 2)
+                                    new_graph = merge_two_nodes(new_graph, E2L, E2R, next_id_val_fun())
+                                    new_graph = merge_two_nodes(new_graph, E3L, E3R, next_id_val_fun())
                                     return new_graph
 
 
@@ -184,15 +201,6 @@ def is_node_between(E1: Node, E2: Node, E3: Node) -> bool:
            and E2.params.position[1] == (E1.params.position[1] + E3.params.position[1]) / 2
 
 
-def merge_two_nodes(graph: nx.Graph, node_1: Node, node_2: Node, new_id: int):
-    neighbors = set(graph.neighbors(node_1.id)) | set(graph.neighbors(node_2.id)) - {node_1.id, node_2.id}
-    graph.add_nodes_from([(new_id, dataclasses.asdict(node_1.params))])
-    graph.remove_node(node_1.id)
-    graph.remove_node(node_2.id)
-    graph.add_edges_from([(n, new_id) for n in neighbors])
-    return graph
-
-
 def mk_vertex(t):
     return dataclasses.asdict(VertexParams(vertex_type=t, position=(0.0, 0.0), level=0))
 
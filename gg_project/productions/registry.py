@@ -0,0 +1,74 @@
+"""Contains a registry dispatching productions by the type of their anchor vertex
+
+A production can only start to match (or stop matching) at an anchor if
+something changed within its radius, so after a production is applied only
+productions anchored near the changed nodes have to be searched again.
+"""
+from typing import Iterable, Iterator, Type
+
+import networkx as nx
+
+from gg_project.productions import Production
+from gg_project.vertex_params import VertexType
+
+
+class ProductionRegistry:
+    """Productions grouped by the type of their anchor vertex
+
+    :param productions: productions in the order in which they are tried
+                        at an anchor, each has to declare its anchor type
+                        and radius
+    """
+
+    def __init__(self, productions: Iterable[Type[Production]]):
+        self.productions = tuple(productions)
+        self._by_anchor: dict[VertexType, list[Type[Production]]] = {}
+        # radii of productions, known to be declared once checked below
+        self.radii: dict[Type[Production], int] = {}
+        for production in self.productions:
+            if production.anchor_type is None or production.radius is None:
+                raise ValueError(
+                    f"{production.__name__} does not declare its anchor type and radius"
+                )
+            self._by_anchor.setdefault(production.anchor_type, []).append(production)
+            self.radii[production] = production.radius
+
+        self.radius = max(self.radii.values(), default=0)
+
+    def for_anchor(self, vertex_type: VertexType) -> tuple[Type[Production], ...]:
+        """Returns productions anchored at vertices of the given type"""
+        return tuple(self._by_anchor.get(vertex_type, ()))
+
+    def woken(
+        self, graph: nx.Graph, changed: Iterable[int]
+    ) -> Iterator[tuple[Type[Production], int]]:
+        """Find productions whose matches could be affected by changed nodes
+
+        A production is woken at every node of its anchor type at most its
+        radius away from a changed node. Changed nodes missing from the graph
+        (e.g. removed ones) are skipped, so their neighbours should be passed
+        as well.
+
+        :param graph:   graph after the change
+        :param changed: nodes which were added or changed, or whose edges changed
+
+        :returns: iterator over productions and the anchors at which they should
+                  be searched for, closer anchors first
+        """
+        distances = {i: 0 for i in changed if i in graph}
+        frontier = list(distances)
+        for distance in range(1, self.radius + 1):
+            next_frontier = []
+            for i in frontier:
+                for j in graph.adj[i]:
+                    if j not in distances:
+                        distances[j] = distance
+                        next_frontier.append(j)
+            frontier = next_frontier
+
+        for node_id, distance in distances.items():
+            for production in self._by_anchor.get(
+                graph.nodes[node_id]["vertex_type"], ()
+            ):
+                if distance <= self.radii[production]:
+                    yield production, node_id
@@ -1,8 +1,12 @@
 import collections
 import dataclasses
-from typing import List, Sequence, Callable
+import functools
+import itertools
+import operator
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
 
 import networkx as nx
+from networkx.algorithms import isomorphism
 
 from gg_project.vertex_params import VertexParams, VertexType
 
@@ -39,13 +43,271 @@ def get_params_with_lower_level(nodes: Sequence[Node]) -> Sequence[VertexParams]
     return list(map(lambda node: move_down_node(node.params), nodes))
 
 
+# Key of `graph.graph` under which a range of ids reserved for new nodes is stored
+ID_BLOCK_KEY = "id_block"
+
+
+def last_node_id(graph: nx.Graph) -> NodeId | None:
+    """Returns the id of the node after which `graph_id_sequence` continues
+
+    :returns: the largest id of a node of the graph, or within the range reserved
+              for the graph (None if there is no such node)
+    """
+    id_block = graph.graph.get(ID_BLOCK_KEY)
+    if id_block is None:
+        return max(graph.nodes)
+
+    start, stop = id_block
+    return max((i for i in graph.nodes if start <= i < stop), default=None)
+
+
 def graph_id_sequence(graph: nx.Graph) -> Callable[[], NodeId]:
-    next_id = max(graph.nodes) + 1
+    """Returns a function generating ids for new nodes of the graph
+
+    If a range of ids was reserved for the graph with `reserve_id_block`, ids are
+    taken from this range. Every call of the returned function then modifies
+    the graph: it records the next free id under `ID_BLOCK_KEY` of `graph.graph`,
+    so that ids of nodes removed by productions (e.g. merged ones) are never
+    reused. Productions pass the graph they return, so the record is a part of
+    their result (and of deltas describing it).
+    """
+    id_block = graph.graph.get(ID_BLOCK_KEY)
+    stop = None if id_block is None else id_block[1]
+    last_id = last_node_id(graph)
+    next_id = id_block[0] if last_id is None else last_id + 1
 
     def internal():
         nonlocal next_id
+        if stop is not None and next_id >= stop:
+            raise ValueError(f"All ids reserved for the graph ({id_block}) are used")
         rv = next_id
         next_id += 1
+        if stop is not None:
+            graph.graph[ID_BLOCK_KEY] = (next_id, stop)
         return rv
 
     return internal
+
+
+def reserve_id_block(graph: nx.Graph, id_block: tuple[NodeId, NodeId] | None) -> nx.Graph:
+    """Makes productions applied to the graph use ids from the given range
+
+    The range is kept in graphs returned by productions applied to this graph,
+    its start is moved past every id handed out by `graph_id_sequence`.
+
+    :param graph:    graph in which new nodes will get ids from the range
+    :param id_block: start and stop of the range, None removes the reservation
+
+    :returns: the given graph
+    """
+    if id_block is None:
+        graph.graph.pop(ID_BLOCK_KEY, None)
+    else:
+        graph.graph[ID_BLOCK_KEY] = id_block
+    return graph
+
+
+class IdBlockAllocator:
+    """Hands out disjoint ranges of ids, so that many workers can add nodes at once
+
+    The range given to a worker depends only on its index, so results are the same
+    no matter in which order (or process) the workers are run.
+    """
+
+    def __init__(self, graph: nx.Graph, block_size: int):
+        self.start = max(graph.nodes, default=-1) + 1
+        self.block_size = block_size
+
+    def block(self, index: int) -> tuple[NodeId, NodeId]:
+        """Returns start and stop of the range of ids reserved for the given worker"""
+        start = self.start + index * self.block_size
+        return start, start + self.block_size
+
+
+def merge_two_nodes(graph: nx.Graph, node_1: Node, node_2: Node, new_id: NodeId) -> nx.Graph:
+    """Replaces two nodes with a single node connected to neighbours of both
+
+    :param graph:  graph which will be modified in place
+    :param node_1: node whose parameters are given to the new node
+    :param node_2: node merged into the first one
+    :param new_id: id of the new node, distinct from both merged nodes
+
+    :returns: the given graph
+    """
+    neighbors = set(graph.neighbors(node_1.id)) | set(graph.neighbors(node_2.id))
+    neighbors -= {node_1.id, node_2.id}
+
+    graph.add_nodes_from([(new_id, dataclasses.asdict(node_1.params))])
+    graph.add_edges_from([(n, new_id) for n in neighbors])
+
+    graph.remove_node(node_1.id)
+    graph.remove_node(node_2.id)
+
+    return graph
+
+
+def with_halo(graph: nx.Graph, nodes: set[int], hops: int) -> set[int]:
+    """Extend the given nodes with all nodes at most `hops` edges away from them"""
+    result = set(nodes)
+    frontier = set(nodes)
+
+    for _ in range(hops):
+        frontier = {j for i in frontier for j in graph.adj[i]} - result
+        result |= frontier
+
+    return result
+
+
+def sorted_subgraph(graph: nx.Graph, node_ids: Iterable[NodeId]) -> nx.Graph:
+    """Copy of the subgraph induced by the nodes, which lists them in ascending order
+
+    Productions give ids to new nodes in the order of nodes of the subgraph they
+    are applied to, while the order of nodes of a match or a subgraph view depends
+    on the search and on the size of the viewed graph. Productions applied to
+    this copy give the same result for the same set of nodes.
+    """
+    node_ids = sorted(node_ids)
+    subgraph = nx.Graph()
+    subgraph.add_nodes_from((i, graph.nodes[i]) for i in node_ids)
+    subgraph.add_edges_from(
+        (i, j) for i in node_ids for j in graph.adj[i] if j in subgraph
+    )
+    return subgraph
+
+
+# Tells whether a node of the searched graph may be mapped to a node of the left side,
+# given their attributes
+NodeMatch = Callable[[dict[str, Any], dict[str, Any]], bool]
+
+# Pairs of nodes of a left side, the first of which has to be mapped to a node
+# with a smaller id
+SymmetryConditions = tuple[tuple[NodeId, NodeId], ...]
+
+
+def find_isomorphic_node_sets(
+    graph: nx.Graph,
+    left_side: nx.Graph,
+    node_match: NodeMatch,
+    anchor: NodeId | None = None,
+) -> Iterator[frozenset[NodeId]]:
+    """Find sets of nodes inducing subgraphs isomorphic to the left side
+
+    Each set is yielded once. If an anchor is given, only sets containing it are
+    searched for: the search starts by mapping a node of the left side to the
+    anchor (once for every such node), and is restricted by `symmetry_conditions`
+    so that a set is found once rather than once per automorphism of the left side.
+
+    :param graph:      graph in which isomorphic subgraphs will be searched for
+    :param left_side:  left side of a production
+    :param node_match: compares attributes of a node of the graph and of the left
+                       side, depending only on their values
+    :param anchor:     node which every found set has to contain (any if given None)
+
+    :returns: iterator over sets of nodes of the graph
+    """
+    if anchor is None:
+        mappings = isomorphism.GraphMatcher(
+            graph, left_side, node_match=node_match
+        ).subgraph_isomorphisms_iter()
+    else:
+        conditions = symmetry_conditions(left_side)
+        anchor_params = graph.nodes[anchor]
+        mappings = itertools.chain.from_iterable(
+            _AnchoredGraphMatcher(
+                graph, left_side, node_match, anchor, root, conditions
+            ).subgraph_isomorphisms_iter()
+            for root, root_params in left_side.nodes.items()
+            if node_match(anchor_params, root_params)
+        )
+
+    seen: set[frozenset[NodeId]] = set()
+    for mapping in mappings:
+        node_set = frozenset(mapping)
+        if node_set not in seen:
+            seen.add(node_set)
+            yield node_set
+
+
+def symmetry_conditions(left_side: nx.Graph) -> SymmetryConditions:
+    """Find conditions under which a single mapping onto every set of nodes remains
+
+    Conditions are built from automorphisms of the left side which keep attributes
+    of its nodes: a node moved by most of them is required to be mapped to a node
+    with a smaller id than nodes it can be moved to, then only automorphisms
+    fixing it are considered, until none moves any node (Grochow and Kellis, 2007).
+    """
+    key = (
+        tuple(
+            (i, tuple(sorted(node.items(), key=lambda item: item[0])))
+            for i, node in left_side.nodes.items()
+        ),
+        tuple(left_side.edges),
+    )
+    return _symmetry_conditions(key)
+
+
+@functools.lru_cache(maxsize=None)
+def _symmetry_conditions(
+    key: tuple[tuple[tuple[NodeId, tuple], ...], tuple[tuple[NodeId, NodeId], ...]]
+) -> SymmetryConditions:
+    nodes, edges = key
+    left_side = nx.Graph()
+    left_side.add_nodes_from((i, dict(node)) for i, node in nodes)
+    left_side.add_edges_from(edges)
+
+    automorphisms = list(
+        isomorphism.GraphMatcher(
+            left_side, left_side, node_match=operator.eq
+        ).isomorphisms_iter()
+    )
+    conditions: list[tuple[NodeId, NodeId]] = []
+    while len(automorphisms) > 1:
+        orbits = {i: {mapping[i] for mapping in automorphisms} for i in left_side}
+        fixed = max(left_side, key=lambda i: len(orbits[i]))
+        conditions.extend((fixed, i) for i in sorted(orbits[fixed]) if i != fixed)
+        automorphisms = [mapping for mapping in automorphisms if mapping[fixed] == fixed]
+
+    return tuple(conditions)
+
+
+class _AnchoredGraphMatcher(isomorphism.GraphMatcher):
+    """VF2 matcher whose every mapping maps the anchor to the root of the left side
+
+    The search starts from this single pair instead of pairing the root with
+    every node of the graph, so it only visits the surroundings of the anchor.
+    Mappings which do not satisfy symmetry conditions are abandoned as soon as
+    both nodes of a condition are mapped.
+    """
+
+    def __init__(
+        self,
+        graph: nx.Graph,
+        left_side: nx.Graph,
+        node_match: NodeMatch,
+        anchor: NodeId,
+        root: NodeId,
+        conditions: SymmetryConditions = (),
+    ):
+        super().__init__(graph, left_side, node_match=node_match)
+        self._anchor = anchor
+        self._root = root
+        # for every node of the left side: other nodes of its conditions and
+        # whether it has to be mapped to a smaller id than them
+        self._conditions: dict[NodeId, list[tuple[NodeId, bool]]] = {}
+        for smaller, larger in conditions:
+            self._conditions.setdefault(smaller, []).append((larger, True))
+            self._conditions.setdefault(larger, []).append((smaller, False))
+
+    def candidate_pairs_iter(self):
+        if not self.core_1:
+            yield self._anchor, self._root
+        else:
+            yield from super().candidate_pairs_iter()
+
+    def semantic_feasibility(self, G1_node, G2_node):
+        # pylint: disable=invalid-name
+        for other, smaller in self._conditions.get(G2_node, ()):
+            mapped = self.core_2.get(other)
+            if mapped is not None and (G1_node < mapped) != smaller:
+                return False
+        return super().semantic_feasibility(G1_node, G2_node)
@@ -0,0 +1,211 @@
+"""Contains a command-line renderer of every level of stored meshes
+
+Levels are rendered headlessly with the Agg backend, each in a worker
+process which receives only the arrays of its level. Rendered files are
+cached by a hash of the arrays and the options, so levels which did not
+change since the previous run are not rendered again.
+
+matplotlib is imported only by processes which render, so a re-run in which
+every level is cached does not import it at all. It is an optional dependency,
+installed with the `render` extra.
+
+Usage: gg-render snapshot.mesh [other.mesh ...] -o images --format svg
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import pathlib
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from gg_project.mesh_arrays import MeshArrays
+from gg_project.meshfile import load_mesh
+from gg_project.vis import draw_collections
+
+FORMATS = ("png", "svg")
+
+# Name of the file in the output directory storing hashes of rendered files
+CACHE_NAME = ".render-cache.json"
+
+
+def level_arrays(mesh: MeshArrays, level: int) -> MeshArrays:
+    """Returns arrays of the subgraph of nodes on the given level"""
+    return mesh.select(np.flatnonzero(mesh.levels == level))
+
+
+def content_hash(mesh: MeshArrays, **options) -> str:
+    """Returns a hash of the arrays and options which determine the rendered image"""
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode())
+    for array in (
+        mesh.ids,
+        mesh.vertex_types,
+        mesh.levels,
+        mesh.positions,
+        mesh.indptr,
+        mesh.indices,
+    ):
+        digest.update(array.dtype.str.encode())
+        digest.update(np.ascontiguousarray(array).data)
+
+    return digest.hexdigest()
+
+
+def render_level(
+    mesh: MeshArrays,
+    level: int,
+    path: str | os.PathLike,
+    figsize: tuple[float, float] = (10, 10),
+    dpi: int = 100,
+    nodesize: float = 50,
+    fontsize: float = 8,
+    titlesize: float = 24,
+) -> None:
+    """Renders arrays of a single level into a PNG or SVG file like `vis.draw`
+
+    :param mesh:      arrays of nodes on the level
+    :param level:     the rendered level
+    :param path:      path of the written file, its suffix chooses the format
+    :param figsize:   figsize of the image
+    :param dpi:       resolution of the image
+    :param nodesize:  size of the nodes
+    :param fontsize:  size of the node labels
+    :param titlesize: size of the image title
+    """
+    # pylint: disable=too-many-arguments, import-outside-toplevel
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    axes = figure.add_axes((0, 0, 1, 1))
+    axes.set_title(f"Siatka na poziomie {level}", fontsize=titlesize)
+    draw_collections(axes, mesh, nodesize, fontsize, level)
+    figure.savefig(path)
+
+
+def _read_cache(directory: pathlib.Path) -> dict[str, str]:
+    try:
+        with open(directory / CACHE_NAME, encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_cache(directory: pathlib.Path, cache: dict[str, str]) -> None:
+    temporary = directory / (CACHE_NAME + ".tmp")
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(cache, file, indent=1, sort_keys=True)
+    os.replace(temporary, directory / CACHE_NAME)
+
+
+def render_all(
+    paths: Iterable[str | os.PathLike],
+    directory: str | os.PathLike,
+    fmt: str = "png",
+    levels: Sequence[int] | None = None,
+    executor: concurrent.futures.Executor | None = None,
+    **options,
+) -> list[pathlib.Path]:
+    """Renders levels of the meshes stored in the given files
+
+    Files are named `<mesh file stem>-level-<level>.<fmt>`. A file is not
+    rendered again if its hash stored in `CACHE_NAME` did not change.
+
+    :param paths:     files written by `meshfile.save_mesh`, e.g. snapshots
+    :param directory: directory in which images will be written
+    :param fmt:       format of the images, one of `FORMATS`
+    :param levels:    levels which will be rendered (all present if given None)
+    :param executor:  executor used to render levels, a new process pool is
+                      created (and shut down) if not given
+    :param options:   other arguments of `render_level`
+
+    :returns: paths of images of all requested levels
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported image format {fmt}, expected one of {FORMATS}")
+
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    cache = _read_cache(directory)
+
+    outputs = []
+    jobs = []
+    for path in paths:
+        mesh, _ = load_mesh(path)
+        present = np.unique(mesh.levels).tolist()
+        for level in present if levels is None else levels:
+            arrays = level_arrays(mesh, level)
+            output = directory / f"{pathlib.Path(path).stem}-level-{level}.{fmt}"
+            digest = content_hash(arrays, level=level, fmt=fmt, **options)
+            outputs.append(output)
+            if cache.get(output.name) != digest or not output.exists():
+                jobs.append((arrays, level, output, digest))
+
+    if jobs:
+        owns_executor = executor is None
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor()
+
+        try:
+            futures = {
+                executor.submit(render_level, arrays, level, output, **options): (
+                    output,
+                    digest,
+                )
+                for arrays, level, output, digest in jobs
+            }
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+                output, digest = futures[future]
+                cache[output.name] = digest
+        finally:
+            _write_cache(directory, cache)
+            if owns_executor:
+                executor.shutdown()
+
+    return outputs
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Entry point of the `gg-render` command"""
+    parser = argparse.ArgumentParser(
+        description="Render every level of stored meshes into image files"
+    )
+    parser.add_argument("paths", nargs="+", help="mesh files, e.g. snapshots")
+    parser.add_argument("-o", "--output", default=".", help="output directory")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="png")
+    parser.add_argument(
+        "-l", "--levels", type=int, nargs="+", help="levels to render (default: all)"
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="number of worker processes")
+    parser.add_argument("--size", type=float, nargs=2, default=(10, 10))
+    parser.add_argument("--dpi", type=int, default=100)
+    arguments = parser.parse_args(argv)
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(arguments.jobs) as executor:
+            outputs = render_all(
+                arguments.paths,
+                arguments.output,
+                arguments.format,
+                arguments.levels,
+                executor,
+                figsize=tuple(arguments.size),
+                dpi=arguments.dpi,
+            )
+    except ModuleNotFoundError as error:
+        if (error.name or "").partition(".")[0] != "matplotlib":
+            raise
+        parser.exit(
+            1, "gg-render needs matplotlib, install it with gg-project[render]\n"
+        )
+
+    for output in outputs:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Contains a scheduler breaking elements in the order of their estimated error
+
+Refinement stops when the graph reaches the given size or the given time runs
+out, so that the budget is spent on elements with the largest error.
+"""
+import heapq
+import math
+import time
+from typing import Callable, Iterable, Sequence, Type
+
+import networkx as nx
+
+from gg_project.productions import Production
+from gg_project.productions.groups import REFINING_PRODUCTIONS
+from gg_project.productions.registry import ProductionRegistry
+from gg_project.vertex_params import VertexType
+
+# Receives the graph and id of an interior node and returns the error of its element
+ErrorEstimate = Callable[[nx.Graph, int], float]
+
+
+class RefinementQueue:
+    """Priority queue of interior nodes, the one with the largest error first
+
+    Entries are invalidated lazily: an outdated entry stays in the heap
+    and is skipped when popped.
+    """
+
+    def __init__(self, estimate: ErrorEstimate):
+        self._estimate = estimate
+        self._heap: list[tuple[float, int]] = []
+        self._errors: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._errors)
+
+    def update(self, graph: nx.Graph, node_ids: Iterable[int]) -> None:
+        """(Re)estimates errors of given nodes
+
+        Nodes which are not interior (or no longer in the graph) are dropped.
+
+        :raises ValueError: if the estimated error is NaN
+        """
+        for node_id in node_ids:
+            if (
+                node_id not in graph
+                or graph.nodes[node_id]["vertex_type"] != VertexType.INTERIOR
+            ):
+                self._errors.pop(node_id, None)
+                continue
+
+            error = self._estimate(graph, node_id)
+            if math.isnan(error):
+                raise ValueError(f"Error estimated for node {node_id} is NaN")
+            if self._errors.get(node_id) != error:
+                self._errors[node_id] = error
+                heapq.heappush(self._heap, (-error, node_id))
+
+    def pop(self) -> int | None:
+        """Removes and returns the node with the largest error or None if there is none"""
+        while self._heap:
+            error, node_id = heapq.heappop(self._heap)
+            if self._errors.get(node_id) == -error:
+                del self._errors[node_id]
+                return node_id
+
+        return None
+
+
+def refine_by_priority(
+    graph: nx.Graph,
+    estimate: ErrorEstimate,
+    max_nodes: int | None = None,
+    time_budget: float | None = None,
+    productions: Sequence[Type[Production]] = REFINING_PRODUCTIONS,
+) -> nx.Graph:
+    """Break elements with the largest estimated error until the budget is used
+
+    After every production only errors of interior nodes within the radius of
+    the productions from the nodes it changed are estimated again. A popped node
+    at which no production matches is dropped until something changes within
+    this radius, as only then a production can start to match at it.
+
+    :param graph:       graph which will be refined
+    :param estimate:    function estimating the error of an element
+    :param max_nodes:   no more productions are applied once the graph has
+                        this many nodes (unbounded if given None)
+    :param time_budget: no more productions are applied after this many
+                        seconds (unbounded if given None)
+    :param productions: productions breaking an element, anchored at its
+                        interior node, the first matching one is applied,
+                        each has to declare its radius
+
+    :raises ValueError: if an estimated error is NaN
+
+    :returns: _new_ refined graph
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+
+    registry = ProductionRegistry(productions)
+    queue = RefinementQueue(estimate)
+    queue.update(graph, graph.nodes)
+
+    while max_nodes is None or len(graph) < max_nodes:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+
+        node_id = queue.pop()
+        if node_id is None:
+            break
+
+        for production in registry.productions:
+            subgraph = production.find_isomorphic_at(graph, node_id)
+            if subgraph is not None:
+                new_graph = production.apply(graph, subgraph)
+                changed = {i for i in new_graph.nodes if i not in graph.nodes}
+                changed.update(subgraph.nodes)
+                # neighbours of removed nodes lost their edges
+                changed.update(
+                    j
+                    for i in subgraph.nodes
+                    if i not in new_graph
+                    for j in graph.adj[i]
+                )
+                queue.update(
+                    new_graph,
+                    changed.union(i for _, i in registry.woken(new_graph, changed)),
+                )
+                graph = new_graph
+                break
+
+    return graph
@@ -0,0 +1,103 @@
+"""Contains code for sharing mesh arrays between processes
+
+Arrays are copied once into a shared memory block. Other processes attach
+to the block using a small handle and read the arrays without copying them.
+"""
+import dataclasses
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from gg_project.mesh_arrays import MeshArrays
+
+# Offsets of arrays in the block are aligned to this many bytes
+ALIGNMENT = 64
+
+
+@dataclasses.dataclass(frozen=True)
+class SharedMeshHandle:
+    """Describes where arrays of a shared mesh are stored
+
+    :ivar name:   name of the shared memory block
+    :ivar layout: field name, dtype, shape and offset of every array in the block
+    """
+
+    name: str
+    layout: tuple[tuple[str, str, tuple[int, ...], int], ...]
+
+
+class SharedMesh:
+    """Mesh arrays stored in a shared memory block
+
+    Should be used as a context manager. The process which created the block
+    removes it on exit, processes which attached to it only detach.
+    Arrays must not be used after the block is closed.
+    """
+
+    def __init__(
+        self,
+        memory: shared_memory.SharedMemory,
+        handle: SharedMeshHandle,
+        owner: bool,
+    ):
+        self._memory = memory
+        self._owner = owner
+        self.handle = handle
+        self._arrays: MeshArrays | None = MeshArrays(
+            **{
+                field: np.ndarray(shape, np.dtype(dtype), memory.buf, offset)
+                for field, dtype, shape, offset in handle.layout
+            }
+        )
+
+    @property
+    def arrays(self) -> MeshArrays:
+        """Arrays stored in the block, raises ValueError once it is closed"""
+        if self._arrays is None:
+            raise ValueError("Shared mesh is closed")
+        return self._arrays
+
+    @classmethod
+    def create(cls, mesh: MeshArrays) -> "SharedMesh":
+        """Copies the given arrays into a new shared memory block"""
+        arrays = {
+            field.name: getattr(mesh, field.name) for field in dataclasses.fields(mesh)
+        }
+
+        layout = []
+        size = 0
+        for field, array in arrays.items():
+            layout.append((field, array.dtype.str, array.shape, size))
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shared = cls(memory, SharedMeshHandle(memory.name, tuple(layout)), owner=True)
+        for field, array in arrays.items():
+            getattr(shared.arrays, field)[...] = array
+
+        return shared
+
+    @classmethod
+    def attach(cls, handle: SharedMeshHandle) -> "SharedMesh":
+        """Attaches to a block created by another process, arrays are read-only"""
+        shared = cls(shared_memory.SharedMemory(name=handle.name), handle, owner=False)
+        for field in dataclasses.fields(shared.arrays):
+            getattr(shared.arrays, field.name).flags.writeable = False
+
+        return shared
+
+    def close(self) -> None:
+        """Detaches from the block and removes it if it was created by this process"""
+        if self._arrays is None:
+            return
+
+        self._arrays = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+    def __enter__(self) -> "SharedMesh":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
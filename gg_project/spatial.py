@@ -0,0 +1,79 @@
+"""Contains a spatial index of points used to find elements in a viewport"""
+import numpy as np
+
+# Bounding box given as (x_min, y_min, x_max, y_max)
+BBox = tuple[float, float, float, float]
+
+
+class GridIndex:
+    """Uniform grid of buckets of points
+
+    Points are sorted by the bucket they fall into, so a query for a box
+    reads only the buckets it overlaps. Points with NaN coordinates are
+    not indexed.
+
+    :param points:    coordinates of the points (N, 2)
+    :param cell_size: side of a bucket, chosen so that there is about one
+                      point per bucket if given None
+    """
+
+    def __init__(self, points: np.ndarray, cell_size: float | None = None):
+        self._points = np.asarray(points, dtype=float)
+        rows = np.flatnonzero(~np.isnan(self._points).any(axis=1))
+        indexed = self._points[rows]
+
+        if len(rows):
+            self._origin = indexed.min(axis=0)
+            extent = float((indexed.max(axis=0) - self._origin).max())
+        else:
+            self._origin = np.zeros(2)
+            extent = 0.0
+        if cell_size is None:
+            cell_size = extent / max(np.sqrt(len(rows)), 1.0)
+        self._cell_size = cell_size if cell_size > 0 else 1.0
+
+        cells = self._cells(indexed)
+        self._shape = (cells.max(axis=0) + 1) if len(rows) else np.ones(2, np.int64)
+        keys = cells[:, 0] * self._shape[1] + cells[:, 1]
+        order = np.argsort(keys, kind="stable")
+        self._rows = rows[order]
+        self._starts = np.searchsorted(
+            keys[order], np.arange(self._shape[0] * self._shape[1] + 1)
+        )
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        return np.floor((points - self._origin) / self._cell_size).astype(np.int64)
+
+    def query(self, bbox: BBox) -> np.ndarray:
+        """Returns sorted rows of points inside the box (including its boundary)"""
+        x_min, y_min, x_max, y_max = bbox
+        if x_min > x_max or y_min > y_max:
+            return np.zeros(0, dtype=np.int64)
+
+        # clipped before conversion, far corners would overflow integers
+        corners = np.array([[x_min, y_min], [x_max, y_max]], dtype=float)
+        (i_min, j_min), (i_max, j_max) = np.clip(
+            np.floor((corners - self._origin) / self._cell_size),
+            0,
+            self._shape - 1,
+        ).astype(np.int64)
+
+        first = np.arange(i_min, i_max + 1) * self._shape[1] + j_min
+        candidates = np.concatenate(
+            [
+                self._rows[start:stop]
+                for start, stop in zip(
+                    self._starts[first], self._starts[first + (j_max - j_min) + 1]
+                )
+            ]
+            or [np.zeros(0, dtype=np.int64)]
+        )
+
+        points = self._points[candidates]
+        inside = (
+            (points[:, 0] >= x_min)
+            & (points[:, 0] <= x_max)
+            & (points[:, 1] >= y_min)
+            & (points[:, 1] <= y_max)
+        )
+        return np.sort(candidates[inside])
@@ -0,0 +1,175 @@
+"""Contains a streaming SVG writer of a single level of mesh arrays
+
+Elements are written chunk by chunk straight from the arrays (which may be
+memory-mapped by `meshfile.load_mesh`), so memory used by the writer does not
+grow with the size of the mesh and no matplotlib artists are created.
+
+Nodes are drawn in the coordinates of `vis.draw`: `(x, -(y + 2 * level))`,
+with nodes without a position between their neighbours on the level. Nodes
+without any positioned neighbour are skipped.
+Coinciding nodes are not moved apart.
+"""
+import os
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+from gg_project.mesh_arrays import VERTEX_TYPES, MeshArrays
+from gg_project.vis import COLOR_MAPPING
+
+# Number of rows of the arrays processed at once
+CHUNK_SIZE = 1 << 16
+
+
+def _chunks(mesh: MeshArrays, level: int) -> Iterator[np.ndarray]:
+    """Iterates over rows of nodes on the level, at most `CHUNK_SIZE` at once"""
+    for start in range(0, len(mesh), CHUNK_SIZE):
+        rows = np.arange(start, min(start + CHUNK_SIZE, len(mesh)))
+        rows = rows[mesh.levels[rows] == level]
+        if len(rows):
+            yield rows
+
+
+def _neighborhoods(mesh: MeshArrays, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Returns indices of the given rows repeated per neighbour and the neighbours"""
+    starts = mesh.indptr[rows]
+    counts = mesh.indptr[rows + 1] - starts
+    owners = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, mesh.indices[starts[owners] + offsets]
+
+
+def _coordinates(mesh: MeshArrays, rows: np.ndarray, level: int) -> np.ndarray:
+    """Calculates drawing coordinates (R, 2) of nodes on the level"""
+    coordinates = np.array(mesh.positions[rows], dtype=float)
+    missing = np.flatnonzero(np.isnan(coordinates[:, 0]))
+    if len(missing):
+        owners, neighbors = _neighborhoods(mesh, rows[missing])
+        positions = mesh.positions[neighbors]
+        kept = (mesh.levels[neighbors] == level) & ~np.isnan(positions[:, 0])
+        owners, positions = owners[kept], positions[kept]
+        counts = np.bincount(owners, minlength=len(missing))
+        with np.errstate(invalid="ignore"):
+            for axis in range(2):
+                coordinates[missing, axis] = (
+                    np.bincount(owners, positions[:, axis], minlength=len(missing))
+                    / counts
+                )
+
+    coordinates[:, 1] = -(coordinates[:, 1] + 2 * level)
+    return coordinates
+
+
+def _extent(mesh: MeshArrays, level: int) -> tuple[float, float, float, float] | None:
+    """Returns bounds of drawing coordinates of positioned nodes on the level"""
+    lower = np.full(2, np.inf)
+    upper = np.full(2, -np.inf)
+    for rows in _chunks(mesh, level):
+        positions = np.asarray(mesh.positions[rows])
+        positions = positions[~np.isnan(positions[:, 0])]
+        if len(positions):
+            lower = np.minimum(lower, positions.min(axis=0))
+            upper = np.maximum(upper, positions.max(axis=0))
+
+    if np.isinf(lower).any():
+        return None
+
+    return (
+        float(lower[0]),
+        float(-(upper[1] + 2 * level)),
+        float(upper[0]),
+        float(-(lower[1] + 2 * level)),
+    )
+
+
+def write_svg(
+    mesh: MeshArrays,
+    level: int,
+    file: BinaryIO,
+    width: int = 1000,
+    radius: float | None = None,
+    stroke_width: float | None = None,
+) -> None:
+    """Writes nodes and edges of a single level as SVG
+
+    Edges are written as `<line>` elements below nodes written as `<circle>`
+    elements, coloured according to `vis.COLOR_MAPPING`.
+
+    :param mesh:         arrays of the drawn graph
+    :param level:        the level which will be drawn
+    :param file:         binary file the SVG will be written into
+    :param width:        width of the image in pixels, height keeps the aspect
+    :param radius:       radius of the nodes in drawing coordinates
+                         (1/200 of the size of the level if given None)
+    :param stroke_width: width of the edges in drawing coordinates
+                         (1/1000 of the size of the level if given None)
+    """
+    # pylint: disable=too-many-arguments, too-many-locals
+    extent = _extent(mesh, level) or (0.0, 0.0, 1.0, 1.0)
+    size = max(extent[2] - extent[0], extent[3] - extent[1], 1e-12)
+    radius = size / 200 if radius is None else radius
+    stroke_width = size / 1000 if stroke_width is None else stroke_width
+    margin = size / 20 + radius
+
+    view = (
+        extent[0] - margin,
+        -extent[3] - margin,
+        extent[2] - extent[0] + 2 * margin,
+        extent[3] - extent[1] + 2 * margin,
+    )
+    file.write(
+        b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="%r %r %r %r" '
+        b'width="%d" height="%d">\n' % (*view, width, round(width * view[3] / view[2]))
+    )
+    file.write(
+        b"<style>%s</style>\n"
+        % b"".join(
+            b".t%d{fill:%s}" % (code, COLOR_MAPPING[vertex_type].encode())
+            for code, vertex_type in enumerate(VERTEX_TYPES)
+        )
+    )
+    # drawing coordinates grow upwards, as in matplotlib
+    file.write(b'<g transform="scale(1,-1)">\n')
+
+    file.write(b'<g stroke="black" stroke-width="%r">\n' % stroke_width)
+    for rows in _chunks(mesh, level):
+        owners, neighbors = _neighborhoods(mesh, rows)
+        kept = (rows[owners] < neighbors) & (mesh.levels[neighbors] == level)
+        owners, neighbors = owners[kept], neighbors[kept]
+        unique, inverse = np.unique(neighbors, return_inverse=True)
+        segments = np.concatenate(
+            [
+                _coordinates(mesh, rows, level)[owners],
+                _coordinates(mesh, unique, level)[inverse],
+            ],
+            axis=1,
+        )
+        segments = segments[~np.isnan(segments).any(axis=1)]
+        file.write(
+            b"".join(
+                b'<line x1="%r" y1="%r" x2="%r" y2="%r"/>\n' % tuple(segment)
+                for segment in segments.tolist()
+            )
+        )
+    file.write(b"</g>\n")
+
+    file.write(b"<g>\n")
+    for rows in _chunks(mesh, level):
+        coordinates = _coordinates(mesh, rows, level)
+        drawn = ~np.isnan(coordinates[:, 0])
+        rows, coordinates = rows[drawn], coordinates[drawn]
+        file.write(
+            b"".join(
+                b'<circle class="t%d" cx="%r" cy="%r" r="%r"/>\n' % (code, x, y, radius)
+                for code, (x, y) in zip(
+                    mesh.vertex_types[rows].tolist(), coordinates.tolist()
+                )
+            )
+        )
+    file.write(b"</g>\n</g>\n</svg>\n")
+
+
+def save_svg(mesh: MeshArrays, level: int, path: str | os.PathLike, **kwargs) -> None:
+    """Writes a single level into an SVG file, see `write_svg`"""
+    with open(path, "wb") as file:
+        write_svg(mesh, level, file, **kwargs)
@@ -0,0 +1,348 @@
+"""Contains code for refining a mesh split into spatial tiles
+
+Every tile is refined independently (possibly in a separate process) with
+productions 2-5, and closed with productions 6 and 7 where the matched nodes
+belong to the tile alone. The refined tiles are stitched back into a single
+graph and the remaining matches of productions 6 and 7, found near nodes shared
+by tiles, are applied to it.
+
+Productions are applied at anchors in ascending order of their ids, so the result
+is the same as of refining and closing the whole graph tile by tile in a single
+process (with the same ranges of ids).
+"""
+import collections
+import concurrent.futures
+import heapq
+from typing import Callable, Collection, Iterable, Sequence, Type
+
+import networkx as nx
+
+from gg_project.parallel import partition
+from gg_project.productions import Production
+from gg_project.productions.groups import CLOSING_PRODUCTIONS, REFINING_PRODUCTIONS
+from gg_project.productions.registry import ProductionRegistry
+from gg_project.productions.utils import (
+    ID_BLOCK_KEY,
+    IdBlockAllocator,
+    NodeId,
+    reserve_id_block,
+    sorted_subgraph,
+    with_halo,
+)
+from gg_project.vertex_params import VertexType
+
+# Interior node, its corners and the midpoints of its broken sides (together
+# with all neighbours of the corners)
+TILE_HALO = ProductionRegistry(REFINING_PRODUCTIONS).radius
+
+DEFAULT_IDS_PER_TILE = 1 << 20
+
+INTERIOR_TYPES = (VertexType.INTERIOR, VertexType.INTERIOR_USED)
+
+
+# Graph of the tile contains owned interior nodes together with their surroundings,
+# only owned interior nodes (and their descendants) are refined within the tile
+Tile = collections.namedtuple("Tile", ["graph", "owned"])
+
+# Tells whether a node (of the given graph) is an anchor at which productions are applied
+IsAnchor = Callable[[nx.Graph, NodeId], bool]
+
+# Tells whether a production may be applied to the nodes (of the given graph)
+Accept = Callable[[nx.Graph, Collection[NodeId]], bool]
+
+
+def split(
+    graph: nx.Graph, grid: tuple[int, int], ids_per_tile: int = DEFAULT_IDS_PER_TILE
+) -> list[Tile]:
+    """Split the graph into a grid of tiles, each owning the interior nodes inside it
+
+    Every tile gets its own range of ids for new nodes, so that tiles can be
+    stitched without renumbering them. The range following the ranges of all
+    tiles is left for `stitch`.
+
+    :param graph:        graph which will be split
+    :param grid:         number of tiles along the x and y axes
+    :param ids_per_tile: number of ids reserved for new nodes of every tile
+
+    :returns: list of non-empty tiles
+    """
+    interiors = [
+        i
+        for i, node in graph.nodes.items()
+        if node["vertex_type"] == VertexType.INTERIOR
+    ]
+    allocator = IdBlockAllocator(graph, ids_per_tile)
+    owned_by_tile = [owned for owned in partition(graph, grid, interiors) if owned]
+
+    return [
+        Tile(
+            reserve_id_block(
+                nx.Graph(graph.subgraph(with_halo(graph, owned, TILE_HALO))),
+                allocator.block(index),
+            ),
+            frozenset(owned),
+        )
+        for index, owned in enumerate(owned_by_tile)
+    ]
+
+
+def _match_at(
+    graph: nx.Graph, production: Type[Production], anchor: NodeId, accept: Accept
+) -> tuple[NodeId, ...] | None:
+    """Find the match of the production at the anchor with the smallest ids
+
+    Only matches containing the anchor are enumerated (there are a few of them),
+    so the result does not depend on how much of the graph surrounds the anchor,
+    e.g. on whether it is a tile or the whole graph.
+
+    :returns: sorted ids of matched nodes or None if no accepted match is found
+    """
+    return min(
+        (
+            tuple(sorted(subgraph.nodes))
+            for subgraph in production.find_all_isomorphic_at(graph, anchor)
+            if accept(graph, subgraph.nodes)
+        ),
+        default=None,
+    )
+
+
+def _apply_at_anchors(
+    graph: nx.Graph,
+    registry: ProductionRegistry,
+    anchors: Iterable[NodeId],
+    is_anchor: IsAnchor,
+    accept: Accept,
+) -> nx.Graph:
+    """Apply productions at anchors, the one with the smallest id first, until none matches
+
+    After a production is applied, anchors it could affect (see
+    `ProductionRegistry.woken`) are searched again. Anchors at which no production
+    matches do not change the result, so it is the same for every set of anchors
+    containing those at which a production matches.
+
+    :param graph:     graph on which productions will be applied
+    :param registry:  productions which will be applied
+    :param anchors:   anchors which will be searched at first
+    :param is_anchor: tells which woken anchors will be searched
+    :param accept:    tells which matches may be applied
+
+    :returns: _new_ graph with productions applied
+    """
+    graph = graph.copy()
+    pending = sorted(set(anchors))
+    queued = set(pending)
+
+    while pending:
+        anchor = heapq.heappop(pending)
+        queued.discard(anchor)
+        if anchor not in graph:
+            continue
+
+        for production in registry.for_anchor(graph.nodes[anchor]["vertex_type"]):
+            node_ids = _match_at(graph, production, anchor, accept)
+            if node_ids is not None:
+                break
+        else:
+            continue
+
+        # a delta is computed around the match, the graph is not copied every step
+        delta = production.apply_delta(graph, sorted_subgraph(graph, node_ids))
+        changed = {j for i in node_ids for j in graph.adj[i]}.union(
+            node_ids, (i for i, _ in delta.added_nodes)
+        )
+        delta.apply(graph)
+
+        for _, node_id in registry.woken(graph, changed):
+            if node_id not in queued and is_anchor(graph, node_id):
+                queued.add(node_id)
+                heapq.heappush(pending, node_id)
+
+    return graph
+
+
+def _interior_neighbors(graph: nx.Graph, node_id: NodeId) -> list[NodeId]:
+    return [
+        i for i in graph.adj[node_id] if graph.nodes[i]["vertex_type"] in INTERIOR_TYPES
+    ]
+
+
+def refine_tile(
+    tile: Tile,
+    max_level: int,
+    productions: Sequence[Type[Production]] = REFINING_PRODUCTIONS,
+    closing: Sequence[Type[Production]] = CLOSING_PRODUCTIONS,
+) -> nx.Graph:
+    """Refine interior nodes owned by the tile and close the result within the tile
+
+    Closing productions are applied only to nodes which are not affected by other
+    tiles: owned interior nodes, nodes created within the tile and exterior nodes
+    whose interior neighbours are all such nodes. The remaining ones are left
+    for `stitch`.
+
+    :param tile:        tile which will be refined, its graph can be the whole
+                        graph it was split from
+    :param max_level:   level at which no more elements will be broken
+    :param productions: productions which will be applied to owned interior nodes
+    :param closing:     productions merging exterior nodes duplicated by refinement
+
+    :returns: refined graph of the tile
+    """
+
+    def is_local(node_id: NodeId) -> bool:
+        return node_id in tile.owned or node_id not in tile.graph
+
+    def is_safe(graph: nx.Graph, node_id: NodeId) -> bool:
+        if is_local(node_id):
+            return True
+        if graph.nodes[node_id]["vertex_type"] != VertexType.EXTERIOR:
+            return False
+        interiors = _interior_neighbors(graph, node_id)
+        return not tile.owned.isdisjoint(interiors) and all(map(is_local, interiors))
+
+    graph = _apply_at_anchors(
+        tile.graph,
+        ProductionRegistry(productions),
+        tile.owned,
+        lambda graph, i: is_local(i) and graph.nodes[i]["level"] < max_level,
+        lambda graph, node_ids: all(
+            graph.nodes[i]["level"] < max_level for i in node_ids
+        ),
+    )
+
+    return _apply_at_anchors(
+        graph,
+        ProductionRegistry(closing),
+        (i for i in graph if is_local(i)),
+        lambda graph, i: is_local(i),
+        lambda graph, node_ids: all(is_safe(graph, i) for i in node_ids),
+    )
+
+
+def close(
+    graph: nx.Graph,
+    anchors: Iterable[NodeId] | None = None,
+    productions: Sequence[Type[Production]] = CLOSING_PRODUCTIONS,
+) -> nx.Graph:
+    """Apply closing productions at anchors in ascending order of their ids until none matches
+
+    :param graph:       graph which will be closed
+    :param anchors:     anchors at which productions are searched for at first,
+                        every node if given None
+    :param productions: productions merging duplicated exterior nodes
+
+    :returns: _new_ closed graph
+    """
+    return _apply_at_anchors(
+        graph,
+        ProductionRegistry(productions),
+        graph.nodes if anchors is None else anchors,
+        lambda graph, i: True,
+        lambda graph, node_ids: True,
+    )
+
+
+def stitch(
+    graph: nx.Graph,
+    tiles: Sequence[Tile],
+    refined: Sequence[nx.Graph],
+    id_block: tuple[NodeId, NodeId] | None = None,
+    closing: Sequence[Type[Production]] = CLOSING_PRODUCTIONS,
+) -> nx.Graph:
+    """Combine refined tiles into the graph they were split from and close it
+
+    Nodes created in different tiles have distinct ids, reserved by `split`.
+    Closing productions which could not be applied within a single tile contain
+    a node which belongs to no tile (e.g. an exterior node on the boundary
+    between tiles), so they are searched for only around such nodes. The result
+    does not depend on the order in which tiles were refined.
+
+    :param graph:    graph the tiles were split from
+    :param tiles:    tiles returned by `split`
+    :param refined:  refined graphs of the tiles, in the same order
+    :param id_block: range of ids for nodes merged by closing productions, ids
+                     following the largest one are used if given None
+    :param closing:  productions merging exterior nodes duplicated by refinement
+
+    :returns: _new_ graph containing all refined tiles
+    """
+    new_graph = graph.copy()
+    tile_of: dict[NodeId, int] = {}
+
+    for index, (tile, tile_graph) in enumerate(zip(tiles, refined)):
+        created = [i for i in tile_graph.nodes if i not in graph.nodes]
+
+        new_graph.remove_nodes_from(tile.graph.nodes - tile_graph.nodes)
+        new_graph.add_nodes_from(
+            (i, tile_graph.nodes[i]) for i in [*tile.owned, *created]
+        )
+        new_graph.add_edges_from(
+            (i, j) for i, j in tile_graph.edges if i not in graph or j not in graph
+        )
+        tile_of.update(dict.fromkeys([*tile.owned, *created], index))
+
+    def belongs_to_tile(node_id: NodeId) -> bool:
+        if node_id in tile_of:
+            return True
+        if new_graph.nodes[node_id]["vertex_type"] != VertexType.EXTERIOR:
+            return False
+        interiors = _interior_neighbors(new_graph, node_id)
+        tiles_of_interiors = {tile_of.get(i) for i in interiors}
+        return (
+            len(tiles_of_interiors) == 1
+            and None not in tiles_of_interiors
+            and any(i in tiles[tile_of[i]].owned for i in interiors)
+        )
+
+    shared = [i for i in new_graph if i in graph and not belongs_to_tile(i)]
+    registry = ProductionRegistry(closing)
+
+    reserve_id_block(new_graph, id_block)
+    new_graph = close(
+        new_graph, (i for _, i in registry.woken(new_graph, shared)), closing
+    )
+
+    return reserve_id_block(new_graph, graph.graph.get(ID_BLOCK_KEY))
+
+
+def refine_tiled(
+    graph: nx.Graph,
+    max_level: int,
+    grid: tuple[int, int] = (2, 2),
+    productions: Sequence[Type[Production]] = REFINING_PRODUCTIONS,
+    executor: concurrent.futures.Executor | None = None,
+    ids_per_tile: int = DEFAULT_IDS_PER_TILE,
+) -> nx.Graph:
+    """Refine the graph tile by tile, each tile in a separate worker process
+
+    :param graph:       graph which will be refined
+    :param max_level:   level at which no more elements will be broken
+    :param grid:        number of tiles along the x and y axes
+    :param productions: productions which will be applied within tiles
+    :param executor:    executor used to refine tiles, a new process pool is
+                        created (and shut down) if not given
+    :param ids_per_tile: number of ids reserved for new nodes of every tile
+
+    :returns: _new_ refined graph, identical for every executor
+    """
+    tiles = split(graph, grid, ids_per_tile)
+
+    owns_executor = executor is None
+    if executor is None:
+        executor = concurrent.futures.ProcessPoolExecutor()
+
+    try:
+        refined = list(
+            executor.map(
+                refine_tile,
+                tiles,
+                [max_level] * len(tiles),
+                [productions] * len(tiles),
+            )
+        )
+    finally:
+        if owns_executor:
+            executor.shutdown()
+
+    id_block = IdBlockAllocator(graph, ids_per_tile).block(len(tiles))
+    return stitch(graph, tiles, refined, id_block)
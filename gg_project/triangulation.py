@@ -0,0 +1,216 @@
+"""Contains conversions between graphs and the triangles they represent
+
+Every element is represented by an interior node connected to the exterior
+nodes at its corners, on the same level. Elements which are not broken yet
+(with INTERIOR nodes) form the finest triangulation of the domain.
+"""
+from typing import Iterator
+
+import networkx as nx
+import numpy as np
+
+from gg_project.vertex_params import EPSILON, VertexType
+
+INTERIOR_TYPES = (VertexType.INTERIOR, VertexType.INTERIOR_USED)
+
+
+def position_key(position: tuple[float, float]) -> tuple[int, int]:
+    """Returns the point of a grid with spacing `EPSILON` closest to the position
+
+    Coinciding positions (up to rounding errors) get equal keys.
+    """
+    return round(position[0] / EPSILON), round(position[1] / EPSILON)
+
+
+def triangle_corners(graph: nx.Graph, node_id: int) -> list[int]:
+    """Returns ids of exterior nodes at the corners of the element
+
+    :param graph:   graph containing the element
+    :param node_id: id of the interior node of the element
+    """
+    nodes = graph.nodes
+    level = nodes[node_id]["level"]
+    return [
+        i
+        for i in graph.adj[node_id]
+        if nodes[i]["vertex_type"] == VertexType.EXTERIOR and nodes[i]["level"] == level
+    ]
+
+
+def iter_leaf_triangles(graph: nx.Graph) -> Iterator[tuple[int, tuple[int, int, int]]]:
+    """Iterates over elements which are not broken
+
+    :param graph: graph containing the elements
+
+    :returns: iterator over ids of interior nodes of the elements and ids
+              of exterior nodes at their three corners
+    """
+    for node_id, node in graph.nodes.items():
+        if node["vertex_type"] != VertexType.INTERIOR:
+            continue
+
+        corners = triangle_corners(graph, node_id)
+        if len(corners) == 3:
+            first, second, third = corners
+            yield node_id, (first, second, third)
+
+
+def from_arrays(vertices: np.ndarray, triangles: np.ndarray) -> nx.Graph:
+    """Builds a level 1 graph of the given triangulation
+
+    The graph has the same structure as the one created by production 1 from
+    the start graph. The start node (id 0, already used) is placed in the
+    middle of the bounding box of the vertices and connected to every interior
+    node. Vertex `v` gets id `v + 1` and triangle `t` gets an interior node
+    with id `len(vertices) + t + 1`, placed at its centroid.
+
+    :param vertices:  positions of vertices (V, 2)
+    :param triangles: indices of the vertices at the corners of triangles (T, 3)
+
+    :returns: _new_ graph
+
+    :raises ValueError: if arrays have wrong shapes, triangles are not integer
+                        indices or refer to vertices which do not exist
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    triangles = np.asarray(triangles)
+    if vertices.ndim != 2 or vertices.shape[1] != 2:
+        raise ValueError(f"Vertices should have shape (V, 2), got {vertices.shape}")
+    if triangles.ndim != 2 or triangles.shape[1] != 3:
+        raise ValueError(f"Triangles should have shape (T, 3), got {triangles.shape}")
+    # floats are accepted only if they hold whole numbers, which are not
+    # changed by the conversion to integers below
+    are_integers = triangles.dtype.kind in "iu"
+    are_whole_floats = triangles.dtype.kind == "f" and np.array_equal(
+        triangles, np.trunc(triangles)
+    )
+    if not (are_integers or are_whole_floats):
+        raise ValueError("Triangles should contain integer indices of vertices")
+    if triangles.size and (triangles.min() < 0 or triangles.max() >= len(vertices)):
+        raise ValueError("Triangles refer to vertices which do not exist")
+
+    triangles = triangles.astype(np.int64)
+    interior_ids = np.arange(len(triangles)) + len(vertices) + 1
+
+    # every side shared by two triangles is kept once
+    sides = np.sort(triangles[:, [[0, 1], [1, 2], [2, 0]]].reshape(-1, 2), axis=1)
+    sides = np.unique(sides, axis=0) + 1
+
+    if len(vertices):
+        start_position = tuple(
+            ((vertices.min(axis=0) + vertices.max(axis=0)) / 2).tolist()
+        )
+    else:
+        start_position = (0.0, 0.0)
+
+    graph = nx.Graph()
+    graph.add_node(
+        0, vertex_type=VertexType.START_USED, position=start_position, level=0
+    )
+    graph.add_nodes_from(
+        (
+            i,
+            {"vertex_type": VertexType.EXTERIOR, "position": position, "level": 1},
+        )
+        for i, position in enumerate(map(tuple, vertices.tolist()), start=1)
+    )
+    graph.add_nodes_from(
+        (
+            i,
+            {"vertex_type": VertexType.INTERIOR, "position": position, "level": 1},
+        )
+        for i, position in zip(
+            interior_ids.tolist(),
+            map(tuple, vertices[triangles].mean(axis=1).tolist()),
+        )
+    )
+
+    graph.add_edges_from(sides.tolist())
+    graph.add_edges_from((0, i) for i in interior_ids.tolist())
+    graph.add_edges_from(
+        zip(np.repeat(interior_ids, 3).tolist(), (triangles.ravel() + 1).tolist())
+    )
+
+    return graph
+
+
+def to_arrays(graph: nx.Graph, level: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Converts all elements on the given level (broken or not) into arrays
+
+    Elements are ordered as their interior nodes in the graph, vertices as
+    their first occurrence in the elements. Coinciding exterior nodes are
+    converted into a single vertex.
+
+    :param graph: graph containing the elements
+    :param level: level of the elements
+
+    :returns: positions of vertices (V, 2), counter-clockwise indices of
+              vertices at the corners of elements (T, 3) and indices of
+              elements which were broken into them, as returned for the
+              previous level (T,), -1 for elements without a parent
+    """
+    # plain dictionaries avoid the overhead of networkx views in the loops below
+    nodes = dict(graph.nodes(data=True))
+    adjacency = dict(graph.adjacency())
+
+    def corners(node_id: int, node_level: int) -> list[int]:
+        return [
+            i
+            for i in adjacency[node_id]
+            if nodes[i]["vertex_type"] == VertexType.EXTERIOR
+            and nodes[i]["level"] == node_level
+        ]
+
+    # parents are numbered as elements of the previous level, only complete
+    # ones (with three corners) are converted
+    parent_indices: dict[int, int] = {}
+    interior_ids = []
+    for node_id, node in nodes.items():
+        if node["vertex_type"] not in INTERIOR_TYPES:
+            continue
+        if node["level"] == level - 1 and len(corners(node_id, level - 1)) == 3:
+            parent_indices[node_id] = len(parent_indices)
+        elif node["level"] == level:
+            interior_ids.append(node_id)
+
+    corner_ids = []
+    parents = []
+    for node_id in interior_ids:
+        element_corners = corners(node_id, level)
+        if len(element_corners) != 3:
+            continue
+
+        corner_ids.extend(element_corners)
+        parents.append(
+            next(
+                (
+                    parent_indices[i]
+                    for i in adjacency[node_id]
+                    if nodes[i]["vertex_type"] == VertexType.INTERIOR_USED
+                    and i in parent_indices
+                ),
+                -1,
+            )
+        )
+
+    positions = np.array(
+        [nodes[i]["position"] for i in corner_ids], dtype=float
+    ).reshape(-1, 2)
+    keys = np.round(positions / EPSILON).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+
+    # unique vertices are numbered in the order of their first occurrence
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    vertices = positions[first[order]]
+    triangles = rank[inverse.reshape(-1)].reshape(-1, 3).astype(np.int64)
+
+    first, second, third = (vertices[triangles[:, k]] for k in range(3))
+    cross = (second[:, 0] - first[:, 0]) * (third[:, 1] - first[:, 1]) - (
+        second[:, 1] - first[:, 1]
+    ) * (third[:, 0] - first[:, 0])
+    clockwise = cross < 0
+    triangles[clockwise] = triangles[clockwise][:, [0, 2, 1]]
+
+    return vertices, triangles, np.array(parents, dtype=np.int64)
@@ -1,15 +1,24 @@
 """Contains code for visualising generated graphs
 
 Should be used from a jupyter notebook as shown in example.ipynb
+
+matplotlib is imported only when something is drawn, so that importing
+this module (e.g. for `COLOR_MAPPING`) stays cheap.
 """
-from typing import Iterator
+import weakref
+from typing import TYPE_CHECKING
 
-import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
 
+from gg_project.delta import Delta
+from gg_project.mesh_arrays import VERTEX_TYPE_CODES, VERTEX_TYPES, MeshArrays
+from gg_project.spatial import BBox, GridIndex
 from gg_project.vertex_params import VertexType
 
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
 COLOR_MAPPING = {
     VertexType.START: "red",
     VertexType.START_USED: "red",
@@ -18,98 +27,591 @@ COLOR_MAPPING = {
     VertexType.INTERIOR_USED: "brown",
 }
 
+# Fast drawing labels nodes only if there are at most this many of them
+MAX_LABELED_NODES = 200
+
+# Elements drawn in a viewport smaller than this are replaced by their ancestors
+MIN_ELEMENT_PIXELS = 3
+
+# Colours and legend labels of added, removed and changed nodes and edges
+DIFF_COLORS = {"added": "green", "removed": "red", "changed": "magenta"}
+DIFF_LABELS = {"added": "dodane", "removed": "usunięte", "changed": "zmienione"}
+
+# Opacity of the unchanged part of the mesh drawn by `draw_diff`
+DIFF_FADED_ALPHA = 0.2
+
 
 def draw(
-    graph, level=None, figsize=None, titlesize=24, nodesize=500, fontsize=20
+    graph,
+    level=None,
+    figsize=None,
+    titlesize=24,
+    nodesize=500,
+    fontsize=20,
+    fast=False,
+    bbox=None,
+    max_elements=None,
+    mesh=None,
 ) -> None:
     """Draws the given graph using matplotlib
 
+    If a bounding box or a maximal number of elements is given, only elements
+    overlapping the box are drawn (with their interior and corner nodes).
+    Elements of the drawn level smaller than `MIN_ELEMENT_PIXELS` are then
+    replaced by their ancestors, which are also used as long as there are
+    more elements than allowed.
+
     :param graph: graph which will b drawn
     :param level: the level which will be drawn (all if given None)
     :param figsize: figsize of the drawn figure
     :param titlesize: size of the figure title
     :param nodesize: size of the nodes
     :param fontsize: size of the node labels
+    :param fast: whether to draw all edges and nodes of every type as single
+                 collections, suitable for large graphs; labels are drawn only
+                 if there are at most `MAX_LABELED_NODES` nodes
+    :param bbox: viewport (x_min, y_min, x_max, y_max) in the coordinates
+                 of positions of nodes (whole graph if given None)
+    :param max_elements: maximal number of drawn elements, reached by drawing
+                         ancestors of elements of the given level
+    :param mesh: arrays of the graph, reused between drawings of viewports of the
+                 same graph together with the spatial index of its elements
+                 (converted from the graph if given None)
     """
-    # pylint: disable=too-many-arguments
-    nodelist = [
-        i for i, node in graph.nodes.items() if level is None or node["level"] == level
-    ]
+    # pylint: disable=too-many-arguments, too-many-locals
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+
+    fig = plt.figure(figsize=figsize)
+    title = f"Siatka na poziomie {level}" if level is not None else "Siatka"
+    axes = fig.add_axes((0, 0, 1, 1))
+    axes.set_title(title, fontsize=titlesize)
+
+    if bbox is None and max_elements is None:
+        rows = None
+        nodelist = [
+            i
+            for i, node in graph.nodes.items()
+            if level is None or node["level"] == level
+        ]
+    else:
+        if mesh is None:
+            mesh = MeshArrays.from_graph(graph)
+        view = bbox if bbox is not None else _extent(mesh.positions)
+        pixels = fig.get_size_inches()[0] * fig.dpi
+        rows = _visible_rows(
+            mesh,
+            level,
+            view,
+            max_elements,
+            MIN_ELEMENT_PIXELS * (view[2] - view[0]) / pixels,
+        )
+        nodelist = mesh.ids[rows].tolist()
 
     subgraph = graph.subgraph(nodelist)
 
-    nodes = subgraph.nodes
-    pos = {i: _position(subgraph, node, i) for i, node in nodes.items()}
-    labels = {i: node["vertex_type"].value for i, node in nodes.items()}
-    color = [COLOR_MAPPING[nodes[i]["vertex_type"].value] for i in nodelist]
+    if fast:
+        draw_collections(
+            axes,
+            MeshArrays.from_graph(subgraph) if rows is None else mesh.select(rows),
+            nodesize,
+            fontsize,
+            level,
+        )
+    else:
+        nodes = subgraph.nodes
+        pos = node_positions(subgraph, level)
+        labels = {i: node["vertex_type"].value for i, node in nodes.items()}
+        color = [COLOR_MAPPING[nodes[i]["vertex_type"].value] for i in nodelist]
+
+        nx.draw_networkx(
+            subgraph,
+            nodelist=nodelist,
+            pos=pos,
+            labels=labels,
+            node_color=color,
+            ax=axes,
+            node_size=nodesize,
+            font_size=fontsize,
+            font_color="white",
+        )
+
+    if bbox is not None and level is not None:
+        axes.set_xlim(bbox[0], bbox[2])
+        axes.set_ylim(-(bbox[3] + 2 * level), -(bbox[1] + 2 * level))
+
+
+def draw_diff(
+    old,
+    new=None,
+    delta=None,
+    level=None,
+    figsize=None,
+    titlesize=24,
+    nodesize=100,
+    layout=None,
+) -> None:
+    """Draws differences between two graphs using matplotlib
+
+    Added, removed and changed (e.g. retyped) nodes and edges are highlighted
+    with `DIFF_COLORS`, the rest of the mesh is drawn faded and rasterised.
+    All nodes are laid out once, in a graph containing both removed and
+    added nodes.
+
+    :param old: graph before the change
+    :param new: graph after the change (computed from the delta if given None)
+    :param delta: delta turning the old graph into the new one
+                  (computed from the graphs if given None)
+    :param level: the level which will be drawn (all if given None)
+    :param figsize: figsize of the drawn figure
+    :param titlesize: size of the figure title
+    :param nodesize: size of the nodes
+    :param layout: drawing coordinates of nodes, e.g. computed by `node_positions`
+                   for a previous diff, the layout of missing nodes is computed
+    """
+    # pylint: disable=too-many-arguments, too-many-locals, import-outside-toplevel
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    if (new is None) == (delta is None):
+        raise ValueError("Exactly one of the new graph and the delta must be given")
+    if delta is None:
+        delta = Delta.between(old, new)
+
+    union = old.copy()
+    delta.apply(union)
+    union.add_nodes_from(delta.removed_nodes)
+    union.add_edges_from(delta.removed_edges)
+    if level is not None:
+        union = union.subgraph(
+            i for i, node in union.nodes.items() if node["level"] == level
+        )
+
+    mesh = MeshArrays.from_graph(union)
+    if layout is not None and all(i in layout for i in union):
+        coordinates = np.array([layout[i] for i in mesh.ids.tolist()]).reshape(-1, 2)
+    else:
+        coordinates = _layout(mesh, level)
+        if layout is not None:
+            known = [row for row, i in enumerate(mesh.ids.tolist()) if i in layout]
+            coordinates[known] = [layout[i] for i in mesh.ids[known].tolist()]
 
     fig = plt.figure(figsize=figsize)
-    title = f"Siatka na poziomie {level}" if level is not None else "Siatka"
-    axes = fig.add_axes([0, 0, 1, 1])
+    title = f"Różnice na poziomie {level}" if level is not None else "Różnice"
+    axes = fig.add_axes((0, 0, 1, 1))
     axes.set_title(title, fontsize=titlesize)
 
-    nx.draw_networkx(
-        subgraph,
-        nodelist=nodelist,
-        pos=pos,
-        labels=labels,
-        node_color=color,
-        ax=axes,
-        node_size=nodesize,
-        font_size=fontsize,
-        font_color="white",
+    sources = np.repeat(np.arange(len(mesh)), np.diff(mesh.indptr))
+    first = sources < mesh.indices
+    edges = np.stack([sources[first], mesh.indices[first]], axis=1)
+    edge_kinds = {
+        "added": np.isin(_edge_keys(mesh.ids[edges]), _edge_keys(delta.added_edges)),
+        "removed": np.isin(
+            _edge_keys(mesh.ids[edges]), _edge_keys(delta.removed_edges)
+        ),
+    }
+    node_kinds = {
+        "added": np.isin(mesh.ids, [i for i, _ in delta.added_nodes]),
+        "removed": np.isin(mesh.ids, [i for i, _ in delta.removed_nodes]),
+        "changed": np.isin(mesh.ids, [i for i, *_ in delta.changes]),
+    }
+    colors = np.array([COLOR_MAPPING[vertex_type] for vertex_type in VERTEX_TYPES])[
+        mesh.vertex_types
+    ]
+
+    unchanged = ~np.logical_or.reduce(list(edge_kinds.values()))
+    axes.add_collection(
+        LineCollection(
+            _segments(coordinates, *edges[unchanged].T),
+            colors="black",
+            linewidths=1.0,
+            alpha=DIFF_FADED_ALPHA,
+            zorder=1,
+            rasterized=True,
+        )
     )
+    unchanged = ~np.logical_or.reduce(list(node_kinds.values()))
+    axes.scatter(
+        coordinates[unchanged, 0],
+        coordinates[unchanged, 1],
+        s=nodesize,
+        c=colors[unchanged],
+        alpha=DIFF_FADED_ALPHA,
+        zorder=2,
+        rasterized=True,
+    )
+
+    for kind, selected in edge_kinds.items():
+        axes.add_collection(
+            LineCollection(
+                _segments(coordinates, *edges[selected].T),
+                colors=DIFF_COLORS[kind],
+                linewidths=2.0,
+                linestyles="dashed" if kind == "removed" else "solid",
+                zorder=3,
+            )
+        )
+    for kind, selected in node_kinds.items():
+        axes.scatter(
+            coordinates[selected, 0],
+            coordinates[selected, 1],
+            s=nodesize,
+            c=colors[selected],
+            edgecolors=DIFF_COLORS[kind],
+            linewidths=3.0,
+            zorder=4,
+            label=DIFF_LABELS[kind],
+        )
+
+    axes.legend()
+    axes.margins(0.1)
+    axes.autoscale_view()
+    axes.tick_params(
+        axis="both",
+        which="both",
+        bottom=False,
+        left=False,
+        labelbottom=False,
+        labelleft=False,
+    )
+
+
+def _edge_keys(edges) -> np.ndarray:
+    """Returns sorted pairs of ids as a structured array comparable by `np.isin`"""
+    edges = np.sort(np.array(edges, dtype=MeshArrays.ID_DTYPE).reshape(-1, 2), axis=1)
+    return edges.view([("first", edges.dtype), ("second", edges.dtype)]).ravel()
 
 
-def _position(graph: nx.Graph, node: dict, i: int) -> tuple[float, float]:
-    """Calculate the position where a given node should be drawn
+def _extent(positions: np.ndarray) -> tuple[float, float, float, float]:
+    """Returns the bounding box of the given positions, ignoring missing ones"""
+    if np.isnan(positions[:, 0]).all():
+        return 0.0, 0.0, 1.0, 1.0
 
-    :param graph: graph where the given node is present
-    :param node: node whose position will be calculated
-    :param i: index of this node in the given graph
+    x_min, y_min = np.nanmin(positions, axis=0).tolist()
+    x_max, y_max = np.nanmax(positions, axis=0).tolist()
+    return x_min, y_min, x_max, y_max
 
-    :returns: the drawing coordinates for the given node
+
+def _elements(mesh: MeshArrays) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Finds elements, their corners and their parents
+
+    :param mesh: arrays of the graph
+
+    :returns: rows of interior nodes of elements (T,), rows of exterior nodes
+              at their corners (T, 3) and indices of the parent element of
+              every element, -1 if it has none (T,)
     """
-    # pylint: disable=invalid-name
-    level = node["level"]
-    level_nodes = [i for i, node in graph.nodes.items() if node["level"] == level]
-    level_graph = graph.subgraph(level_nodes)
-
-    if node["position"] is not None:
-        (x, y) = node["position"]
-        if _nodes_at_position(level_graph, (x, y)) > 1:
-            [x, y] = [x, y] + np.sum(
-                (_neighbor_positions(level_graph, i) - (x, y)) / 15, axis=0
-            )
+    interior = np.isin(
+        mesh.vertex_types,
+        [
+            VERTEX_TYPE_CODES[VertexType.INTERIOR],
+            VERTEX_TYPE_CODES[VertexType.INTERIOR_USED],
+        ],
+    )
+    sources = np.repeat(np.arange(len(mesh)), np.diff(mesh.indptr))
+    targets = mesh.indices
+    same_level = mesh.levels[sources] == mesh.levels[targets]
 
-    else:
-        [x, y] = np.mean(_neighbor_positions(level_graph, i), axis=0)
+    corner_edges = (
+        interior[sources]
+        & same_level
+        & (mesh.vertex_types[targets] == VERTEX_TYPE_CODES[VertexType.EXTERIOR])
+    )
+    is_element = interior & (
+        np.bincount(sources[corner_edges], minlength=len(mesh)) == 3
+    )
+    element_rows = np.flatnonzero(is_element)
+    # edges are sorted by their source, so corners of an element are consecutive
+    corners = targets[corner_edges & is_element[sources]].reshape(-1, 3)
 
-    return (x, -(y + 2 * level))
+    element_indices = np.full(len(mesh), -1, dtype=np.int64)
+    element_indices[element_rows] = np.arange(len(element_rows))
+    parent_edges = (
+        is_element[sources]
+        & is_element[targets]
+        & (mesh.levels[targets] == mesh.levels[sources] - 1)
+        & (mesh.vertex_types[targets] == VERTEX_TYPE_CODES[VertexType.INTERIOR_USED])
+    )
+    parents = np.full(len(element_rows), -1, dtype=np.int64)
+    parents[element_indices[sources[parent_edges]]] = element_indices[
+        targets[parent_edges]
+    ]
 
+    return element_rows, corners, parents
 
-def _nodes_at_position(graph: nx.Graph, pos: tuple[float, float]) -> int:
-    """Returns the number of nodes present at the given position"""
-    count = 0
 
-    for _, node in graph.nodes.items():
-        count += 1 if node["position"] == pos else 0
+class _ElementIndex:
+    """Elements of a mesh with a spatial index of every level, built once per mesh
 
-    return count
+    Elements overlapping a viewport have their centres at most half of their
+    extent away from it. Elements on one level have similar extents, so every
+    level is indexed (and queried with its own margin) separately and large
+    elements of coarse levels do not widen queries for fine ones.
 
+    :param mesh: arrays of the graph
+    """
 
-def _neighbor_positions(graph: nx.Graph, i: int) -> np.ndarray:
-    """Returns positions of neighbors of the given node"""
-    return np.array(
-        [
-            neighbor["position"]
-            for neighbor in _neighbors(graph, i)
-            if neighbor["position"] is not None
+    def __init__(self, mesh: MeshArrays):
+        self.element_rows, self.corners, self.parents = _elements(mesh)
+        corner_positions = mesh.positions[self.corners]
+        self.lower = corner_positions.min(axis=1)
+        self.upper = corner_positions.max(axis=1)
+        self.sizes = (self.upper - self.lower).max(axis=1, initial=0.0)
+        self.levels = mesh.levels[self.element_rows]
+
+        centres = (self.lower + self.upper) / 2
+        self._levels: dict[int, tuple[np.ndarray, np.ndarray, GridIndex]] = {}
+        for element_level in np.unique(self.levels).tolist():
+            candidates = np.flatnonzero(self.levels == element_level)
+            margin = ((self.upper - self.lower)[candidates] / 2).max(
+                axis=0, initial=0.0
+            )
+            self._levels[element_level] = (
+                candidates,
+                margin,
+                GridIndex(centres[candidates]),
+            )
+
+        # nodes which are not parts of elements, such as the start node
+        others = np.ones(len(mesh), dtype=bool)
+        others[self.element_rows] = False
+        others[self.corners.ravel()] = False
+        self.other_rows = np.flatnonzero(others)
+        self.other_positions = mesh.positions[self.other_rows]
+
+    def query(self, level: int | None, bbox: BBox) -> np.ndarray:
+        """Returns sorted indices of elements of the level overlapping the box"""
+        found = [np.zeros(0, dtype=np.int64)]
+        for element_level in self._levels if level is None else [level]:
+            if element_level not in self._levels:
+                continue
+            candidates, (margin_x, margin_y), index = self._levels[element_level]
+            found.append(
+                candidates[
+                    index.query(
+                        (
+                            bbox[0] - margin_x,
+                            bbox[1] - margin_y,
+                            bbox[2] + margin_x,
+                            bbox[3] + margin_y,
+                        )
+                    )
+                ]
+            )
+        selected = np.sort(np.concatenate(found))
+        return selected[
+            (self.lower[selected] <= bbox[2:]).all(axis=1)
+            & (self.upper[selected] >= bbox[:2]).all(axis=1)
         ]
+
+
+# Indexes of meshes drawn with a viewport, dropped together with their meshes
+_element_indexes: "weakref.WeakKeyDictionary[MeshArrays, _ElementIndex]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _element_index(mesh: MeshArrays) -> _ElementIndex:
+    index = _element_indexes.get(mesh)
+    if index is None:
+        index = _element_indexes[mesh] = _ElementIndex(mesh)
+    return index
+
+
+def _visible_rows(
+    mesh: MeshArrays,
+    level: int | None,
+    bbox: BBox,
+    max_elements: int | None,
+    min_size: float,
+) -> np.ndarray:
+    """Chooses nodes of elements which should be drawn in the viewport
+
+    Elements of the mesh and their spatial index are built on the first call
+    for the mesh and reused by later ones, e.g. while panning and zooming.
+
+    :param mesh: arrays of the graph
+    :param level: level of drawn elements (all if given None, then elements
+                  are not replaced by their ancestors)
+    :param bbox: viewport, elements which do not overlap it are skipped
+    :param max_elements: maximal number of drawn elements (unbounded if given None)
+    :param min_size: elements smaller than this are replaced by their ancestors
+
+    :returns: sorted rows of the chosen nodes
+    """
+    index = _element_index(mesh)
+    element_rows, corners, parents = index.element_rows, index.corners, index.parents
+    sizes, levels = index.sizes, index.levels
+    selected = index.query(level, bbox)
+
+    if level is not None:
+        while True:
+            collapsed = (sizes[selected] < min_size) & (parents[selected] >= 0)
+            if not collapsed.any():
+                break
+            selected = np.union1d(selected[~collapsed], parents[selected[collapsed]])
+
+        while max_elements is not None and len(selected) > max_elements:
+            collapsed = (levels[selected] == levels[selected].max()) & (
+                parents[selected] >= 0
+            )
+            if not collapsed.any():
+                break
+            selected = np.union1d(selected[~collapsed], parents[selected[collapsed]])
+
+    rows = [element_rows[selected], corners[selected].ravel()]
+    if level is None:
+        positions = index.other_positions
+        rows.append(
+            index.other_rows[
+                (positions[:, 0] >= bbox[0])
+                & (positions[:, 1] >= bbox[1])
+                & (positions[:, 0] <= bbox[2])
+                & (positions[:, 1] <= bbox[3])
+            ]
+        )
+
+    return np.unique(np.concatenate(rows))
+
+
+def draw_collections(
+    axes: "Axes",
+    mesh: MeshArrays,
+    nodesize: float,
+    fontsize: float,
+    level: int | None = None,
+) -> None:
+    """Draws edges as a single line collection and nodes as a scatter per type
+
+    :param axes: axes on which the mesh will be drawn
+    :param mesh: arrays of the drawn graph
+    :param nodesize: size of the nodes
+    :param fontsize: size of the node labels
+    :param level: level on which all nodes are drawn (each on its own if given None)
+    """
+    # pylint: disable=import-outside-toplevel
+    from matplotlib.collections import LineCollection
+
+    coordinates = _layout(mesh, level)
+
+    sources = np.repeat(np.arange(len(mesh)), np.diff(mesh.indptr))
+    first = sources < mesh.indices
+    axes.add_collection(
+        LineCollection(
+            _segments(coordinates, sources[first], mesh.indices[first]),
+            colors="black",
+            linewidths=1.0,
+            zorder=1,
+        )
+    )
+
+    for code, vertex_type in enumerate(VERTEX_TYPES):
+        selected = mesh.vertex_types == code
+        if selected.any():
+            axes.scatter(
+                coordinates[selected, 0],
+                coordinates[selected, 1],
+                s=nodesize,
+                c=COLOR_MAPPING[vertex_type],
+                zorder=2,
+            )
+
+    if len(mesh) <= MAX_LABELED_NODES:
+        for (x, y), code in zip(coordinates.tolist(), mesh.vertex_types.tolist()):
+            axes.text(
+                x,
+                y,
+                VERTEX_TYPES[code].value,
+                fontsize=fontsize,
+                color="white",
+                horizontalalignment="center",
+                verticalalignment="center",
+                zorder=3,
+            )
+
+    axes.margins(0.1)
+    axes.autoscale_view()
+    axes.tick_params(
+        axis="both",
+        which="both",
+        bottom=False,
+        left=False,
+        labelbottom=False,
+        labelleft=False,
     )
 
 
-def _neighbors(graph: nx.Graph, i: int) -> Iterator[dict]:
-    """Returns an iterator over neighbors of the given node"""
-    for j in nx.neighbors(graph, i):
-        yield graph.nodes[j]
+def _segments(
+    coordinates: np.ndarray, sources: np.ndarray, targets: np.ndarray
+) -> list[np.ndarray]:
+    """Returns segments between drawn nodes in rows of the arrays, one (2, 2) array each
+
+    `LineCollection` is annotated to take a sequence of segments, not a stacked array.
+    """
+    return list(np.stack([coordinates[sources], coordinates[targets]], axis=1))
+
+
+def node_positions(
+    graph: nx.Graph, level: int | None = None
+) -> dict[int, tuple[float, float]]:
+    """Calculate positions where nodes of the given graph should be drawn
+
+    :param graph: graph whose nodes will be drawn
+    :param level: level on which all nodes are drawn (each on its own if given None)
+
+    :returns: the drawing coordinates for every node of the graph
+    """
+    mesh = MeshArrays.from_graph(graph)
+    return dict(zip(mesh.ids.tolist(), map(tuple, _layout(mesh, level).tolist())))
+
+
+def _layout(mesh: MeshArrays, level: int | None = None) -> np.ndarray:
+    """Calculate positions where nodes should be drawn
+
+    Levels are drawn one below another. Nodes at the same position as another
+    node on their level are moved towards their neighbours on this level, nodes
+    without a position are drawn in the middle of these neighbours.
+
+    :param mesh: arrays of the graph whose nodes will be drawn
+    :param level: level on which all nodes are drawn (each on its own if given None)
+
+    :returns: the drawing coordinates of nodes in rows of the arrays (N, 2)
+    """
+    positions = mesh.positions
+    missing = np.isnan(positions[:, 0])
+
+    # edges between nodes on the same level, leading to nodes with a position
+    sources = np.repeat(np.arange(len(mesh)), np.diff(mesh.indptr))
+    targets = mesh.indices
+    same_level = (mesh.levels[sources] == mesh.levels[targets]) & ~missing[targets]
+    sources, targets = sources[same_level], targets[same_level]
+
+    # nodes with equal levels and positions are adjacent after sorting
+    keyed = np.flatnonzero(~missing)
+    keys = np.column_stack([mesh.levels[keyed], positions[keyed]])
+    order = np.lexsort(keys.T[::-1])
+    sorted_keys = keys[order]
+    starts = np.ones(len(order), dtype=bool)
+    starts[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+    groups = np.cumsum(starts) - 1
+    overlapping = np.zeros(len(mesh), dtype=bool)
+    overlapping[keyed[order]] = np.bincount(groups)[groups] > 1
+
+    edge_displacements = (positions[targets] - positions[sources]) / 15
+    displacements = np.zeros_like(positions)
+    neighbor_sums = np.zeros_like(positions)
+    for axis in range(2):
+        neighbor_sums[:, axis] = np.bincount(
+            sources, weights=positions[targets, axis], minlength=len(mesh)
+        )
+        displacements[:, axis] = np.bincount(
+            sources, weights=edge_displacements[:, axis], minlength=len(mesh)
+        )
+    neighbor_counts = np.bincount(sources, minlength=len(mesh))
+
+    result = positions.copy()
+    result[overlapping] += displacements[overlapping]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result[missing] = neighbor_sums[missing] / neighbor_counts[missing, None]
+    result[:, 1] = -(result[:, 1] + 2 * (mesh.levels if level is None else level))
+
+    return result
@@ -578,3 +578,12 @@ def test_should_correctly_transform_bigger_graph(
     subgraph = production3.find_isomorphic_to_left_side(bigger_graph_for_p3_left_side)
     production_graph = production3.apply(bigger_graph_for_p3_left_side, subgraph)
     assert _are_graphs_isomorphic(bigger_graph_for_p3_right_side, production_graph)
+
+
+def test_should_find_match_at_each_of_its_nodes(bigger_graph_for_p3_left_side, production3):
+    graph = bigger_graph_for_p3_left_side
+    expected = set(production3.find_isomorphic_to_left_side(graph).nodes)
+
+    for node_id in graph.nodes:
+        found = [set(subgraph.nodes) for subgraph in production3.find_all_isomorphic_at(graph, node_id)]
+        assert found == ([expected] if node_id in expected else [])
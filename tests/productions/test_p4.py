@@ -162,3 +162,11 @@ def test_should_not_find_isomorphic_when_node_position_changed(p4_left_side):
     p4_left_side.add_nodes_from([(1, dataclasses.asdict(dataclasses.replace(node_5, position=(0.3, 0.5))))])
     subgraph = Production4.find_isomorphic_to_left_side(p4_left_side)
     assert subgraph is None
+
+
+def test_should_find_match_at_each_of_its_nodes(p4_left_side):
+    expected = set(Production4.find_isomorphic_to_left_side(p4_left_side).nodes)
+
+    for node_id in p4_left_side.nodes:
+        found = [set(subgraph.nodes) for subgraph in Production4.find_all_isomorphic_at(p4_left_side, node_id)]
+        assert found == ([expected] if node_id in expected else [])
@@ -153,3 +153,12 @@ def test_should_not_transform_wrong_position(
     ])
     subgraph = production5.find_isomorphic_to_left_side(correct_graph_for_left_side_p5)
     assert subgraph is None
+
+
+def test_should_find_match_at_each_of_its_nodes(correct_graph_for_left_side_p5, production5):
+    graph = correct_graph_for_left_side_p5
+    expected = set(production5.find_isomorphic_to_left_side(graph).nodes)
+
+    for node_id in graph.nodes:
+        found = [set(subgraph.nodes) for subgraph in production5.find_all_isomorphic_at(graph, node_id)]
+        assert found == ([expected] if node_id in expected else [])
@@ -0,0 +1,119 @@
+import pytest
+
+from benchmarks.meshes import grid_graph
+from gg_project.derivation import PRODUCTIONS, derive
+from gg_project.productions.p2 import Production2
+from gg_project.productions.p3 import Production3
+from gg_project.productions.p4 import Production4
+from gg_project.productions.p5 import Production5
+from gg_project.productions.registry import ProductionRegistry
+from gg_project.productions.utils import with_halo
+from gg_project.vertex_params import VertexType
+from tests.fixtures import (
+    graph_after_first_production,
+    graph_before_seventh_production,
+    production1,
+    production7,
+    start_graph,
+)
+
+
+def test_productions_are_dispatched_by_anchor_type():
+    registry = ProductionRegistry(PRODUCTIONS)
+
+    assert registry.for_anchor(VertexType.INTERIOR) == (
+        Production2,
+        Production3,
+        Production4,
+        Production5,
+    )
+    assert registry.for_anchor(VertexType.EXTERIOR) == ()
+    assert registry.radii[Production2] == 1
+    assert registry.radius == 4
+
+
+def test_production_without_anchor_is_rejected():
+    class Unanchored(Production2):
+        anchor_type = None
+
+    with pytest.raises(ValueError):
+        ProductionRegistry([Unanchored])
+
+
+def test_only_anchors_within_radius_are_woken(graph_after_first_production):
+    # given
+    graph = graph_after_first_production
+    registry = ProductionRegistry(PRODUCTIONS)
+    changed = next(i for i, node in graph.nodes.items() if node["level"] == 0)
+
+    # when
+    woken = list(registry.woken(graph, [changed]))
+
+    # then
+    assert woken
+    for production, node_id in woken:
+        assert graph.nodes[node_id]["vertex_type"] == production.anchor_type
+        assert node_id in with_halo(graph, {changed}, production.radius)
+    assert Production2 in {production for production, _ in woken}
+
+
+def test_search_within_radius_finds_the_same_match(
+    graph_before_seventh_production, production7
+):
+    # given
+    graph = graph_before_seventh_production
+    expected = set(production7.find_isomorphic_to_left_side(graph).nodes)
+    anchor = next(
+        i for i in expected if graph.nodes[i]["vertex_type"] == production7.anchor_type
+    )
+    other = next(
+        i for i in expected if graph.nodes[i]["vertex_type"] != production7.anchor_type
+    )
+
+    # then
+    assert set(production7.find_isomorphic_at(graph, anchor).nodes) == expected
+    assert set(production7.find_isomorphic_at(graph, other).nodes) == expected
+
+
+def test_search_anchored_at_node_finds_all_matches_containing_it(
+    graph_before_seventh_production, production7
+):
+    # given
+    graph = graph_before_seventh_production
+    matches = [
+        frozenset(subgraph)
+        for subgraph in production7.find_all_isomorphic_to_left_side(graph)
+    ]
+
+    for node_id in graph:
+        # when
+        found = [
+            frozenset(subgraph)
+            for subgraph in production7.find_all_isomorphic_at(graph, node_id)
+        ]
+
+        # then
+        assert sorted(found, key=sorted) == sorted(
+            (match for match in matches if node_id in match), key=sorted
+        )
+
+
+def test_search_around_interior_finds_all_matches_containing_node():
+    # given
+    graph = derive(grid_graph(3), [Production2], 5)
+    matches = [
+        frozenset(subgraph)
+        for subgraph in Production2.find_all_isomorphic_to_left_side(graph)
+    ]
+
+    for node_id in graph:
+        # when
+        found = [
+            frozenset(subgraph)
+            for subgraph in Production2.find_all_isomorphic_at(graph, node_id)
+        ]
+
+        # then
+        assert sorted(found, key=sorted) == sorted(
+            (match for match in matches if node_id in match), key=sorted
+        )
@@ -0,0 +1,98 @@
+import time
+
+from gg_project.productions import CancellationToken
+from tests.fixtures import (
+    graph_before_seventh_production,
+    production1,
+    production6,
+    start_graph,
+)
+
+
+def test_search_finds_subgraph_before_deadline(start_graph, production1):
+    # when
+    result = production1.search(start_graph, deadline=time.monotonic() + 60)
+
+    # then
+    assert not result.timed_out
+    assert result.subgraph is not None
+    assert list(result.subgraph.nodes) == [0]
+    assert result.candidates_examined == 1
+
+
+def test_search_times_out_after_deadline(graph_before_seventh_production, production6):
+    # when
+    result = production6.search(
+        graph_before_seventh_production, deadline=time.monotonic() - 1
+    )
+
+    # then
+    assert result.timed_out
+    assert result.subgraph is None
+    assert result.candidates_examined == 0
+
+
+def test_search_stops_when_cancelled(graph_before_seventh_production, production6):
+    # given
+    token = CancellationToken()
+    token.cancel()
+
+    # when
+    result = production6.search(graph_before_seventh_production, token=token)
+
+    # then
+    assert result.timed_out
+    assert result.subgraph is None
+    assert result.candidates_examined == 0
+
+
+class _CancelledAfterChecks(CancellationToken):
+    """Token which cancels itself once it was checked given number of times"""
+
+    def __init__(self, checks: int):
+        super().__init__()
+        self._checks = checks
+
+    @property
+    def cancelled(self) -> bool:
+        self._checks -= 1
+        if self._checks < 0:
+            self.cancel()
+        return super().cancelled
+
+
+def test_search_cancelled_during_search_reports_examined_candidates(
+    graph_before_seventh_production, production6
+):
+    # given
+    token = _CancelledAfterChecks(5)
+
+    # when
+    result = production6.search(graph_before_seventh_production, token=token)
+
+    # then
+    assert result.timed_out
+    assert result.subgraph is None
+    assert result.candidates_examined == 5
+
+
+def test_search_times_out_during_search(
+    monkeypatch, graph_before_seventh_production, production6
+):
+    # given
+    now = 0.0
+
+    def clock() -> float:
+        nonlocal now
+        now += 1.0
+        return now
+
+    monkeypatch.setattr(time, "monotonic", clock)
+
+    # when
+    result = production6.search(graph_before_seventh_production, deadline=4.5)
+
+    # then
+    assert result.timed_out
+    assert result.subgraph is None
+    assert result.candidates_examined == 4
@@ -0,0 +1,111 @@
+import networkx as nx
+import pytest
+from networkx.algorithms import isomorphism
+
+from gg_project.productions.utils import (
+    IdBlockAllocator,
+    find_isomorphic_node_sets,
+    graph_id_sequence,
+    reserve_id_block,
+    symmetry_conditions,
+)
+from tests.fixtures import (
+    start_graph,
+    graph_after_first_production,
+    production1,
+    production2,
+)
+
+
+def test_generates_ids_after_the_largest_one(graph_after_first_production):
+    next_id = graph_id_sequence(graph_after_first_production)
+
+    assert [next_id(), next_id()] == [7, 8]
+
+
+def test_allocator_hands_out_disjoint_blocks(graph_after_first_production):
+    allocator = IdBlockAllocator(graph_after_first_production, block_size=100)
+
+    assert allocator.block(0) == (7, 107)
+    assert allocator.block(2) == (207, 307)
+
+
+def test_allocator_starts_at_zero_for_empty_graph():
+    allocator = IdBlockAllocator(nx.Graph(), block_size=100)
+
+    assert allocator.block(1) == (100, 200)
+
+
+def test_productions_use_reserved_block(graph_after_first_production, production2):
+    # given
+    graph = reserve_id_block(graph_after_first_production, (1000, 1100))
+
+    # when
+    subgraph = production2.find_isomorphic_to_left_side(graph)
+    graph = production2.apply(graph, subgraph)
+    subgraph = production2.find_isomorphic_to_left_side(graph)
+    graph = production2.apply(graph, subgraph)
+
+    # then
+    assert sorted(graph)[7:] == list(range(1000, 1012))
+
+
+def test_fails_when_reserved_block_is_used_up(graph_after_first_production):
+    next_id = graph_id_sequence(
+        reserve_id_block(graph_after_first_production, (10, 11))
+    )
+
+    assert next_id() == 10
+    with pytest.raises(ValueError):
+        next_id()
+
+
+def test_does_not_reuse_ids_of_removed_nodes(graph_after_first_production):
+    # given
+    graph = reserve_id_block(graph_after_first_production, (1000, 1100))
+    new_id = graph_id_sequence(graph)()
+    graph.add_node(new_id)
+
+    # when
+    graph.remove_node(new_id)
+
+    # then
+    assert graph_id_sequence(graph)() == 1001
+
+
+def test_symmetry_conditions_keep_one_automorphism():
+    # given
+    left_side = nx.cycle_graph(4)
+    nx.set_node_attributes(left_side, "E", "vertex_type")
+
+    # when
+    conditions = symmetry_conditions(left_side)
+
+    # then
+    automorphisms = isomorphism.GraphMatcher(left_side, left_side).isomorphisms_iter()
+    assert [
+        mapping
+        for mapping in automorphisms
+        if all(mapping[i] < mapping[j] for i, j in conditions)
+    ] == [{0: 0, 1: 1, 2: 2, 3: 3}]
+
+
+def test_anchored_search_finds_sets_containing_the_anchor():
+    # given
+    graph = nx.convert_node_labels_to_integers(nx.grid_2d_graph(3, 3))
+    nx.set_node_attributes(graph, "E", "vertex_type")
+    left_side = nx.cycle_graph(4)
+    nx.set_node_attributes(left_side, "E", "vertex_type")
+
+    def node_match(node1, node2):
+        return node1 == node2
+
+    # when
+    everywhere = list(find_isomorphic_node_sets(graph, left_side, node_match))
+    at_centre = list(find_isomorphic_node_sets(graph, left_side, node_match, 4))
+    at_corner = list(find_isomorphic_node_sets(graph, left_side, node_match, 0))
+
+    # then
+    assert len(everywhere) == 4
+    assert sorted(map(sorted, at_centre)) == sorted(map(sorted, everywhere))
+    assert at_corner == [frozenset({0, 1, 3, 4})]
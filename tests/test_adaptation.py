@@ -0,0 +1,72 @@
+from benchmarks.meshes import grid_graph
+from gg_project.adaptation import candidates, refine_adaptively
+from gg_project.productions.groups import CLOSING_PRODUCTIONS
+from gg_project.vertex_params import VertexType
+from tests.fixtures import start_graph, graph_after_first_production, production1
+
+
+def _interior_levels(graph):
+    return sorted(
+        node["level"]
+        for node in graph.nodes.values()
+        if node["vertex_type"] == VertexType.INTERIOR
+    )
+
+
+def test_collects_corners_of_candidate_elements(graph_after_first_production):
+    node_ids, corners, levels = candidates(graph_after_first_production)
+
+    assert node_ids == [5, 6]
+    assert corners.shape == (2, 3, 2)
+    assert levels.tolist() == [1, 1]
+    assert sorted(map(tuple, corners[1].tolist())) == [
+        (0.0, 1.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+    ]
+
+
+def test_calls_indicator_once_per_iteration(graph_after_first_production):
+    # given
+    calls = []
+
+    def indicator(centroids, corners, levels):
+        calls.append(len(levels))
+        return levels < 2
+
+    # when
+    graph = refine_adaptively(graph_after_first_production, indicator)
+
+    # then
+    assert _interior_levels(graph) == [2, 2, 2, 2]
+    assert calls == [2, 4]
+
+
+def test_breaks_only_marked_elements(graph_after_first_production):
+    # given
+    def indicator(centroids, corners, levels):
+        return (centroids[:, 0] < 0.5) & (levels < 3)
+
+    # when
+    graph = refine_adaptively(graph_after_first_production, indicator)
+
+    # then
+    _, corners, levels = candidates(graph)
+    assert levels.tolist() == [1, 2, 3, 3]
+    assert corners[levels == 2].mean(axis=1).tolist() == [[0.5, 1 / 6]]
+
+
+def test_closes_refined_grid_mesh():
+    # given
+    def indicator(centroids, corners, levels):
+        return (centroids[:, 0] < 0.4) & (levels < 3)
+
+    # when
+    graph = refine_adaptively(grid_graph(3), indicator)
+
+    # then
+    assert all(
+        production.find_isomorphic_to_left_side(graph) is None
+        for production in CLOSING_PRODUCTIONS
+    )
+    assert 3 in candidates(graph)[2]
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+
+from gg_project.animation import DerivationAnimator, animate
+from gg_project.derivation import PRODUCTIONS
+from gg_project.vis import node_positions
+from tests.fixtures import (
+    graph_after_first_production,
+    graph_before_seventh_production,
+    production1,
+    production7,
+    start_graph,
+)
+
+
+def _deltas(graph, count):
+    graph = graph.copy()
+    for _ in range(count):
+        for production in PRODUCTIONS:
+            subgraph = production.find_isomorphic_to_left_side(graph)
+            if subgraph is not None:
+                delta = production.apply_delta(graph, subgraph)
+                delta.apply(graph)
+                yield delta
+                break
+
+
+def test_animation_has_frame_for_every_step(start_graph, tmp_path):
+    # given
+    path = tmp_path / "derivation.gif"
+    deltas = list(_deltas(start_graph, 12))
+
+    # when
+    animate(start_graph, deltas, path, figsize=(2, 2), dpi=50)
+
+    # then
+    with Image.open(path) as image:
+        assert image.n_frames == len(deltas) + 1
+        assert image.size == (100, 100)
+
+
+@pytest.mark.parametrize("level", [None, 1, 2])
+def test_positions_follow_the_derivation(start_graph, tmp_path, level):
+    # given
+    graph = start_graph.copy()
+    animator = DerivationAnimator(graph, tmp_path / "derivation.gif", level=level)
+
+    # when
+    for delta in _deltas(start_graph, 6):
+        animator.update(delta)
+        delta.apply(graph)
+    animator.close()
+
+    # then
+    if level is not None:
+        graph = graph.subgraph(
+            i for i, node in graph.nodes.items() if node["level"] == level
+        )
+    assert animator.positions() == pytest.approx(node_positions(graph, level))
+
+
+def test_unsupported_format_is_rejected(start_graph, tmp_path):
+    with pytest.raises(ValueError):
+        DerivationAnimator(start_graph, tmp_path / "derivation.avi")
+
+
+def test_failure_of_gif_writer_is_raised(start_graph, tmp_path):
+    with pytest.raises(OSError):
+        DerivationAnimator(start_graph, tmp_path / "missing" / "derivation.gif")
+
+
+def test_frames_are_written_as_they_are_rendered(start_graph, tmp_path):
+    # given
+    path = tmp_path / "derivation.gif"
+    animator = DerivationAnimator(start_graph, path, figsize=(2, 2), dpi=50)
+    sizes = [path.stat().st_size]
+
+    # when
+    for delta in _deltas(start_graph, 3):
+        animator.update(delta)
+        sizes.append(path.stat().st_size)
+    animator.close()
+
+    # then
+    assert 0 < sizes[0] < sizes[1] < sizes[2] < sizes[3]
+
+
+def test_last_frame_is_the_same_as_drawn_from_scratch(
+    graph_after_first_production, tmp_path
+):
+    # given
+    graph = graph_after_first_production
+    deltas = list(_deltas(graph, 2))
+    kwargs = {"level": 1, "figsize": (2, 2), "dpi": 50}
+
+    # when
+    final = animate(graph, deltas, tmp_path / "derivation.gif", **kwargs)
+    with DerivationAnimator(final, tmp_path / "final.gif", **kwargs):
+        pass
+
+    # then
+    with Image.open(tmp_path / "derivation.gif") as image:
+        frames = [
+            np.asarray(frame.convert("RGB")) for frame in ImageSequence.Iterator(image)
+        ]
+    with Image.open(tmp_path / "final.gif") as image:
+        expected = np.asarray(image.convert("RGB"))
+    assert not np.array_equal(frames[0], frames[-1])
+    assert np.array_equal(frames[-1], expected)
+
+
+def test_merged_nodes_are_removed_from_the_drawing(
+    graph_before_seventh_production, production7, tmp_path
+):
+    # given
+    graph = graph_before_seventh_production
+    subgraph = production7.find_isomorphic_to_left_side(graph)
+    delta = production7.apply_delta(graph, subgraph)
+    animator = DerivationAnimator(graph, tmp_path / "derivation.gif")
+
+    # when
+    animator.update(delta)
+    animator.close()
+
+    # then
+    new_graph = production7.apply(graph, subgraph)
+    assert animator.positions() == pytest.approx(node_positions(new_graph))
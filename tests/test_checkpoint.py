@@ -0,0 +1,170 @@
+import os
+
+import pytest
+
+from benchmarks.meshes import grid_graph
+from gg_project import checkpoint
+from gg_project.checkpoint import SNAPSHOT_NAME, Checkpointer, resume
+from gg_project.derivation import PRODUCTIONS, derive
+from gg_project.productions.p2 import Production2
+from gg_project.productions.utils import reserve_id_block
+from tests.fixtures import start_graph
+
+ORDER = tuple(reversed(PRODUCTIONS))
+
+
+def _assert_graphs_equal(graph, expected):
+    assert list(graph.nodes.items()) == list(expected.nodes.items())
+    assert {frozenset(edge) for edge in graph.edges} == {
+        frozenset(edge) for edge in expected.edges
+    }
+
+
+@pytest.mark.parametrize("max_steps", [0, 3, 4, 10])
+def test_resume_restores_derived_graph(tmp_path, start_graph, max_steps):
+    # given
+    with Checkpointer(tmp_path, start_graph, interval=4) as checkpointer:
+        derived = derive(start_graph, ORDER, max_steps, checkpointer=checkpointer)
+
+    # when
+    graph, steps = resume(tmp_path)
+
+    # then
+    assert steps == max_steps
+    _assert_graphs_equal(graph, derived)
+
+
+def test_resumed_derivation_equals_uninterrupted_one(tmp_path, start_graph):
+    # given
+    start_graph = reserve_id_block(start_graph, (0, 1000))
+    expected = derive(start_graph, ORDER, 12)
+    with Checkpointer(tmp_path, start_graph, interval=5) as checkpointer:
+        interrupted = derive(start_graph, ORDER, 7, checkpointer=checkpointer)
+
+    # when
+    graph, steps = resume(tmp_path)
+    with Checkpointer(tmp_path, graph, interval=5, steps=steps) as checkpointer:
+        derive(graph, ORDER, 12 - steps, checkpointer=checkpointer)
+    resumed, resumed_steps = resume(tmp_path)
+
+    # then
+    assert graph.graph == interrupted.graph
+    assert resumed_steps == 12
+    _assert_graphs_equal(resumed, expected)
+
+
+def test_resumed_derivation_of_grid_mesh_equals_uninterrupted_one(tmp_path):
+    # given
+    start_graph = grid_graph(3)
+    expected = derive(start_graph, [Production2], 9)
+    with Checkpointer(tmp_path, start_graph, interval=2) as checkpointer:
+        derive(start_graph, [Production2], 5, checkpointer=checkpointer)
+
+    # when
+    graph, steps = resume(tmp_path)
+    with Checkpointer(tmp_path, graph, interval=2, steps=steps) as checkpointer:
+        derive(graph, [Production2], 9 - steps, checkpointer=checkpointer)
+    resumed, resumed_steps = resume(tmp_path)
+
+    # then
+    assert resumed_steps == 9
+    _assert_graphs_equal(resumed, expected)
+
+
+def test_resumed_checkpointer_removes_stale_tail(tmp_path, start_graph):
+    # given
+    with Checkpointer(tmp_path, start_graph, interval=2) as checkpointer:
+        derive(start_graph, ORDER, 3, checkpointer=checkpointer)
+    graph, steps = resume(tmp_path)
+
+    # when
+    with Checkpointer(tmp_path, graph, interval=2, steps=steps) as checkpointer:
+        derive(graph, ORDER, 2, checkpointer=checkpointer)
+
+    # then
+    assert [path.name for path in tmp_path.glob("tail-*.log")] == ["tail-5.log"]
+
+
+def test_partially_written_step_is_ignored(tmp_path, start_graph):
+    # given
+    with Checkpointer(tmp_path, start_graph, interval=100) as checkpointer:
+        expected = derive(start_graph, ORDER, 2, checkpointer=checkpointer)
+        derive(expected, ORDER, 1, checkpointer=checkpointer)
+    (tail_path,) = tmp_path.glob("tail-*.log")
+    os.truncate(tail_path, tail_path.stat().st_size - 1)
+
+    # when
+    graph, steps = resume(tmp_path)
+
+    # then
+    assert steps == 2
+    _assert_graphs_equal(graph, expected)
+
+
+@pytest.mark.parametrize("size", [0, 3])
+def test_tail_cut_within_header_is_empty(tmp_path, start_graph, size):
+    # given
+    with Checkpointer(tmp_path, start_graph, interval=100) as checkpointer:
+        derive(start_graph, ORDER, 2, checkpointer=checkpointer)
+    (tail_path,) = tmp_path.glob("tail-*.log")
+    os.truncate(tail_path, size)
+
+    # when
+    graph, steps = resume(tmp_path)
+
+    # then
+    assert steps == 0
+    _assert_graphs_equal(graph, start_graph)
+
+
+def test_tail_is_created_before_snapshot(tmp_path, start_graph, monkeypatch):
+    # given
+    write_snapshot = checkpoint._write_snapshot
+
+    def crash_at_fourth_step(directory, graph, steps):
+        if steps == 4:
+            raise OSError("crashed while writing the snapshot")
+        write_snapshot(directory, graph, steps)
+
+    monkeypatch.setattr(checkpoint, "_write_snapshot", crash_at_fourth_step)
+    with pytest.raises(OSError):
+        with Checkpointer(tmp_path, start_graph, interval=2) as checkpointer:
+            expected = derive(start_graph, ORDER, 4, checkpointer=checkpointer)
+
+    # when
+    graph, steps = resume(tmp_path)
+
+    # then
+    assert steps == 4
+    _assert_graphs_equal(graph, expected)
+    assert sorted(path.name for path in tmp_path.glob("tail-*.log")) == [
+        "tail-2.log",
+        "tail-4.log",
+    ]
+
+
+def test_corrupted_step_is_not_ignored(tmp_path, start_graph):
+    # given
+    with Checkpointer(tmp_path, start_graph, interval=100) as checkpointer:
+        derive(start_graph, ORDER, 2, checkpointer=checkpointer)
+    (tail_path,) = tmp_path.glob("tail-*.log")
+    with open(tail_path, "ab") as file:
+        file.write(bytes([len(PRODUCTIONS) + 1]))
+
+    # when, then
+    with pytest.raises(ValueError):
+        resume(tmp_path)
+
+
+def test_resume_without_snapshot(tmp_path, start_graph):
+    # given
+    assert not (tmp_path / SNAPSHOT_NAME).exists()
+
+    # when
+    graph, steps = resume(tmp_path, start_graph)
+
+    # then
+    assert steps == 0
+    assert graph is start_graph
+    with pytest.raises(FileNotFoundError):
+        resume(tmp_path)
@@ -0,0 +1,178 @@
+import pickle
+
+import networkx as nx
+import pytest
+
+from gg_project.delta import MISSING, Delta
+from gg_project.productions.utils import reserve_id_block
+from gg_project.vertex_params import VertexType
+from tests.fixtures import (
+    graph_after_first_production,
+    graph_before_seventh_production,
+    production1,
+    production2,
+    production7,
+    start_graph,
+)
+
+
+def _assert_graphs_equal(graph: nx.Graph, expected: nx.Graph) -> None:
+    assert graph.graph == expected.graph
+    assert dict(graph.nodes.items()) == dict(expected.nodes.items())
+    assert {frozenset(edge) for edge in graph.edges} == {
+        frozenset(edge) for edge in expected.edges
+    }
+
+
+def test_delta_of_production_lists_only_changed_elements(
+    graph_after_first_production, production2
+):
+    # given
+    subgraph = production2.find_isomorphic_to_left_side(graph_after_first_production)
+
+    # when
+    delta = production2.apply_delta(graph_after_first_production, subgraph)
+
+    # then
+    interior_id = next(
+        i
+        for i in subgraph.nodes
+        if subgraph.nodes[i]["vertex_type"] == VertexType.INTERIOR
+    )
+    assert delta.changes == (
+        (interior_id, "vertex_type", VertexType.INTERIOR, VertexType.INTERIOR_USED),
+    )
+    assert len(delta.added_nodes) == 6
+    assert not delta.removed_nodes
+    assert not delta.removed_edges
+
+
+@pytest.mark.parametrize(
+    "graph_fixture,production_fixture",
+    [
+        ("start_graph", "production1"),
+        ("graph_after_first_production", "production2"),
+        ("graph_before_seventh_production", "production7"),
+    ],
+)
+def test_delta_replays_and_undoes_production(
+    request, graph_fixture, production_fixture
+):
+    # given
+    graph = request.getfixturevalue(graph_fixture)
+    production = request.getfixturevalue(production_fixture)
+    subgraph = production.find_isomorphic_to_left_side(graph)
+    expected = production.apply(graph, subgraph)
+    original = graph.copy()
+
+    # when
+    delta = production.apply_delta(graph, subgraph)
+
+    # then
+    _assert_graphs_equal(delta.apply(graph), expected)
+    assert list(graph.nodes) == list(expected.nodes)
+    _assert_graphs_equal(delta.inverted().apply(graph), original)
+
+
+@pytest.mark.parametrize(
+    "graph_fixture,production_fixture",
+    [
+        ("start_graph", "production1"),
+        ("graph_after_first_production", "production2"),
+        ("graph_before_seventh_production", "production7"),
+    ],
+)
+def test_delta_of_production_equals_delta_of_whole_graphs(
+    request, graph_fixture, production_fixture
+):
+    # given
+    graph = request.getfixturevalue(graph_fixture)
+    production = request.getfixturevalue(production_fixture)
+    subgraph = production.find_isomorphic_to_left_side(graph)
+
+    # when
+    delta = production.apply_delta(graph, subgraph)
+
+    # then
+    expected = Delta.between(graph, production.apply(graph, subgraph))
+    assert delta.added_nodes == expected.added_nodes
+    assert sorted(delta.removed_nodes) == sorted(expected.removed_nodes)
+    assert {frozenset(edge) for edge in delta.added_edges} == {
+        frozenset(edge) for edge in expected.added_edges
+    }
+    assert {frozenset(edge) for edge in delta.removed_edges} == {
+        frozenset(edge) for edge in expected.removed_edges
+    }
+    assert set(delta.changes) == set(expected.changes)
+    assert delta.graph_changes == expected.graph_changes
+
+
+def test_delta_of_production_continues_ids_after_distant_nodes(
+    graph_after_first_production, production2
+):
+    # given
+    graph = graph_after_first_production
+    graph.add_node(100, **graph.nodes[0])
+    subgraph = production2.find_isomorphic_to_left_side(graph)
+
+    # when
+    delta = production2.apply_delta(graph, subgraph)
+
+    # then
+    assert sorted(i for i, _ in delta.added_nodes) == list(range(101, 107))
+    _assert_graphs_equal(delta.apply(graph.copy()), production2.apply(graph, subgraph))
+
+
+def test_undone_delta_restores_reserved_ids(graph_after_first_production, production2):
+    # given
+    graph = reserve_id_block(graph_after_first_production, (1000, 1100))
+    subgraph = production2.find_isomorphic_to_left_side(graph)
+
+    # when
+    delta = production2.apply_delta(graph, subgraph)
+
+    # then
+    assert delta.graph_changes == (("id_block", (1000, 1100), (1006, 1100)),)
+    _assert_graphs_equal(delta.apply(graph.copy()), production2.apply(graph, subgraph))
+    undone = delta.inverted().apply(delta.apply(graph.copy()))
+    assert undone.graph == {"id_block": (1000, 1100)}
+
+
+def test_delta_of_merge_removes_merged_nodes(
+    graph_before_seventh_production, production7
+):
+    # given
+    subgraph = production7.find_isomorphic_to_left_side(graph_before_seventh_production)
+
+    # when
+    delta = production7.apply_delta(graph_before_seventh_production, subgraph)
+
+    # then
+    assert len(delta.removed_nodes) == 4
+    assert len(delta.added_nodes) == 2
+    assert delta.inverted().inverted() == delta
+
+
+def test_empty_delta_does_not_change_graph(start_graph):
+    # when
+    delta = Delta.between(start_graph, start_graph)
+
+    # then
+    assert len(delta) == 0
+    _assert_graphs_equal(delta.apply(start_graph.copy()), start_graph)
+
+
+def test_delta_restores_removed_and_added_parameters(start_graph):
+    # given
+    old = start_graph.copy()
+    old.nodes[0]["removed"] = 1
+    new = start_graph.copy()
+    new.nodes[0]["added"] = 2
+
+    # when
+    delta = pickle.loads(pickle.dumps(Delta.between(old, new)))
+
+    # then
+    assert set(delta.changes) == {(0, "removed", 1, MISSING), (0, "added", MISSING, 2)}
+    _assert_graphs_equal(delta.apply(old.copy()), new)
+    _assert_graphs_equal(delta.inverted().apply(new.copy()), old)
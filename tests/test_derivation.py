@@ -0,0 +1,164 @@
+import io
+
+import networkx as nx
+import pytest
+
+from benchmarks.meshes import grid_graph
+
+from gg_project.derivation import (
+    MAGIC,
+    PRODUCTIONS,
+    DerivationLog,
+    TruncatedLogError,
+    derive,
+    derive_by_anchor,
+    encode_step,
+    read_log,
+    replay,
+)
+from gg_project.productions.p1 import Production1
+from gg_project.productions.p2 import Production2
+from gg_project.productions.p7 import Production7
+from gg_project.productions.registry import ProductionRegistry
+from gg_project.vertex_params import VertexType
+from tests.fixtures import start_graph
+
+ORDER = tuple(reversed(PRODUCTIONS))
+
+
+def _assert_graphs_equal(graph, expected):
+    assert list(graph.nodes.items()) == list(expected.nodes.items())
+    assert {frozenset(edge) for edge in graph.edges} == {
+        frozenset(edge) for edge in expected.edges
+    }
+
+
+def test_step_roundtrips_through_log():
+    # given
+    file = io.BytesIO()
+    log = DerivationLog(file)
+
+    # when
+    log.append(Production7, [300, 4, 1000000, 5])
+    log.append(Production2, [])
+    file.seek(0)
+
+    # then
+    assert [tuple(step) for step in read_log(file)] == [
+        (Production7, (4, 5, 300, 1000000)),
+        (Production2, ()),
+    ]
+
+
+def test_step_takes_few_bytes():
+    assert len(encode_step(Production2, [40, 41, 45, 50])) == 6
+
+
+def test_replay_rebuilds_derived_graph(start_graph):
+    # given
+    file = io.BytesIO()
+    log = DerivationLog(file)
+    derived = derive(start_graph, ORDER, 12, log)
+    file.seek(0)
+
+    # when
+    replayed = replay(start_graph, read_log(file))
+
+    # then
+    assert log.steps == 12
+    _assert_graphs_equal(replayed, derived)
+
+
+def test_replay_rebuilds_intermediate_graph(start_graph):
+    # given
+    file = io.BytesIO()
+    expected = derive(start_graph, ORDER, 5)
+    derive(start_graph, ORDER, 12, DerivationLog(file))
+    file.seek(0)
+
+    # when
+    replayed = replay(start_graph, read_log(file), count=5)
+
+    # then
+    _assert_graphs_equal(replayed, expected)
+
+
+def test_derivation_by_anchor_can_be_replayed(start_graph):
+    # given
+    file = io.BytesIO()
+    log = DerivationLog(file)
+    derived = derive_by_anchor(start_graph, ProductionRegistry(ORDER), 12, log)
+    file.seek(0)
+
+    # when
+    replayed = replay(start_graph, read_log(file))
+
+    # then
+    assert log.steps == 12
+    _assert_graphs_equal(replayed, derived)
+
+
+@pytest.mark.parametrize("size", [2, 3, 4])
+@pytest.mark.parametrize("by_anchor", [False, True])
+def test_replay_of_grid_mesh_gives_the_same_ids(size, by_anchor):
+    # given
+    graph = grid_graph(size)
+    file = io.BytesIO()
+    if by_anchor:
+        derived = derive_by_anchor(
+            graph, ProductionRegistry([Production2]), 10, DerivationLog(file)
+        )
+    else:
+        derived = derive(graph, [Production2], 10, DerivationLog(file))
+    file.seek(0)
+
+    # when
+    replayed = replay(graph, read_log(file))
+
+    # then
+    assert nx.is_isomorphic(replayed, derived, node_match=dict.__eq__)
+    assert dict(replayed.nodes(data=True)) == dict(derived.nodes(data=True))
+    assert set(map(frozenset, replayed.edges)) == set(map(frozenset, derived.edges))
+
+
+def test_productions_are_searched_for_only_at_their_anchors(start_graph):
+    # given
+    searched_types = []
+
+    class RecordingProduction2(Production2):
+        @classmethod
+        def find_isomorphic_at(cls, graph, node_id):
+            searched_types.append(graph.nodes[node_id]["vertex_type"])
+            return super().find_isomorphic_at(graph, node_id)
+
+    registry = ProductionRegistry([Production1, RecordingProduction2])
+
+    # when
+    derived = derive_by_anchor(start_graph, registry, 4)
+
+    # then
+    assert set(searched_types) == {VertexType.INTERIOR}
+    assert len(derived) == len(derive(start_graph, [Production1, Production2], 4))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"not a log", MAGIC + bytes([2, 3, 1]), MAGIC + bytes([2, 0x81]), MAGIC + b"\x09"],
+)
+def test_invalid_log_is_rejected(data):
+    with pytest.raises(ValueError):
+        list(read_log(io.BytesIO(data)))
+
+
+def test_truncated_log_yields_complete_steps_first():
+    # given
+    data = MAGIC + encode_step(Production2, [5, 6]) + encode_step(Production7, [1, 2])
+    steps = read_log(io.BytesIO(data[:-1]))
+
+    # when
+    first = next(steps)
+
+    # then
+    assert tuple(first) == (Production2, (5, 6))
+    with pytest.raises(TruncatedLogError):
+        next(steps)
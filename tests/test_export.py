@@ -0,0 +1,96 @@
+import io
+import struct
+
+import pytest
+
+from gg_project.export import export, iter_faces, write_obj, write_ply, write_vtk
+from tests.fixtures import (
+    graph_after_first_production,
+    graph_after_second_production,
+    production1,
+    production2,
+    start_graph,
+)
+
+
+def _signed_area(face):
+    (x1, y1), (x2, y2), (x3, y3) = face
+    return (x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1)
+
+
+def test_faces_are_counter_clockwise(graph_after_second_production):
+    faces = list(iter_faces(graph_after_second_production))
+
+    assert len(faces) == 3
+    assert all(_signed_area(face) > 0 for face in faces)
+    assert sum(_signed_area(face) for face in faces) == pytest.approx(2.0)
+
+
+def test_obj_deduplicates_coinciding_vertices(graph_after_second_production):
+    # given
+    file = io.BytesIO()
+
+    # when
+    write_obj(graph_after_second_production, file)
+
+    # then
+    lines = file.getvalue().decode().splitlines()
+    vertices = [line for line in lines if line.startswith("v ")]
+    faces = [line for line in lines if line.startswith("f ")]
+    assert len(vertices) == 5
+    assert len(faces) == 3
+    assert len(set(vertices)) == 5
+
+
+def test_ascii_and_binary_ply_contain_same_mesh(graph_after_first_production):
+    # given
+    ascii_file = io.BytesIO()
+    binary_file = io.BytesIO()
+
+    # when
+    write_ply(graph_after_first_production, ascii_file)
+    write_ply(graph_after_first_production, binary_file, binary=True)
+
+    # then
+    ascii_header, ascii_body = ascii_file.getvalue().split(b"end_header\n")
+    binary_header, binary_body = binary_file.getvalue().split(b"end_header\n")
+    assert b"element vertex 4\n" in ascii_header
+    assert b"element face 2\n" in ascii_header
+    assert binary_header == ascii_header.replace(b"ascii", b"binary_little_endian")
+
+    ascii_rows = ascii_body.decode().splitlines()
+    vertex_size, face_size = struct.calcsize("<3d"), struct.calcsize("<B3i")
+    vertices = [
+        struct.unpack_from("<3d", binary_body, i * vertex_size) for i in range(4)
+    ]
+    faces = [
+        struct.unpack_from("<B3i", binary_body, 4 * vertex_size + i * face_size)
+        for i in range(2)
+    ]
+    assert len(binary_body) == 4 * vertex_size + 2 * face_size
+    assert [tuple(map(float, row.split())) for row in ascii_rows[:4]] == vertices
+    assert [tuple(map(int, row.split())) for row in ascii_rows[4:]] == faces
+
+
+def test_vtk_lists_points_and_polygons(graph_after_first_production):
+    # given
+    file = io.BytesIO()
+
+    # when
+    write_vtk(graph_after_first_production, file)
+
+    # then
+    lines = file.getvalue().decode().splitlines()
+    assert lines[4] == "POINTS 4 double"
+    assert lines[9] == "POLYGONS 2 8"
+    assert len(lines) == 12
+
+
+def test_export_chooses_format_by_suffix(tmp_path, graph_after_first_production):
+    export(graph_after_first_production, tmp_path / "mesh.obj")
+    export(graph_after_first_production, tmp_path / "mesh.PLY", binary=True)
+
+    assert (tmp_path / "mesh.obj").read_bytes().startswith(b"v ")
+    assert b"binary_little_endian" in (tmp_path / "mesh.PLY").read_bytes()
+    with pytest.raises(ValueError):
+        export(graph_after_first_production, tmp_path / "mesh.stl")
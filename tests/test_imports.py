@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+
+def _loaded_after_import(module):
+    script = (
+        f"import sys, {module}\n"
+        "print(*sorted({name.split('.')[0] for name in sys.modules}))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    ).stdout
+    return set(output.split())
+
+
+def test_package_import_does_not_import_dependencies():
+    loaded = _loaded_after_import("gg_project")
+
+    assert loaded.isdisjoint({"networkx", "numpy", "matplotlib"})
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["gg_project.vis", "gg_project.svg", "gg_project.render", "gg_project.animation"],
+)
+def test_drawing_modules_do_not_import_matplotlib(module):
+    assert _loaded_after_import(module).isdisjoint({"matplotlib", "PIL"})
+
+
+def test_productions_do_not_import_numpy():
+    assert "numpy" not in _loaded_after_import("gg_project.derivation")
+
+
+def test_submodules_are_imported_on_attribute_access():
+    import gg_project
+
+    assert gg_project.vis.COLOR_MAPPING
+    assert "render" in dir(gg_project)
+    with pytest.raises(AttributeError):
+        gg_project.missing
@@ -0,0 +1,98 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from gg_project.mesh_arrays import MeshArrays, dumps, loads
+from gg_project.vertex_params import VertexType
+from tests.fixtures import (
+    start_graph,
+    graph_after_first_production,
+    graph_after_second_production,
+    production1,
+    production2,
+)
+
+
+def test_converts_graph_to_arrays(graph_after_first_production):
+    mesh = MeshArrays.from_graph(graph_after_first_production)
+
+    assert len(mesh) == 7
+    assert mesh.node(mesh.rows([1])[0])["vertex_type"] == VertexType.EXTERIOR
+    assert np.isnan(mesh.positions[mesh.rows([5])[0]]).all()
+    assert mesh.indptr[-1] == 2 * graph_after_first_production.number_of_edges()
+
+
+def test_converts_arrays_back_to_the_same_graph(graph_after_second_production):
+    graph = MeshArrays.from_graph(graph_after_second_production).to_graph()
+
+    assert list(graph.nodes.items()) == list(
+        graph_after_second_production.nodes.items()
+    )
+    assert nx.utils.graphs_equal(graph, graph_after_second_production)
+
+
+def test_converts_selected_rows_to_induced_subgraph(graph_after_second_production):
+    mesh = MeshArrays.from_graph(graph_after_second_production)
+    node_ids = [1, 2, 3, 5]
+
+    graph = mesh.to_graph(mesh.rows(node_ids))
+
+    assert nx.utils.graphs_equal(
+        graph, graph_after_second_production.subgraph(node_ids)
+    )
+
+
+def test_selects_arrays_of_induced_subgraph(graph_after_second_production):
+    mesh = MeshArrays.from_graph(graph_after_second_production)
+    node_ids = [1, 2, 3, 5]
+
+    selected = mesh.select(mesh.rows(node_ids))
+
+    assert nx.utils.graphs_equal(
+        selected.to_graph(), graph_after_second_production.subgraph(node_ids)
+    )
+
+
+def test_rows_of_unknown_nodes_are_rejected(graph_after_second_production):
+    mesh = MeshArrays.from_graph(graph_after_second_production)
+
+    with pytest.raises(KeyError, match=r"\[100, -1\]"):
+        mesh.rows([1, 100, 2, -1])
+
+
+def test_rows_of_empty_arrays_are_rejected():
+    mesh = MeshArrays.from_graph(nx.Graph())
+
+    with pytest.raises(KeyError, match=r"\[0\]"):
+        mesh.rows([0])
+
+
+def test_rows_outside_of_arrays_are_rejected(graph_after_second_production):
+    mesh = MeshArrays.from_graph(graph_after_second_production)
+
+    with pytest.raises(ValueError, match=r"\[-1, 100\]"):
+        mesh.select([0, -1, 100])
+    with pytest.raises(ValueError, match=r"\[-1\]"):
+        mesh.to_graph([-1])
+
+
+def test_pickles_arrays_out_of_band(graph_after_second_production):
+    mesh = MeshArrays.from_graph(graph_after_second_production)
+
+    data, buffers = dumps(mesh)
+    unpickled = loads(data, buffers)
+
+    assert len(buffers) == 6
+    assert sum(
+        buffer.raw().nbytes for buffer in buffers
+    ) == mesh.positions.nbytes + sum(
+        array.nbytes
+        for array in (
+            mesh.ids,
+            mesh.vertex_types,
+            mesh.levels,
+            mesh.indptr,
+            mesh.indices,
+        )
+    )
+    assert nx.utils.graphs_equal(unpickled.to_graph(), graph_after_second_production)
@@ -0,0 +1,124 @@
+import json
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from gg_project.mesh_arrays import MeshArrays
+from gg_project.meshfile import ALIGNMENT, MAGIC, _PREAMBLE, load_mesh, save_mesh
+from tests.fixtures import (
+    graph_after_seventh_production,
+    graph_before_seventh_production,
+    production1,
+    start_graph,
+)
+
+
+@pytest.mark.parametrize(
+    "graph_fixture",
+    ["start_graph", "graph_after_seventh_production"],
+)
+def test_loaded_arrays_equal_saved_ones(request, tmp_path, graph_fixture):
+    # given
+    graph = request.getfixturevalue(graph_fixture)
+    mesh = MeshArrays.from_graph(graph)
+    path = tmp_path / "graph.mesh"
+
+    # when
+    save_mesh(path, mesh, {"id_block": (10, 20)})
+    loaded, attributes = load_mesh(path)
+
+    # then
+    assert attributes == {"id_block": (10, 20)}
+    for name in ("ids", "vertex_types", "levels", "positions", "indptr", "indices"):
+        expected = getattr(mesh, name)
+        array = getattr(loaded, name)
+        assert array.dtype == expected.dtype
+        np.testing.assert_array_equal(array, expected)
+    assert list(loaded.to_graph().nodes.items()) == list(graph.nodes.items())
+
+
+def test_loaded_arrays_are_read_only_memory_maps(tmp_path, start_graph):
+    # given
+    path = tmp_path / "graph.mesh"
+    save_mesh(path, MeshArrays.from_graph(start_graph))
+
+    # when
+    loaded, attributes = load_mesh(path)
+
+    # then
+    assert attributes == {}
+    assert isinstance(loaded.positions.base, np.memmap)
+    assert not loaded.positions.flags.writeable
+    assert loaded.positions.ctypes.data % ALIGNMENT == 0
+
+
+def test_overwritten_file_ends_after_the_last_array(
+    tmp_path, start_graph, graph_after_seventh_production
+):
+    # given
+    path = tmp_path / "graph.mesh"
+    save_mesh(path, MeshArrays.from_graph(graph_after_seventh_production))
+
+    # when
+    save_mesh(path, MeshArrays.from_graph(start_graph))
+
+    # then
+    assert path.stat().st_size % ALIGNMENT == 0
+    assert len(load_mesh(path)[0]) == 1
+
+
+def test_empty_graph_is_saved(tmp_path):
+    # given
+    path = tmp_path / "graph.mesh"
+
+    # when
+    save_mesh(path, MeshArrays.from_graph(nx.Graph()))
+    loaded, _ = load_mesh(path)
+
+    # then
+    assert len(loaded) == 0
+
+
+@pytest.mark.parametrize(
+    "data", [b"not a mesh file", MAGIC + b"\x02\x00\x00\x00\x00\x00"]
+)
+def test_invalid_file_is_rejected(tmp_path, data):
+    # given
+    path = tmp_path / "graph.mesh"
+    path.write_bytes(data)
+
+    # when, then
+    with pytest.raises(ValueError):
+        load_mesh(path)
+
+
+def test_file_truncated_within_an_array_is_rejected(
+    tmp_path, graph_after_seventh_production
+):
+    # given
+    path = tmp_path / "graph.mesh"
+    save_mesh(path, MeshArrays.from_graph(graph_after_seventh_production))
+    # padding after the last array is shorter than the alignment
+    path.write_bytes(path.read_bytes()[:-ALIGNMENT])
+
+    # when, then
+    with pytest.raises(ValueError):
+        load_mesh(path)
+
+
+def test_misaligned_array_is_rejected(tmp_path, start_graph):
+    # given
+    path = tmp_path / "graph.mesh"
+    save_mesh(path, MeshArrays.from_graph(start_graph))
+    data = bytearray(path.read_bytes())
+    start = len(MAGIC) + _PREAMBLE.size
+    _, length = _PREAMBLE.unpack_from(data, len(MAGIC))
+    header = json.loads(data[start : start + length])
+    header["arrays"][0]["offset"] += 1
+    data[start : start + length] = json.dumps(header).encode().ljust(length)
+    path.write_bytes(data)
+
+    # when, then
+    with pytest.raises(ValueError):
+        load_mesh(path)
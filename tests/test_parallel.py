@@ -0,0 +1,98 @@
+import concurrent.futures
+
+import pytest
+
+from benchmarks.meshes import grid_graph
+from gg_project.parallel import find_all_parallel, partition
+from tests.fixtures import (
+    start_graph,
+    graph_after_first_production,
+    production1,
+    production2,
+    production7,
+    graph_before_seventh_production,
+)
+
+
+@pytest.fixture
+def executor():
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+@pytest.fixture
+def refined_graph(graph_after_first_production, production2):
+    graph = graph_after_first_production
+    for _ in range(3):
+        subgraph = production2.find_isomorphic_to_left_side(graph)
+        graph = production2.apply(graph, subgraph)
+    return graph
+
+
+def test_partition_covers_every_node_once(refined_graph):
+    shards = partition(refined_graph, (3, 2))
+
+    assert len(shards) == 6
+    assert sum(len(shard) for shard in shards) == len(refined_graph)
+    assert set().union(*shards) == set(refined_graph)
+
+
+def test_finds_the_same_matches_as_sequential_search(
+    refined_graph, production2, executor
+):
+    # when
+    parallel = list(
+        find_all_parallel(production2, refined_graph, grid=(2, 2), executor=executor)
+    )
+
+    # then
+    sequential = production2.find_all_isomorphic_to_left_side(refined_graph)
+    assert len(parallel) == len({frozenset(subgraph) for subgraph in parallel})
+    assert {frozenset(subgraph) for subgraph in parallel} == {
+        frozenset(subgraph) for subgraph in sequential
+    }
+
+
+def test_shards_of_grid_mesh_find_every_match_once(production2, executor):
+    # given
+    graph = grid_graph(4)
+
+    # when
+    parallel = list(
+        find_all_parallel(production2, graph, grid=(3, 3), executor=executor)
+    )
+
+    # then
+    sequential = production2.find_all_isomorphic_to_left_side(graph)
+    assert sorted(map(sorted, parallel)) == sorted(map(sorted, sequential))
+
+
+def test_finds_nothing_when_left_side_is_missing(start_graph, production2, executor):
+    assert list(find_all_parallel(production2, start_graph, executor=executor)) == []
+
+
+def test_finds_matches_of_production_with_larger_radius(
+    graph_before_seventh_production, production7, executor
+):
+    # when
+    parallel = list(
+        find_all_parallel(
+            production7, graph_before_seventh_production, grid=(2, 2), executor=executor
+        )
+    )
+
+    # then
+    sequential = production7.find_all_isomorphic_to_left_side(
+        graph_before_seventh_production
+    )
+    assert {frozenset(subgraph) for subgraph in parallel} == {
+        frozenset(subgraph) for subgraph in sequential
+    }
+    assert parallel
+
+
+def test_partition_gives_shards_of_equal_size(refined_graph):
+    shards = partition(refined_graph, (3, 2))
+
+    sizes = [len(shard) for shard in shards]
+    assert max(sizes) - min(sizes) <= 1
@@ -0,0 +1,101 @@
+import concurrent.futures
+import sys
+
+import networkx as nx
+import pytest
+
+from gg_project.mesh_arrays import MeshArrays
+from gg_project.meshfile import save_mesh
+from gg_project.render import level_arrays, main, render_all
+from tests.fixtures import (
+    graph_after_second_production,
+    production2,
+    start_graph,
+)
+
+
+@pytest.fixture
+def executor():
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+@pytest.fixture
+def mesh_path(graph_after_second_production, tmp_path):
+    path = tmp_path / "mesh.mesh"
+    save_mesh(path, MeshArrays.from_graph(graph_after_second_production))
+    return path
+
+
+def test_level_arrays_contain_only_the_level(graph_after_second_production):
+    mesh = MeshArrays.from_graph(graph_after_second_production)
+
+    arrays = level_arrays(mesh, 1)
+
+    assert (arrays.levels == 1).all()
+    assert nx.utils.graphs_equal(
+        arrays.to_graph(),
+        graph_after_second_production.subgraph(
+            i
+            for i, node in graph_after_second_production.nodes.items()
+            if node["level"] == 1
+        ),
+    )
+
+
+def test_renders_every_level(mesh_path, tmp_path, executor):
+    outputs = render_all([mesh_path], tmp_path / "images", executor=executor, dpi=20)
+
+    assert [output.name for output in outputs] == [
+        "mesh-level-0.png",
+        "mesh-level-1.png",
+        "mesh-level-2.png",
+    ]
+    assert all(output.read_bytes().startswith(b"\x89PNG") for output in outputs)
+
+
+def test_unchanged_levels_are_not_rendered_again(mesh_path, tmp_path, executor):
+    # given
+    directory = tmp_path / "images"
+    [output] = render_all([mesh_path], directory, "svg", levels=[1], executor=executor)
+    output.write_text("cached")
+
+    # when
+    render_all([mesh_path], directory, "svg", levels=[1], executor=executor)
+    render_all([mesh_path], directory, "svg", levels=[2], executor=executor)
+
+    # then
+    assert output.read_text() == "cached"
+    assert (directory / "mesh-level-2.svg").read_text().startswith("<?xml")
+
+
+def test_changed_options_render_level_again(mesh_path, tmp_path, executor):
+    # given
+    directory = tmp_path / "images"
+    [output] = render_all([mesh_path], directory, levels=[1], executor=executor, dpi=20)
+    output.write_text("cached")
+
+    # when
+    render_all([mesh_path], directory, levels=[1], executor=executor, dpi=30)
+
+    # then
+    assert output.read_bytes().startswith(b"\x89PNG")
+
+
+def test_command_line_renders_requested_levels(mesh_path, tmp_path, capsys):
+    main([str(mesh_path), "-o", str(tmp_path), "-l", "2", "-j", "1", "--dpi", "20"])
+
+    assert capsys.readouterr().out.strip() == str(tmp_path / "mesh-level-2.png")
+
+
+def test_command_line_without_matplotlib_asks_to_install_it(
+    mesh_path, tmp_path, capsys, monkeypatch
+):
+    # worker processes are forked, so they cannot import matplotlib either
+    monkeypatch.setitem(sys.modules, "matplotlib", None)
+
+    with pytest.raises(SystemExit) as exc_info:
+        main([str(mesh_path), "-o", str(tmp_path), "-l", "2", "-j", "1"])
+
+    assert exc_info.value.code == 1
+    assert "gg-project[render]" in capsys.readouterr().err
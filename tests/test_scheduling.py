@@ -0,0 +1,97 @@
+import networkx as nx
+import pytest
+
+from gg_project.productions.groups import REFINING_PRODUCTIONS
+from gg_project.productions.p2 import Production2
+from gg_project.productions.utils import get_all_neighbors_same_level
+from gg_project.scheduling import RefinementQueue, refine_by_priority
+from gg_project.vertex_params import VertexType
+from tests.fixtures import start_graph, graph_after_first_production, production1
+
+
+def _closeness_to_origin(graph: nx.Graph, node_id: int) -> float:
+    corners = [
+        graph.nodes[i]["position"]
+        for i in get_all_neighbors_same_level(graph, node_id)
+        if graph.nodes[i]["vertex_type"] == VertexType.EXTERIOR
+    ]
+    return -sum(x + y for x, y in corners) / len(corners)
+
+
+class _Production2AfterNode5(Production2):
+    """Matches at node 6 only after the element of node 5 was broken"""
+
+    radius = 2
+
+    @classmethod
+    def find_isomorphic_at(cls, graph, node_id):
+        if node_id == 6 and graph.nodes[5]["vertex_type"] == VertexType.INTERIOR:
+            return None
+        return super().find_isomorphic_at(graph, node_id)
+
+
+def _interiors(graph):
+    return [
+        i
+        for i, node in graph.nodes.items()
+        if node["vertex_type"] == VertexType.INTERIOR
+    ]
+
+
+def test_queue_pops_node_with_largest_error(graph_after_first_production):
+    queue = RefinementQueue(_closeness_to_origin)
+    queue.update(graph_after_first_production, graph_after_first_production.nodes)
+
+    assert len(queue) == 2
+    assert queue.pop() == 5
+    assert queue.pop() == 6
+    assert queue.pop() is None
+
+
+def test_breaks_elements_with_largest_error_first(graph_after_first_production):
+    graph = refine_by_priority(
+        graph_after_first_production, _closeness_to_origin, max_nodes=20
+    )
+
+    levels = sorted(graph.nodes[i]["level"] for i in _interiors(graph))
+    assert len(graph) == 25
+    assert levels == [1, 2, 3, 4, 4]
+    assert graph.nodes[6]["vertex_type"] == VertexType.INTERIOR
+
+
+def test_stops_when_time_runs_out(graph_after_first_production):
+    graph = refine_by_priority(
+        graph_after_first_production, _closeness_to_origin, time_budget=0
+    )
+
+    assert len(graph) == len(graph_after_first_production)
+
+
+def test_retries_node_once_its_surroundings_change(graph_after_first_production):
+    graph = refine_by_priority(
+        graph_after_first_production,
+        lambda graph, node_id: float(node_id == 6) - graph.nodes[node_id]["level"],
+        max_nodes=14,
+        productions=(_Production2AfterNode5, *REFINING_PRODUCTIONS[1:]),
+    )
+
+    levels = sorted(graph.nodes[i]["level"] for i in _interiors(graph))
+    assert levels == [2, 2, 2, 2]
+
+
+def test_estimates_errors_of_changed_surroundings_again(graph_after_first_production):
+    def estimate(graph, node_id):
+        if node_id == 6 and graph.nodes[5]["vertex_type"] != VertexType.INTERIOR:
+            return -3.0
+        return -float(graph.nodes[node_id]["level"])
+
+    graph = refine_by_priority(graph_after_first_production, estimate, max_nodes=14)
+
+    assert graph.nodes[6]["vertex_type"] == VertexType.INTERIOR
+
+
+def test_rejects_nan_error(graph_after_first_production):
+    queue = RefinementQueue(lambda graph, node_id: float("nan"))
+
+    with pytest.raises(ValueError):
+        queue.update(graph_after_first_production, graph_after_first_production.nodes)
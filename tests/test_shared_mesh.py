@@ -0,0 +1,43 @@
+import concurrent.futures
+
+import networkx as nx
+import pytest
+
+from gg_project.mesh_arrays import MeshArrays
+from gg_project.shared_mesh import SharedMesh
+from tests.fixtures import graph_after_second_production, start_graph, production2
+
+
+def _read_in_worker(handle):
+    with SharedMesh.attach(handle) as shared:
+        writeable = shared.arrays.positions.flags.writeable
+        return shared.arrays.to_graph(), writeable
+
+
+def test_worker_reads_shared_arrays(graph_after_second_production):
+    mesh = MeshArrays.from_graph(graph_after_second_production)
+
+    with SharedMesh.create(mesh) as shared:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            graph, writeable = executor.submit(_read_in_worker, shared.handle).result()
+
+    assert not writeable
+    assert nx.utils.graphs_equal(graph, graph_after_second_production)
+
+
+def test_attached_arrays_are_read_only(graph_after_second_production):
+    mesh = MeshArrays.from_graph(graph_after_second_production)
+
+    with SharedMesh.create(mesh) as shared, SharedMesh.attach(
+        shared.handle
+    ) as attached:
+        with pytest.raises(ValueError):
+            attached.arrays.levels[0] = 3
+
+
+def test_arrays_of_closed_mesh_are_not_accessible(graph_after_second_production):
+    shared = SharedMesh.create(MeshArrays.from_graph(graph_after_second_production))
+    shared.close()
+
+    with pytest.raises(ValueError):
+        shared.arrays  # pylint: disable=pointless-statement
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from gg_project.spatial import GridIndex
+
+
+@pytest.fixture
+def points():
+    points = np.random.default_rng(0).random((2000, 2)) * [3.0, 1.0]
+    points[::50] = np.nan
+    return points
+
+
+@pytest.mark.parametrize(
+    "bbox",
+    [
+        (0.2, 0.1, 0.5, 0.3),
+        (-1.0, -1.0, 5.0, 5.0),
+        (2.9, 0.9, 10.0, 10.0),
+        (5.0, 5.0, 6.0, 6.0),
+        (0.5, 0.5, 0.4, 0.6),
+    ],
+)
+def test_query_returns_points_inside_box(points, bbox):
+    # given
+    index = GridIndex(points)
+    x_min, y_min, x_max, y_max = bbox
+
+    # when
+    rows = index.query(bbox)
+
+    # then
+    with np.errstate(invalid="ignore"):
+        expected = np.flatnonzero(
+            (points[:, 0] >= x_min)
+            & (points[:, 0] <= x_max)
+            & (points[:, 1] >= y_min)
+            & (points[:, 1] <= y_max)
+        )
+    np.testing.assert_array_equal(rows, expected)
+
+
+def test_query_of_empty_index():
+    assert len(GridIndex(np.zeros((0, 2))).query((0.0, 0.0, 1.0, 1.0))) == 0
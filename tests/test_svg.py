@@ -0,0 +1,82 @@
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from gg_project import svg
+from gg_project.mesh_arrays import MeshArrays
+from gg_project.svg import save_svg, write_svg
+from gg_project.triangulation import from_arrays
+from gg_project.vis import node_positions
+from tests.fixtures import graph_after_second_production, production2, start_graph
+
+NAMESPACE = "{http://www.w3.org/2000/svg}"
+
+
+def _parse(mesh, level, **kwargs):
+    file = io.BytesIO()
+    write_svg(mesh, level, file, **kwargs)
+    return ET.fromstring(file.getvalue())
+
+
+def test_writes_edges_and_nodes_of_the_level(graph_after_second_production):
+    # given
+    graph = graph_after_second_production
+    level = graph.subgraph(i for i, node in graph.nodes.items() if node["level"] == 2)
+
+    # when
+    root = _parse(MeshArrays.from_graph(graph), 2)
+
+    # then
+    assert len(root.findall(f".//{NAMESPACE}line")) == level.number_of_edges()
+    assert len(root.findall(f".//{NAMESPACE}circle")) == len(level)
+
+
+def test_nodes_are_drawn_where_vis_draws_them(graph_after_second_production):
+    # given
+    graph = graph_after_second_production
+    level = graph.subgraph(i for i, node in graph.nodes.items() if node["level"] == 1)
+    mesh = MeshArrays.from_graph(graph)
+
+    # when
+    circles = _parse(mesh, 1).findall(f".//{NAMESPACE}circle")
+
+    # then
+    assert sorted(
+        (float(circle.get("cx")), float(circle.get("cy"))) for circle in circles
+    ) == pytest.approx(sorted(node_positions(level, 1).values()))
+
+
+def test_output_does_not_depend_on_chunk_size(monkeypatch):
+    # given
+    vertices = [(x, y) for y in range(4) for x in range(4)]
+    triangles = [
+        triangle
+        for y in range(3)
+        for x in range(3)
+        for triangle in (
+            (4 * y + x, 4 * y + x + 1, 4 * y + x + 5),
+            (4 * y + x, 4 * y + x + 5, 4 * y + x + 4),
+        )
+    ]
+    mesh = MeshArrays.from_graph(from_arrays(vertices, triangles))
+    whole = io.BytesIO()
+    write_svg(mesh, 1, whole)
+
+    # when
+    monkeypatch.setattr(svg, "CHUNK_SIZE", 5)
+    chunked = io.BytesIO()
+    write_svg(mesh, 1, chunked)
+
+    # then
+    assert sorted(chunked.getvalue().splitlines()) == sorted(
+        whole.getvalue().splitlines()
+    )
+
+
+def test_empty_level_gives_empty_image(graph_after_second_production, tmp_path):
+    path = tmp_path / "level.svg"
+
+    save_svg(MeshArrays.from_graph(graph_after_second_production), 5, path)
+
+    assert ET.parse(path).getroot().find(f".//{NAMESPACE}circle") is None
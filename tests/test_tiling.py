@@ -0,0 +1,132 @@
+import concurrent.futures
+from collections import Counter
+
+import networkx as nx
+import pytest
+
+from gg_project.derivation import derive
+from gg_project.productions.groups import CLOSING_PRODUCTIONS
+from gg_project.productions.utils import IdBlockAllocator, reserve_id_block
+from gg_project.tiling import (
+    DEFAULT_IDS_PER_TILE,
+    Tile,
+    close,
+    refine_tile,
+    refine_tiled,
+    split,
+)
+from gg_project.vertex_params import VertexType
+from tests.fixtures import start_graph, graph_after_first_production, production1
+
+
+@pytest.fixture
+def executor():
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+def _nodes_of_type(graph, vertex_type, level):
+    return [
+        node
+        for node in graph.nodes.values()
+        if node["vertex_type"] == vertex_type and node["level"] == level
+    ]
+
+
+def _ids_of_type(graph, vertex_type):
+    return [i for i, node in graph.nodes.items() if node["vertex_type"] == vertex_type]
+
+
+def test_split_owns_every_interior_node_once(graph_after_first_production):
+    tiles = split(graph_after_first_production, (2, 2))
+
+    owned = [i for tile in tiles for i in tile.owned]
+    assert sorted(owned) == [5, 6]
+    assert all(set(tile.owned) <= set(tile.graph) for tile in tiles)
+
+
+def test_refines_only_owned_interior_nodes(graph_after_first_production):
+    tile = split(graph_after_first_production, (2, 1))[0]
+
+    refined = refine_tile(tile, max_level=2)
+
+    assert len(_nodes_of_type(refined, VertexType.INTERIOR, 2)) == 2
+    assert len(_nodes_of_type(refined, VertexType.INTERIOR, 1)) == 1
+
+
+def test_merges_exterior_nodes_duplicated_on_tile_boundary(
+    graph_after_first_production, executor
+):
+    # when
+    refined = refine_tiled(
+        graph_after_first_production, max_level=2, grid=(2, 2), executor=executor
+    )
+
+    # then
+    assert not _nodes_of_type(refined, VertexType.INTERIOR, 1)
+    assert len(_nodes_of_type(refined, VertexType.INTERIOR, 2)) == 4
+    positions = Counter(
+        node["position"] for node in _nodes_of_type(refined, VertexType.EXTERIOR, 2)
+    )
+    assert positions[(0.0, 1.0)] == 1
+    assert positions[(1.0, 0.0)] == 1
+
+
+def test_result_does_not_depend_on_executor(graph_after_first_production, executor):
+    # given
+    graph = graph_after_first_production
+
+    # when
+    in_parallel = refine_tiled(graph, max_level=3, grid=(2, 2), executor=executor)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as sequential_executor:
+        in_sequence = refine_tiled(
+            graph, max_level=3, grid=(2, 2), executor=sequential_executor
+        )
+
+    # then
+    assert list(in_parallel.nodes.items()) == list(in_sequence.nodes.items())
+    assert list(in_parallel.edges) == list(in_sequence.edges)
+
+
+@pytest.mark.parametrize("max_level, nodes", [(3, 43), (4, 91)])
+def test_result_is_the_same_as_of_sequential_derivation(
+    graph_after_first_production, executor, max_level, nodes
+):
+    # given
+    graph = graph_after_first_production
+    interiors = frozenset(_ids_of_type(graph, VertexType.INTERIOR))
+
+    # when
+    tiled = refine_tiled(graph, max_level=max_level, grid=(2, 2), executor=executor)
+    sequential = derive(
+        refine_tile(Tile(graph, interiors), max_level=max_level, closing=()),
+        CLOSING_PRODUCTIONS,
+        1000,
+    )
+
+    # then
+    assert len(tiled) == len(sequential) == nodes
+    assert nx.is_isomorphic(tiled, sequential, node_match=dict.__eq__)
+
+
+def test_result_is_identical_to_sequential_run_with_the_same_ids(
+    graph_after_first_production, executor
+):
+    # given
+    graph = graph_after_first_production
+    allocator = IdBlockAllocator(graph, DEFAULT_IDS_PER_TILE)
+    tiles = split(graph, (2, 2))
+
+    # when
+    tiled = refine_tiled(graph, max_level=4, grid=(2, 2), executor=executor)
+
+    sequential = graph.copy()
+    for index, tile in enumerate(tiles):
+        reserve_id_block(sequential, allocator.block(index))
+        sequential = refine_tile(Tile(sequential, tile.owned), max_level=4)
+    reserve_id_block(sequential, allocator.block(len(tiles)))
+    sequential = reserve_id_block(close(sequential), None)
+
+    # then
+    assert dict(tiled.nodes(data=True)) == dict(sequential.nodes(data=True))
+    assert set(map(frozenset, tiled.edges)) == set(map(frozenset, sequential.edges))
@@ -0,0 +1,176 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from gg_project.productions.p2 import Production2
+from gg_project.triangulation import (
+    from_arrays,
+    iter_leaf_triangles,
+    to_arrays,
+    triangle_corners,
+)
+from gg_project.vertex_params import VertexType
+from tests.fixtures import (
+    graph_after_first_production,
+    graph_after_second_production,
+    production1,
+    production2,
+    start_graph,
+)
+
+
+def test_corners_of_element_are_exterior_nodes_on_its_level(
+    graph_after_first_production,
+):
+    # given
+    graph = graph_after_first_production
+
+    # when
+    corners = triangle_corners(graph, 5)
+
+    # then
+    assert len(corners) == 3
+    assert all(graph.nodes[i]["vertex_type"] == VertexType.EXTERIOR for i in corners)
+    assert all(graph.nodes[i]["level"] == 1 for i in corners)
+
+
+def test_broken_elements_are_not_leaves(graph_after_second_production):
+    # when
+    triangles = list(iter_leaf_triangles(graph_after_second_production))
+
+    # then
+    assert len(triangles) == 3
+    assert all(
+        graph_after_second_production.nodes[i]["vertex_type"] == VertexType.INTERIOR
+        for i, _ in triangles
+    )
+    assert sorted(
+        graph_after_second_production.nodes[i]["level"] for i, _ in triangles
+    ) == [1, 2, 2]
+
+
+def test_graph_from_arrays_equals_graph_after_first_production(
+    graph_after_first_production,
+):
+    # given
+    vertices = np.array([[0.0, 0.0], [0.0, 1.0], [1.0, 0.0], [1.0, 1.0]])
+    triangles = np.array([[0, 1, 2], [1, 2, 3]])
+
+    # when
+    graph = from_arrays(vertices, triangles)
+
+    # then
+    assert nx.utils.edges_equal(graph.edges, graph_after_first_production.edges)
+    for node_id, node in graph_after_first_production.nodes.items():
+        assert graph.nodes[node_id]["vertex_type"] == node["vertex_type"]
+        assert graph.nodes[node_id]["level"] == node["level"]
+    assert graph.nodes[5]["position"] == pytest.approx((1 / 3, 1 / 3))
+
+
+def test_whole_float_indices_are_accepted():
+    # given
+    vertices = np.array([[0.0, 0.0], [0.0, 1.0], [1.0, 0.0], [1.0, 1.0]])
+
+    # when
+    graph = from_arrays(vertices, np.array([[0.0, 1.0, 2.0], [1.0, 2.0, 3.0]]))
+
+    # then
+    expected = from_arrays(vertices, np.array([[0, 1, 2], [1, 2, 3]]))
+    assert nx.utils.edges_equal(graph.edges, expected.edges)
+    assert all(isinstance(i, int) for edge in graph.edges for i in edge)
+
+
+def test_graph_from_arrays_can_be_refined():
+    # given
+    vertices = np.array([[0.0, 0.0], [2.0, 0.0], [1.0, 1.0], [3.0, 1.0]])
+    triangles = np.array([[0, 1, 2], [2, 1, 3]])
+    graph = from_arrays(vertices, triangles)
+
+    # when
+    subgraph = Production2.find_isomorphic_at(graph, 6)
+
+    # then
+    assert graph.nodes[0]["position"] == (1.5, 0.5)
+    assert len(graph.edges) == 5 + 2 + 6
+    assert subgraph is not None
+    assert sorted(subgraph.nodes) == [2, 3, 4, 6]
+
+
+@pytest.mark.parametrize(
+    "vertices,triangles",
+    [
+        (np.zeros((3, 3)), [[0, 1, 2]]),
+        (np.zeros((3, 2)), [[0, 1]]),
+        (np.zeros((3, 2)), [[0, 1, 3]]),
+        (np.zeros((3, 2)), [[0, 1, -1]]),
+        (np.zeros((3, 2)), [[0.0, 1.5, 2.0]]),
+        (np.zeros((3, 2)), [[0.0, 1.0, np.nan]]),
+        (np.zeros((3, 2)), [["0", "1", "2"]]),
+    ],
+)
+def test_invalid_arrays_are_rejected(vertices, triangles):
+    with pytest.raises(ValueError):
+        from_arrays(vertices, triangles)
+
+
+@pytest.fixture
+def refined_graph(graph_after_first_production, production2):
+    graph = graph_after_first_production
+    return production2.apply(graph, production2.find_isomorphic_at(graph, 6))
+
+
+def test_level_is_converted_into_arrays_with_parents(refined_graph):
+    # when
+    vertices, triangles, parents = to_arrays(refined_graph, 2)
+    parent_vertices, parent_triangles, root_parents = to_arrays(refined_graph, 1)
+
+    # then
+    assert vertices.shape == (4, 2)
+    assert triangles.shape == (2, 3)
+    assert parent_vertices.shape == (4, 2)
+    assert parent_triangles.shape == (2, 3)
+    np.testing.assert_array_equal(root_parents, [-1, -1])
+    np.testing.assert_array_equal(parents, [1, 1])
+
+    assert parents[0] == parents[1]
+    broken_corners = {tuple(parent_vertices[i]) for i in parent_triangles[parents[0]]}
+    (midpoint,) = {tuple(vertex) for vertex in vertices} - broken_corners
+    assert any(
+        midpoint == pytest.approx(tuple((np.array(a) + np.array(b)) / 2))
+        for a in broken_corners
+        for b in broken_corners
+        if a != b
+    )
+
+
+def test_parents_skip_incomplete_elements(refined_graph):
+    # given
+    graph = nx.Graph()
+    # interior node without corners comes first, it is not converted
+    graph.add_node(
+        -1, vertex_type=VertexType.INTERIOR_USED, position=(0.5, 0.5), level=1
+    )
+    graph.update(refined_graph)
+
+    # when
+    _, parent_triangles, _ = to_arrays(graph, 1)
+    _, _, parents = to_arrays(graph, 2)
+
+    # then
+    assert len(parent_triangles) == 2
+    np.testing.assert_array_equal(parents, to_arrays(refined_graph, 2)[2])
+
+
+def test_arrays_of_levels_are_counter_clockwise(refined_graph):
+    for level in (1, 2):
+        vertices, triangles, _ = to_arrays(refined_graph, level)
+        (x1, y1), (x2, y2), (x3, y3) = (vertices[triangles[:, k]].T for k in range(3))
+        assert ((x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1) > 0).all()
+
+
+def test_empty_level_gives_empty_arrays(start_graph):
+    vertices, triangles, parents = to_arrays(start_graph, 1)
+
+    assert vertices.shape == (0, 2)
+    assert triangles.shape == (0, 3)
+    assert parents.shape == (0,)
@@ -0,0 +1,265 @@
+import matplotlib.pyplot as plt
+import networkx as nx
+import numpy as np
+import pytest
+from matplotlib.collections import LineCollection, PathCollection
+
+from gg_project.delta import Delta
+from gg_project.vertex_params import VertexType
+from gg_project.mesh_arrays import MeshArrays
+from gg_project.productions.p2 import Production2
+from gg_project.scheduling import refine_by_priority
+from gg_project.triangulation import from_arrays, triangle_corners
+from gg_project.vis import (
+    DIFF_LABELS,
+    _visible_rows,
+    draw,
+    draw_diff,
+    node_positions,
+)
+from tests.fixtures import (
+    graph_after_first_production,
+    production1,
+    production2,
+    start_graph,
+)
+
+
+def _add(graph, node_id, vertex_type, position, level):
+    graph.add_node(node_id, vertex_type=vertex_type, position=position, level=level)
+
+
+def test_positions_of_levels_are_shifted_down():
+    # given
+    graph = nx.Graph()
+    _add(graph, 0, VertexType.START_USED, (0.5, 0.5), 0)
+    _add(graph, 1, VertexType.EXTERIOR, (0.0, 1.0), 1)
+
+    # when
+    positions = node_positions(graph)
+
+    # then
+    assert positions == {0: (0.5, -0.5), 1: (0.0, -3.0)}
+
+
+def test_coinciding_nodes_are_moved_towards_their_neighbors():
+    # given
+    graph = nx.Graph()
+    _add(graph, 1, VertexType.EXTERIOR, (0.0, 0.0), 1)
+    _add(graph, 2, VertexType.EXTERIOR, (0.0, 0.0), 1)
+    _add(graph, 3, VertexType.EXTERIOR, (1.5, 0.0), 1)
+    _add(graph, 4, VertexType.EXTERIOR, (0.0, 3.0), 2)
+    graph.add_edges_from([(1, 3), (2, 4)])
+
+    # when
+    positions = node_positions(graph)
+
+    # then
+    assert positions[1] == pytest.approx((0.1, -2.0))
+    assert positions[2] == pytest.approx((0.0, -2.0))
+    assert positions[3] == pytest.approx((1.5, -2.0))
+
+
+def test_nodes_without_position_are_placed_between_neighbors(
+    graph_after_first_production,
+):
+    # when
+    positions = node_positions(graph_after_first_production)
+
+    # then
+    assert positions[5] == pytest.approx((1 / 3, -(1 / 3 + 2)))
+    assert positions[6] == pytest.approx((2 / 3, -(2 / 3 + 2)))
+
+
+def test_draw_level(graph_after_first_production):
+    draw(graph_after_first_production, level=1)
+    plt.close("all")
+
+
+def test_fast_draw_uses_collections(graph_after_first_production):
+    # when
+    draw(graph_after_first_production, level=1, fast=True)
+
+    # then
+    axes = plt.gcf().axes[0]
+    (lines,) = [c for c in axes.collections if isinstance(c, LineCollection)]
+    assert len(lines.get_segments()) == 11
+    assert len(axes.collections) == 3
+    assert sorted(text.get_text() for text in axes.texts) == ["E"] * 4 + ["I"] * 2
+    plt.close("all")
+
+
+def test_fast_draw_skips_labels_of_large_graphs(graph_after_first_production):
+    # given
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr("gg_project.vis.MAX_LABELED_NODES", 5)
+
+        # when
+        draw(graph_after_first_production, level=1, fast=True)
+
+    # then
+    assert not plt.gcf().axes[0].texts
+    plt.close("all")
+
+
+@pytest.fixture
+def strip_graph():
+    # four triangles in a row, the first one broken by production 2
+    vertices = np.array([[x, y] for x in range(3) for y in range(2)], dtype=float)
+    triangles = np.array([[0, 2, 1], [1, 2, 3], [2, 4, 3], [3, 4, 5]])
+    graph = from_arrays(vertices, triangles)
+    return Production2.apply(graph, Production2.find_isomorphic_at(graph, 7))
+
+
+def _drawn_elements(graph, rows):
+    mesh = MeshArrays.from_graph(graph)
+    return sorted(
+        i
+        for i in mesh.ids[rows].tolist()
+        if graph.nodes[i]["vertex_type"]
+        in (VertexType.INTERIOR, VertexType.INTERIOR_USED)
+    )
+
+
+def test_elements_outside_viewport_are_culled(strip_graph):
+    # given
+    mesh = MeshArrays.from_graph(strip_graph)
+
+    # when
+    rows = _visible_rows(mesh, 1, (1.5, 0.0, 2.0, 1.0), None, 0.0)
+
+    # then
+    assert _drawn_elements(strip_graph, rows) == [9, 10]
+    assert len(rows) == 2 + 4
+
+
+def test_elements_are_replaced_by_ancestors(strip_graph):
+    # given
+    mesh = MeshArrays.from_graph(strip_graph)
+    children = _drawn_elements(
+        strip_graph, _visible_rows(mesh, 2, (0.0, 0.0, 2.0, 1.0), None, 0.0)
+    )
+
+    # when
+    small = _visible_rows(mesh, 2, (0.0, 0.0, 2.0, 1.0), None, 5.0)
+    limited = _visible_rows(mesh, 2, (0.0, 0.0, 2.0, 1.0), 1, 0.0)
+
+    # then
+    assert len(children) == 2
+    assert _drawn_elements(strip_graph, small) == [7]
+    assert _drawn_elements(strip_graph, limited) == [7]
+
+
+def test_elements_are_indexed_once_per_mesh(strip_graph, monkeypatch):
+    # given
+    mesh = MeshArrays.from_graph(strip_graph)
+    first = _visible_rows(mesh, 1, (1.5, 0.0, 2.0, 1.0), None, 0.0)
+    monkeypatch.setattr(
+        "gg_project.vis._elements", lambda mesh: pytest.fail("elements rebuilt")
+    )
+
+    # when
+    panned = _visible_rows(mesh, 1, (0.0, 0.0, 0.5, 1.0), None, 0.0)
+    again = _visible_rows(mesh, 1, (1.5, 0.0, 2.0, 1.0), None, 0.0)
+
+    # then
+    assert _drawn_elements(strip_graph, panned) == [7, 8]
+    assert np.array_equal(again, first)
+
+
+def _closeness_to_origin(graph, node_id):
+    return -min(
+        sum(graph.nodes[i]["position"]) for i in triangle_corners(graph, node_id)
+    )
+
+
+def test_small_viewport_of_deep_mesh_gives_few_rows(graph_after_first_production):
+    # given
+    graph = refine_by_priority(
+        graph_after_first_production, _closeness_to_origin, max_nodes=400
+    )
+    mesh = MeshArrays.from_graph(graph)
+
+    # when
+    rows = _visible_rows(mesh, None, (0.95, 0.95, 1.0, 1.0), None, 0.0)
+
+    # then
+    assert max(mesh.levels) > 10
+    assert 0 < len(rows) < len(mesh) / 4
+
+
+def test_draw_viewport(strip_graph):
+    mesh = MeshArrays.from_graph(strip_graph)
+    draw(
+        strip_graph,
+        level=1,
+        bbox=(1.5, 0.0, 2.0, 1.0),
+        max_elements=10,
+        fast=True,
+        mesh=mesh,
+    )
+
+    axes = plt.gcf().axes[0]
+    assert axes.get_xlim() == (1.5, 2.0)
+    assert axes.get_ylim() == (-3.0, -2.0)
+    plt.close("all")
+
+
+@pytest.fixture
+def second_step(graph_after_first_production, production2):
+    graph = graph_after_first_production
+    subgraph = production2.find_isomorphic_to_left_side(graph)
+    return graph, production2.apply(graph, subgraph)
+
+
+def _highlighted(axes):
+    return {
+        collection.get_label(): len(collection.get_offsets())
+        for collection in axes.collections
+        if collection.get_label() in DIFF_LABELS.values()
+    }
+
+
+def test_diff_highlights_only_changes(second_step):
+    # given
+    old, new = second_step
+
+    # when
+    draw_diff(old, new)
+
+    # then
+    axes = plt.gcf().axes[0]
+    faded = [c for c in axes.collections if c.get_rasterized()]
+    assert len(faded) == 2
+    assert len(faded[1].get_offsets()) == len(old) - 1
+    assert _highlighted(axes) == {
+        DIFF_LABELS["added"]: len(new) - len(old),
+        DIFF_LABELS["removed"]: 0,
+        DIFF_LABELS["changed"]: 1,
+    }
+    plt.close("all")
+
+
+def test_diff_of_delta_reuses_layout(second_step):
+    # given
+    old, new = second_step
+    delta = Delta.between(old, new)
+    layout = node_positions(new)
+
+    # when
+    draw_diff(old, delta=delta, level=2, layout=layout)
+
+    # then
+    axes = plt.gcf().axes[0]
+    offsets = np.concatenate(
+        [c.get_offsets() for c in axes.collections if isinstance(c, PathCollection)]
+    )
+    assert sorted(map(tuple, offsets.tolist())) == sorted(
+        layout[i] for i, node in new.nodes.items() if node["level"] == 2
+    )
+    plt.close("all")
+
+
+def test_diff_needs_new_graph_or_delta(graph_after_first_production):
+    with pytest.raises(ValueError):
+        draw_diff(graph_after_first_production)